@@ -0,0 +1,168 @@
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+import cache
+import difficulty
+import generator
+import puzzle_format
+from puzzle_format import grid
+
+
+def build(seed, rows=7, columns=7, density=None, unique=False, level=None, compact=False):
+    """
+    Returns (Board, Rating or None) for a puzzle seed; the same seed and settings always
+    give the same puzzle, so a seed can be stored instead of the puzzle.
+    compact - generate on a BitBoard (see generator.generate), which is returned as it is
+    unless the puzzle must be unique
+    """
+    if level is not None:
+        return difficulty.generate_rated(rows, columns, density, level, seed=seed, compact=compact)
+    if unique:
+        return generator.generate_unique(rows, columns, density, seed=seed, compact=compact), None
+    return generator.generate(rows, columns, density, seed=seed, compact=compact), None
+
+
+def build_task(task):
+    """Worker for rebuild: builds the puzzle for (seed, rows, columns, density, unique, level, compact)."""
+    return build(*task)[0]
+
+
+def rebuild(seeds, rows=7, columns=7, density=None, unique=False, level=None, workers=None, compact=False):
+    """
+    Rebuilds the Boards for a list of puzzle seeds (as written by generate_batch) across a
+    pool of worker processes; returns them in the order of the seeds.
+    """
+    tasks = [(seed, rows, columns, density, unique, level, compact) for seed in seeds]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(build_task, tasks)
+
+
+def generate_chunk(task):
+    """
+    Worker: generates one chunk of puzzles. Each puzzle gets a 64-bit seed drawn from the
+    chunk's own generator, so the output of a chunk does not depend on which process runs
+    it, and each puzzle can be rebuilt from its seed alone (see build).
+    Returns a list of (key, encoded puzzle, entry): 'key' is the canonical hash and 'entry'
+    what a cache.PuzzleCache knows about the puzzle (its solution on the canonical grid, and
+    its uniqueness and rating when they are known).
+    """
+    seed, chunk, size, rows, columns, density, unique, level, output, compact = task
+    rng = random.Random('{}-{}'.format(seed, chunk))
+
+    records = []
+    for i in range(size):
+        puzzle_seed = rng.getrandbits(64)
+        board, rating = build(puzzle_seed, rows, columns, density, unique, level, compact)
+        lines = grid(board)
+        # rotations and reflections of an earlier puzzle count as duplicates
+        k, moved = cache.canonical(lines)
+        key = cache.digest(moved)
+        entry = {'solution': cache.move(k, sorted(board.get_certificate()), rows, columns)}
+        if unique or level is not None:
+            entry['unique'] = True
+        if rating is not None:
+            entry['rating'] = list(rating)
+        if output == 'binary':
+            data = puzzle_format.encode(board)
+        elif output == 'text':
+            data = (puzzle_format.to_tatham(board) + '\n').encode()
+        elif output == 'seeds':
+            data = '{}\n'.format(puzzle_seed).encode()
+        else:
+            record = {'seed': puzzle_seed, 'rows': rows, 'columns': columns, 'grid': lines,
+                      'solution': sorted(board.get_certificate())}
+            if rating is not None:
+                record['level'] = rating.name
+                record['steps'] = rating.steps
+            data = (json.dumps(record) + '\n').encode()
+        records.append((key, data, entry))
+    return records
+
+
+def generate_batch(count, path, rows=7, columns=7, density=None, unique=False, seed=0,
+                   workers=None, chunk_size=100, output='json', level=None, compact=False, cache_path=None):
+    """
+    Generates 'count' different puzzles across a pool of worker processes and streams them
+    to the file at 'path'. Puzzles with the same walls and clues as an earlier one
+    (up to rotation and reflection) are skipped.
+
+    output - 'json' for one JSON object per line (see puzzle_format.grid for the layout),
+    'text' for one game ID per line, 'binary' for a puzzle_format binary file or 'seeds' for
+    one puzzle seed per line (see rebuild)
+    level - if given, only puzzles rated at this difficulty level (see difficulty.LEVELS)
+    compact - generate on BitBoards (see generator.generate); the seeds must be rebuilt
+    with the same setting
+    cache_path - if given, the solution (and uniqueness and rating) of every puzzle written
+    is also stored in the cache.PuzzleCache at this path, so it never has to be solved again
+
+    The same seed and settings always write the same file, whatever the number of workers.
+    Stops early if a whole round of chunks only gives duplicates (there are few different
+    puzzles on very small Boards).
+    Returns a dictionary with the number of puzzles written, duplicates skipped and seconds taken.
+    """
+    start = time.perf_counter()
+    seen = set()
+    written = duplicates = 0
+    chunk = 0
+
+    with open(path, 'wb') as file, multiprocessing.Pool(workers) as pool, \
+            cache.PuzzleCache(path=cache_path) as puzzles:
+        if output == 'binary':
+            file.write(puzzle_format.HEADER.pack(puzzle_format.MAGIC, puzzle_format.VERSION,
+                                                 puzzle_format.FLAG_SOLUTION, 0))
+        while written < count:
+            before = written
+            # ask for enough chunks to cover what is still missing (duplicates need another round)
+            chunks = -(-(count - written) // chunk_size)
+            tasks = [(seed, c, chunk_size, rows, columns, density, unique, level, output, compact)
+                     for c in range(chunk, chunk + chunks)]
+            chunk += chunks
+
+            # the chunks are taken in order, so which of two duplicates is kept (and the order of
+            # the file) does not depend on which worker finishes first
+            for records in pool.imap(generate_chunk, tasks):
+                for key, data, entry in records:
+                    if written == count:
+                        break
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                    file.write(data)
+                    written += 1
+                    if cache_path is not None:
+                        puzzles.store(key, puzzles.lookup(key), **entry)
+
+            # a whole round of duplicates means that small Boards have run out of new puzzles
+            if written == before:
+                break
+
+    return {'written': written, 'duplicates': duplicates, 'seconds': time.perf_counter() - start}
+
+
+# e.g. 'python3 batch.py 100000 puzzles.bin --size 10 10 --unique --format binary'
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a batch of Light Up puzzles.')
+    parser.add_argument('count', type=int, help='number of puzzles')
+    parser.add_argument('path', help='output file')
+    parser.add_argument('--size', type=int, nargs=2, default=[7, 7], metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--density', type=float, default=None, help='fraction of Black squares')
+    parser.add_argument('--unique', action='store_true', help='only puzzles with a unique solution')
+    # level 4 ('search') is left out: it is rare, and generate_rated would look for it without end
+    parser.add_argument('--level', type=int, choices=[1, 2, 3], default=None,
+                        help='only puzzles of this difficulty (1 easy - 3 hard), implies --unique')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--format', choices=['json', 'text', 'binary', 'seeds'], default='json')
+    parser.add_argument('--compact', action='store_true', help='generate on BitBoards (faster on large Boards)')
+    parser.add_argument('--cache', default=None, help='also store the solutions in this PuzzleCache file')
+    args = parser.parse_args()
+
+    stats = generate_batch(args.count, args.path, args.size[0], args.size[1], args.density, args.unique,
+                           args.seed, args.workers, args.chunk_size, args.format, args.level, args.compact,
+                           args.cache)
+    print('{written} puzzles written ({duplicates} duplicates skipped) in {seconds:.1f} s'.format(**stats))
@@ -0,0 +1,176 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from lightup import Board
+from solver import Solver
+
+STAGES = ['construct', 'create_instance', 'assign_number', 'verifier', 'move', 'solve']
+
+
+def run_board(rows, columns, density, moves, record):
+    """
+    Runs every stage on one new Board, calling record(stage, function) to run and measure
+    each operation:
+      construct       - Board, generate_white_squares, generate_black_squares and generate_edges
+      create_instance - placing the certificate's light bulbs
+      assign_number   - numbering the Black squares
+      verifier        - verifying the certificate
+      move            - placing or removing one light bulb (updating the light of its runs)
+      solve           - solving the Board from its walls and clues
+    """
+    board = Board(rows, columns, density)
+
+    def construct():
+        board.generate_white_squares()
+        board.generate_black_squares()
+        board.generate_edges()
+
+    record('construct', construct)
+    record('create_instance', board.create_instance)
+    record('assign_number', board.assign_number)
+    board.remove_lightbulbs()
+
+    certificate = board.get_certificate()
+    record('verifier', lambda: board.verifier(certificate))
+    board.remove_lightbulbs()
+
+    locations = list(board.run_index)
+    for i in range(moves if locations else 0):
+        square = board.get_square(random.choice(locations))
+        record('move', lambda: board.place_lightbulb(square))
+        record('move', lambda: board.remove_lightbulb(square))
+
+    record('solve', lambda: Solver(board).solve())
+
+
+def percentile(values, p):
+    """Returns the p-th percentile (nearest rank) of the sorted list of values."""
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+def run(sizes=(7, 10, 20, 50), densities=(None, 0.1, 0.3), boards=20, moves=50, seed=0,
+        stages=STAGES, memory=True):
+    """
+    Runs the benchmark over every board size and density and returns the results as a
+    dictionary (see main for the layout). Every (size, density) pair is seeded on its own,
+    so the same Boards are measured on every run.
+    """
+    results = []
+    for size in sizes:
+        for density in densities:
+            times = {stage: [] for stage in stages}
+            peaks = {stage: 0 for stage in stages}
+
+            def timed(stage, function):
+                start = time.perf_counter()
+                function()
+                if stage in times:
+                    times[stage].append(time.perf_counter() - start)
+
+            def traced(stage, function):
+                if stage not in peaks:
+                    function()
+                    return
+                tracemalloc.start()
+                function()
+                peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            random.seed('{}-{}-{}'.format(seed, size, density))
+            for i in range(boards):
+                run_board(size, size, density, moves, timed)
+
+            # memory is traced on a separate run of the first Board, since tracing slows the timings
+            if memory:
+                random.seed('{}-{}-{}'.format(seed, size, density))
+                run_board(size, size, density, moves, traced)
+
+            for stage in stages:
+                values = sorted(times[stage])
+                if not values:
+                    continue
+                total = sum(values)
+                results.append({
+                    'rows': size, 'columns': size, 'density': density, 'stage': stage,
+                    'count': len(values),
+                    'ops_per_sec': len(values) / total if total else None,
+                    'mean_ms': total / len(values) * 1000,
+                    'p50_ms': percentile(values, 50) * 1000,
+                    'p90_ms': percentile(values, 90) * 1000,
+                    'p99_ms': percentile(values, 99) * 1000,
+                    'peak_kib': peaks[stage] / 1024 if memory else None,
+                })
+
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'seed': seed, 'boards': boards, 'moves': moves, 'results': results}
+
+
+def compare(old, new, tolerance=0.25):
+    """
+    Returns the results of 'new' whose median latency is more than 'tolerance' (a fraction)
+    above the same measurement in 'old', as (result, old median in ms) pairs.
+    """
+    def key(result):
+        return result['rows'], result['columns'], result['density'], result['stage']
+
+    baseline = {key(result): result for result in old['results']}
+    slower = []
+    for result in new['results']:
+        before = baseline.get(key(result))
+        if before is not None and result['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            slower.append((result, before['p50_ms']))
+    return slower
+
+
+def main():
+    """
+    Runs the benchmark from the command line, prints a table and saves the results as JSON:
+    {'python', 'platform', 'seed', 'boards', 'moves', 'results': [{'rows', 'columns', 'density',
+    'stage', 'count', 'ops_per_sec', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'peak_kib'}]}.
+    With --compare, exits with status 1 if a stage got slower than the saved baseline.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark Light Up generation, solving and verification.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7, 10, 20, 50])
+    parser.add_argument('--densities', nargs='+', default=['default', '0.1', '0.3'],
+                        help="fractions of Black squares ('default' for the game's own)")
+    parser.add_argument('--boards', type=int, default=20, help='Boards per size and density')
+    parser.add_argument('--moves', type=int, default=50, help='light bulbs placed and removed per Board')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory run')
+    parser.add_argument('--output', default='benchmark.json', help='JSON file for the results')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (fraction)')
+    args = parser.parse_args()
+
+    densities = [None if d == 'default' else float(d) for d in args.densities]
+    report = run(args.sizes, densities, args.boards, args.moves, args.seed, args.stages, not args.no_memory)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=1)
+
+    print('{:>9} {:>8} {:>16} {:>12} {:>10} {:>10} {:>10} {:>10}'.format(
+        'board', 'density', 'stage', 'ops/sec', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'peak KiB'))
+    for result in report['results']:
+        print('{:>9} {:>8} {:>16} {:>12.1f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10}'.format(
+            '{rows} x {columns}'.format(**result), str(result['density']), result['stage'],
+            result['ops_per_sec'] or 0, result['p50_ms'], result['p90_ms'], result['p99_ms'],
+            '-' if result['peak_kib'] is None else '{:.1f}'.format(result['peak_kib'])))
+
+    if args.compare:
+        with open(args.compare) as file:
+            slower = compare(json.load(file), report, args.tolerance)
+        for result, before in slower:
+            print('slower: {rows} x {columns} density {density} {stage}: '.format(**result) +
+                  '{:.3f} ms -> {:.3f} ms'.format(before, result['p50_ms']))
+        if slower:
+            sys.exit(1)
+
+
+# e.g. 'python3 benchmark.py --sizes 7 20 --output new.json --compare old.json'
+if __name__ == '__main__':
+    main()
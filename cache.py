@@ -0,0 +1,260 @@
+import hashlib
+import json
+import sqlite3
+import weakref
+from collections import OrderedDict
+
+import difficulty
+from grading import Puzzle, Grade
+from puzzle_format import grid
+import solver
+
+# The 8 symmetries of a rectangle (rotations and reflections). Symmetry k moves square (x, y)
+# of a rows x columns grid to TRANSFORMS[k](x, y, rows, columns); the symmetries that swap
+# the rows and the columns are listed in TRANSPOSED, and INVERSE[k] undoes symmetry k.
+TRANSFORMS = [
+    lambda x, y, rows, columns: (x, y),                                 # identity
+    lambda x, y, rows, columns: (y, rows + 1 - x),                      # quarter turn clockwise
+    lambda x, y, rows, columns: (rows + 1 - x, columns + 1 - y),        # half turn
+    lambda x, y, rows, columns: (columns + 1 - y, x),                   # quarter turn anticlockwise
+    lambda x, y, rows, columns: (x, columns + 1 - y),                   # mirror left to right
+    lambda x, y, rows, columns: (y, x),                                 # transpose
+    lambda x, y, rows, columns: (rows + 1 - x, y),                      # mirror top to bottom
+    lambda x, y, rows, columns: (columns + 1 - y, rows + 1 - x),        # anti-transpose
+]
+TRANSPOSED = {1, 3, 5, 7}
+INVERSE = [0, 3, 2, 1, 4, 5, 6, 7]
+
+
+def transform(k, lines):
+    """
+    Returns the grid lines (see puzzle_format.grid) moved by symmetry k; the same as moving
+    every square with TRANSFORMS[k], but with string slicing.
+    """
+    if k in TRANSPOSED:
+        lines = [''.join(column) for column in zip(*lines)]
+        k = {5: 0, 1: 4, 3: 6, 7: 2}[k]
+    if k == 0:
+        return list(lines)
+    if k == 4:
+        return [line[::-1] for line in lines]
+    if k == 6:
+        return lines[::-1]
+    return [line[::-1] for line in lines[::-1]]
+
+
+def move(k, locations, rows, columns):
+    """Returns the locations of a rows x columns grid moved by symmetry k."""
+    return [TRANSFORMS[k](x, y, rows, columns) for x, y in locations]
+
+
+def canonical(lines):
+    """
+    Returns (k, canonical lines): the smallest of the 8 symmetric forms of the grid
+    (comparing the size first) and the symmetry k that gives it.
+    """
+    best = None
+    for k in range(len(TRANSFORMS)):
+        moved = transform(k, lines)
+        key = (len(moved), moved)
+        if best is None or key < best[0]:
+            best = key, k, moved
+    return best[1], best[2]
+
+
+def canonical_hash(board):
+    """
+    Returns a hex digest of the Board's walls and clues that is the same for every
+    rotation and reflection of the Board.
+    """
+    k, lines = canonical(grid(board))
+    return digest(lines)
+
+
+def digest(lines):
+    """Returns the hex digest of grid lines."""
+    return hashlib.blake2b('\n'.join(lines).encode(), digest_size=16).hexdigest()
+
+
+def flush(db):
+    """Commits the pending entries of a PuzzleCache's SQLite file and closes it."""
+    db.commit()
+    db.close()
+
+
+class PuzzleCache:
+    # Remembers the solution, uniqueness and difficulty of puzzles, keyed by canonical hash,
+    # so that a puzzle (or any rotation or reflection of it) is only solved and rated once.
+    #
+    # Entries are dictionaries with any of 'solution' (light bulb locations in the canonical
+    # grid, or None if there is no solution), 'unique' (True or False) and 'rating' (a
+    # difficulty.Rating as a list). The most recently used 'maxsize' entries are kept in
+    # memory; if 'path' is given, entries are also stored in an SQLite file that keeps the
+    # 'disk_limit' most recently used ones. Writes are committed in batches; close (or leaving
+    # a with block) commits the rest, and so does the process exiting with the cache open.
+    def __init__(self, maxsize=10000, path=None, disk_limit=1000000):
+        """
+        Opens the cache (and the SQLite file at 'path', creating it if needed).
+        """
+        self.maxsize = maxsize
+        self.disk_limit = disk_limit
+        self.entries = OrderedDict()    # hash -> entry, least recently used first
+        self.puzzles = OrderedDict()    # hash -> grading.Puzzle of the canonical grid
+        self.hits = 0                   # lookups of solutions, uniqueness and ratings
+        self.misses = 0
+        self.grade_hits = 0             # answers graded with a kept grading.Puzzle
+        self.grade_misses = 0
+        self.db = None
+        self.finalizer = None           # flushes the SQLite file if the cache is not closed
+        self.clock = 0                  # last use of the entries on disk
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute('CREATE TABLE IF NOT EXISTS puzzles '
+                            '(hash TEXT PRIMARY KEY, entry TEXT, used INTEGER)')
+            self.clock = self.db.execute('SELECT COALESCE(MAX(used), 0) FROM puzzles').fetchone()[0]
+            self.finalizer = weakref.finalize(self, flush, self.db)
+
+    def get_stats(self):
+        """
+        Returns the hits and misses of the entries (solve, is_unique and rate) and of grade,
+        and the number of entries and grading.Puzzles in memory, as a dictionary.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+                'grade_hits': self.grade_hits, 'grade_misses': self.grade_misses, 'puzzles': len(self.puzzles)}
+
+    def key(self, board):
+        """
+        Returns (hash, k, rows, columns) for the Board: its canonical hash, the symmetry
+        that gives the canonical grid and the Board's size.
+        """
+        lines = grid(board)
+        k, moved = canonical(lines)
+        rows, columns = board.get_size()
+        return digest(moved), k, rows, columns
+
+    def lookup(self, h):
+        """Returns the entry for the hash (from memory or disk), or an empty dictionary."""
+        if h in self.entries:
+            self.entries.move_to_end(h)
+            return self.entries[h]
+        entry = {}
+        if self.db is not None:
+            row = self.db.execute('SELECT entry FROM puzzles WHERE hash = ?', (h,)).fetchone()
+            if row is not None:
+                entry = json.loads(row[0])
+                self.touch(h, entry)
+        self.remember(h, entry)
+        return entry
+
+    def remember(self, h, entry):
+        """Keeps the entry in memory, evicting the least recently used one if needed."""
+        self.entries[h] = entry
+        self.entries.move_to_end(h)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def touch(self, h, entry):
+        """Writes the entry to disk as the most recently used one, evicting beyond disk_limit."""
+        self.clock += 1
+        self.db.execute('INSERT OR REPLACE INTO puzzles VALUES (?, ?, ?)',
+                        (h, json.dumps(entry), self.clock))
+        if self.clock % 1000 == 0:
+            self.db.execute('DELETE FROM puzzles WHERE used <= ?', (self.clock - self.disk_limit,))
+            self.db.commit()
+
+    def store(self, h, entry, **fields):
+        """Adds the fields to the entry for the hash."""
+        entry.update(fields)
+        self.remember(h, entry)
+        if self.db is not None:
+            self.touch(h, entry)
+
+    def close(self):
+        """Writes pending entries to disk and closes the SQLite file."""
+        if self.db is not None:
+            self.finalizer()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def solve(self, board):
+        """
+        Returns the Board's solution as a certificate {location: White square}, or None
+        (see solver.solve); the solver only runs the first time a puzzle is seen.
+        """
+        h, k, rows, columns = self.key(board)
+        entry = self.lookup(h)
+        if 'solution' in entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+            solution = solver.solve(board)
+            if solution is not None:
+                solution = move(k, solution, rows, columns)
+            self.store(h, entry, solution=solution)
+        if entry['solution'] is None:
+            return None
+        # the canonical grid has the transposed size if symmetry k swaps rows and columns
+        size = (columns, rows) if k in TRANSPOSED else (rows, columns)
+        locations = move(INVERSE[k], [tuple(p) for p in entry['solution']], *size)
+        return {location: board.get_square(location) for location in locations}
+
+    def is_unique(self, board):
+        """Returns whether the Board has exactly one solution (see solver.is_unique)."""
+        h, k, rows, columns = self.key(board)
+        entry = self.lookup(h)
+        if 'unique' in entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.store(h, entry, unique=solver.is_unique(board))
+        return entry['unique']
+
+    def rate(self, board):
+        """Returns the Board's difficulty.Rating."""
+        h, k, rows, columns = self.key(board)
+        entry = self.lookup(h)
+        if 'rating' in entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.store(h, entry, rating=list(difficulty.rate(board)))
+        return difficulty.Rating(*entry['rating'])
+
+    def grade(self, board, answer):
+        """
+        Grades an answer (a collection of light bulb locations) for the Board, see grading;
+        the Grade is the same as grading.grade gives (invalid locations in answer order, the
+        other locations in row order). The grading.Puzzle of the canonical grid is kept with
+        the most recent entries.
+        """
+        lines = grid(board)
+        k, moved = canonical(lines)
+        h = digest(moved)
+        if h in self.puzzles:
+            self.grade_hits += 1
+            self.puzzles.move_to_end(h)
+        else:
+            self.grade_misses += 1
+            self.puzzles[h] = Puzzle(moved)
+            while len(self.puzzles) > self.maxsize:
+                self.puzzles.popitem(last=False)
+
+        rows, columns = board.get_size()
+        result = self.puzzles[h].grade(move(k, answer, rows, columns))
+        if result.solved:
+            return result
+
+        # move the reported locations back onto the Board (the invalid ones are in answer order
+        # already, the others are sorted back into the Board's row order)
+        size = (columns, rows) if k in TRANSPOSED else (rows, columns)
+        back = INVERSE[k]
+        return Grade(False, move(back, result.invalid, *size),
+                     sorted(move(back, result.unlit, *size)),
+                     sorted(move(back, result.conflicts, *size)),
+                     sorted((move(back, [location], *size)[0], number, bulbs)
+                            for location, number, bulbs in result.wrong_clues))
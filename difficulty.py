@@ -0,0 +1,165 @@
+from collections import namedtuple
+
+import generator
+from lightup import make_rng
+from solver import Solver, UNKNOWN, BULB, EMPTY
+
+# the deduction ladder, from the easiest technique to the hardest:
+#   1 'easy'   - clues and light bulbs: a light bulb empties its runs, a numbered Black square with
+#                all of its light bulbs empties the rest of its neighbors, and one that needs all of
+#                its unknown neighbors fills them with light bulbs
+#   2 'medium' - an unlit square that can only be lit by one square gets a light bulb there
+#   3 'hard'   - trial: a square that leads to a contradiction (with the rules above) as a light
+#                bulb must be EMPTY, and one that leads to a contradiction as EMPTY is a light bulb
+#   4 'search' - none of the above finishes the puzzle, so it needs guessing and backtracking
+LEVELS = {1: 'easy', 2: 'medium', 3: 'hard', 4: 'search'}
+
+# The rating of a Board: the hardest technique needed ('level' and its 'name'), the number of
+# deductions ('steps') and the deductions made with each technique ('counts', indexed by level).
+Rating = namedtuple('Rating', ['level', 'name', 'steps', 'counts'])
+
+
+class Grader(Solver):
+    # Solves a Board the way a person would: it always uses the easiest technique that
+    # still makes progress, and remembers the hardest one it needed.
+    def __init__(self, board):
+        """
+        Takes the Board to rate; the Board must have its edges (and run index) generated.
+        """
+        Solver.__init__(self, board)
+        self.level = 1              # hardest technique propagate may use
+
+    def check_light(self, i):
+        """
+        Below level 2 an unlit square is only checked for a contradiction (nothing can
+        light it anymore); from level 2 on, a single possible lighter gets a light bulb.
+        """
+        if self.level >= 2:
+            return Solver.check_light(self, i)
+        if self.lit(i) or self.lighters(i) > 0:
+            return True
+        self.conflict = 0
+        return False
+
+    def deduce(self, level):
+        """
+        Propagates the queued assignments with the techniques up to 'level';
+        returns the number of squares decided, or None on a contradiction.
+        """
+        self.level = level
+        mark = len(self.trail)
+        if self.propagate() is False:
+            return None
+        return len(self.trail) - mark
+
+    def single_lighters(self):
+        """
+        Gives a light bulb to every square that is the only possible lighter of an unlit
+        square; returns the number of light bulbs placed, or None on a contradiction.
+        """
+        placed = 0
+        for i in range(len(self.locations)):
+            if not self.lit(i) and self.lighters(i) == 1:
+                reason, candidates = self.light_reason(i)
+                if self.value[candidates[0]] == UNKNOWN:
+                    if self.assign(candidates[0], BULB, 0) is False:
+                        return None
+                    placed += 1
+        return placed
+
+    def trial(self):
+        """
+        Tries both values of every unknown square with the techniques up to level 2 and fixes
+        the first square where one of them fails; returns whether a square was fixed.
+        """
+        for i in range(len(self.locations)):
+            if self.value[i] != UNKNOWN:
+                continue
+            for value, other in ((BULB, EMPTY), (EMPTY, BULB)):
+                mark = len(self.trail)
+                failed = self.assign(i, value, 0) is False or self.deduce(2) is None
+                self.undo(mark)
+                if failed:
+                    self.assign(i, other, 0)
+                    return True
+        return False
+
+    def rate(self):
+        """
+        Solves the Board step by step and returns its Rating.
+        """
+        self.undo(0)
+        counts = [0] * (len(LEVELS) + 1)
+        hardest = 1
+
+        # the clues of the empty Board
+        self.level = 1
+        for c in range(len(self.clues)):
+            if self.check_clue(c) is False:
+                return Rating(4, LEVELS[4], sum(counts), counts)
+
+        while True:
+            decided = self.deduce(1)
+            if decided is None:
+                return Rating(4, LEVELS[4], sum(counts), counts)
+            counts[1] += decided
+            if self.choose() is None:
+                return Rating(hardest, LEVELS[hardest], sum(counts), counts)
+
+            placed = self.single_lighters()
+            if placed is None:
+                return Rating(4, LEVELS[4], sum(counts), counts)
+            if placed:
+                counts[2] += placed
+                hardest = max(hardest, 2)
+                continue
+
+            if self.trial():
+                counts[3] += 1
+                hardest = 3
+                continue
+
+            counts[4] += 1
+            return Rating(4, LEVELS[4], sum(counts), counts)
+
+
+def rate(board):
+    """
+    Returns the Rating of the Board (see LEVELS).
+    """
+    return Grader(board).rate()
+
+
+def generate_rated(rows=7, columns=7, density=None, level=2, min_steps=0, max_steps=None,
+                   minimize=None, attempts=None, stats=None, seed=None, rng=None, compact=False):
+    """
+    Generates Boards with a unique solution until one is rated at 'level' with between
+    'min_steps' and 'max_steps' deductions; returns (Board, Rating), or None if 'attempts'
+    Boards were rejected.
+
+    minimize - remove the clues that are not needed (harder puzzles, slower to generate);
+    by default only for levels 3 and up, since easy puzzles need their extra clues
+    stats - if given, a dictionary that counts the 'attempts' and 'rejected' Boards
+    seed, rng - see Board; the same seed always gives the same Board
+    compact - see generator.generate
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('attempts', 0)
+    stats.setdefault('rejected', 0)
+
+    if minimize is None:
+        minimize = level >= 3
+    rng = make_rng(seed, rng)
+
+    tries = 0
+    while attempts is None or tries < attempts:
+        tries += 1
+        stats['attempts'] += 1
+        board = generator.generate_unique(rows, columns, density, minimize, rng=rng, compact=compact)
+        rating = rate(board)
+        if rating.level == level and rating.steps >= min_steps and \
+                (max_steps is None or rating.steps <= max_steps):
+            return board, rating
+        stats['rejected'] += 1
+    return None
@@ -0,0 +1,137 @@
+from lightup import Board, BitBoard, White, make_rng
+from solver import Solver
+
+
+def generate(rows=7, columns=7, density=None, seed=None, rng=None, compact=False):
+    """
+    Runs the same generation sequence as the game (without opening a window) and returns
+    the Board, with its certificate and clues but no light bulbs placed.
+    seed, rng - see Board; the same seed always gives the same Board
+    compact - if True, the puzzle is generated and returned as a BitBoard (other puzzles for
+    the same seed); it has the certificate and the grid lines (see puzzle_format.grid), and
+    to_board() turns it into a Board. The BitBoard drops its random number generator once
+    the puzzle is generated.
+    """
+    board = (BitBoard if compact else Board)(rows, columns, density, seed, rng)
+    board.generate_white_squares()
+    board.generate_black_squares()
+    board.generate_edges()
+    board.create_instance()
+    board.assign_number()
+    board.remove_lightbulbs()
+    if compact:
+        board.random = None
+    return board
+
+
+def adjacent_bulbs(square, certificate):
+    """Returns the number of the certificate's light bulbs next to the square."""
+    return sum(1 for p in square.get_neighbors() if p.get_location() in certificate)
+
+
+def keeps_lit(board, certificate, location):
+    """
+    Returns whether every White square stays lit by the certificate after the (White, not a
+    light bulb) square at the location turns Black: each part of its two runs that is cut off
+    from the certificate's light bulb must be lit from the other direction.
+    """
+    square = board.get_square(location)
+    for run in board.get_runs(square):
+        cut = run.index(square)
+        for part in (run[:cut], run[cut + 1:]):
+            if any(p.get_location() in certificate for p in part):
+                continue
+            for p in part:
+                horizontal, vertical = board.get_runs(p)
+                other = vertical if run is horizontal else horizontal
+                if not any(q.get_location() in certificate for q in other):
+                    return False
+    return True
+
+
+def unique_candidates(board, certificate, other):
+    """
+    Yields the White squares that rule out the 'other' solution if they turn Black:
+    first its light bulbs that are not in the certificate, then the squares whose
+    number would differ between the two solutions.
+    """
+    for location in other:
+        if location not in certificate:
+            yield location
+    for square in board.get_squares():
+        location = square.get_location()
+        if type(square) == White and location not in certificate and location not in other:
+            if adjacent_bulbs(square, certificate) != adjacent_bulbs(square, other):
+                yield location
+
+
+def make_unique(board):
+    """
+    Adds clues and walls to the Board until its certificate is its only solution.
+
+    Every Black square is numbered first. While the solver still finds a second solution,
+    a White square that rules it out is turned into a Black square numbered for the
+    certificate, as long as the certificate stays valid. That is a square where the other
+    solution has a light bulb (and the certificate does not), or else one whose number
+    would differ between the two solutions.
+    Returns False if no such square could be found.
+    """
+    certificate = board.get_certificate()
+    for square in board.black:
+        number = str(adjacent_bulbs(square, certificate))
+        square.set_number(number)
+        square.set_tag(number)
+
+    while True:
+        solutions = []
+        for solution in Solver(board).solutions():
+            solutions.append(solution)
+            if len(solutions) == 2:
+                break
+        if len(solutions) < 2:
+            return len(solutions) == 1
+
+        other = solutions[0] if solutions[0].keys() != certificate.keys() else solutions[1]
+        for location in unique_candidates(board, certificate, other):
+            if keeps_lit(board, certificate, location):
+                number = str(adjacent_bulbs(board.get_square(location), certificate))
+                board.add_black_square(location, number)
+                break
+        else:
+            return False
+
+
+def remove_clues(board):
+    """
+    Removes every clue that is not needed to keep the Board's solution unique.
+    """
+    squares = [square for square in board.black if square.get_number() != 'B']
+    board.random.shuffle(squares)
+    for square in squares:
+        number = square.get_number()
+        square.set_number('B')
+        square.set_tag('B')
+        if Solver(board).count_solutions(2) != 1:
+            square.set_number(number)
+            square.set_tag(number)
+
+
+def generate_unique(rows=7, columns=7, density=None, minimize=False, seed=None, rng=None, compact=False):
+    """
+    Returns a Board whose certificate is its only solution.
+
+    minimize - if True, also remove the clues that are not needed for uniqueness
+    (fewer clues, but slower to generate).
+    seed, rng - see Board; every attempt draws from the same generator, so the same
+    seed always gives the same Board
+    compact - generate on a BitBoard (see generate); a Board is returned either way
+    """
+    rng = make_rng(seed, rng)
+    while True:
+        board = generate(rows, columns, density, rng=rng, compact=compact)
+        if compact:
+            board = board.to_board(rng)
+        if make_unique(board):
+            if minimize:
+                remove_clues(board)
+            return board
@@ -0,0 +1,154 @@
+from collections import namedtuple
+
+from puzzle_format import grid
+
+# The result of grading one answer. 'solved' is True when every other field is empty:
+#   invalid     - answer locations that are not White squares (ignored for the other checks)
+#   unlit       - White squares that no light bulb illuminates
+#   conflicts   - light bulbs that are illuminated by another light bulb
+#   wrong_clues - (location, number, adjacent light bulbs) for every unsatisfied numbered Black square
+# Locations are (row, column) tuples in row order.
+Grade = namedtuple('Grade', ['solved', 'invalid', 'unlit', 'conflicts', 'wrong_clues'])
+
+
+class Puzzle:
+    # An immutable view of a puzzle's walls and clues for grading answers.
+    #
+    # Square (x, y) is bit (x - 1) * columns + (y - 1). Everything an answer is checked against
+    # is computed once here: for each White square the bitmask of the squares it sees (its two
+    # runs), and for each numbered Black square the bitmask of its neighbors. Grading never
+    # changes the Puzzle, so one Puzzle can grade any number of answers, from any thread.
+    __slots__ = ('rows', 'columns', 'white', 'sight', 'clues')
+
+    def __init__(self, lines):
+        """
+        Builds the Puzzle from grid lines (see puzzle_format.grid).
+        """
+        self.rows = len(lines)
+        self.columns = len(lines[0]) if lines else 0
+        self.white = 0
+        self.sight = [0] * (self.rows * self.columns)   # squares in the runs of each White square
+        self.clues = []                                 # (location, number, neighbors bitmask)
+
+        squares = ''.join(lines)
+        for i, character in enumerate(squares):
+            if character == '.':
+                self.white |= 1 << i
+
+        # every line of squares (rows, then columns) splits into runs at the Black squares
+        lines_of_squares = [range(x * self.columns, (x + 1) * self.columns) for x in range(self.rows)]
+        lines_of_squares += [range(y, self.rows * self.columns, self.columns) for y in range(self.columns)]
+        for line in lines_of_squares:
+            run = []
+            for i in list(line) + [None]:
+                if i is not None and squares[i] == '.':
+                    run.append(i)
+                    continue
+                mask = 0
+                for j in run:
+                    mask |= 1 << j
+                for j in run:
+                    self.sight[j] |= mask
+                run = []
+
+        for i, character in enumerate(squares):
+            if character not in '.#':
+                x, y = divmod(i, self.columns)
+                neighbors = 0
+                for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                    if 0 <= x + dx < self.rows and 0 <= y + dy < self.columns:
+                        neighbors |= 1 << ((x + dx) * self.columns + y + dy)
+                self.clues.append(((x + 1, y + 1), int(character), neighbors))
+
+    @classmethod
+    def from_board(cls, board):
+        """Returns the Puzzle for a Board's walls and clues."""
+        return cls(grid(board))
+
+    def get_size(self):
+        """Returns the size of the playable area as a tuple (rows, columns)."""
+        return self.rows, self.columns
+
+    def locations(self, mask):
+        """Returns the location (row, column) of every square in the mask, row by row."""
+        found = []
+        while mask:
+            low = mask & -mask
+            x, y = divmod(low.bit_length() - 1, self.columns)
+            found.append((x + 1, y + 1))
+            mask ^= low
+        return found
+
+    def grade(self, answer):
+        """
+        Grades an answer, a collection (or dictionary) of light bulb locations, and returns a
+        Grade. Nothing is modified, so answers can be graded in any order.
+        """
+        bulbs = lit = conflicts = 0
+        invalid = False
+        for x, y in answer:
+            if 1 <= x <= self.rows and 1 <= y <= self.columns:
+                bit = 1 << ((x - 1) * self.columns + y - 1)
+                if self.white & bit:
+                    bulbs |= bit
+                    continue
+            invalid = True
+
+        # a light bulb lights its runs; another light bulb in them is a conflict
+        mask = bulbs
+        while mask:
+            low = mask & -mask
+            seen = self.sight[low.bit_length() - 1]
+            lit |= seen
+            if bulbs & seen != low:
+                conflicts |= low
+            mask ^= low
+
+        wrong_clues = [(location, number, bin(bulbs & neighbors).count('1'))
+                       for location, number, neighbors in self.clues
+                       if bin(bulbs & neighbors).count('1') != number]
+        unlit = self.white & ~lit
+
+        if not (invalid or unlit or conflicts or wrong_clues):
+            return Grade(True, [], [], [], [])
+        return Grade(False, self.invalid(answer) if invalid else [], self.locations(unlit),
+                     self.locations(conflicts), wrong_clues)
+
+    def invalid(self, answer):
+        """Returns the answer locations that are not White squares of the Puzzle."""
+        found = []
+        for x, y in answer:
+            if not (1 <= x <= self.rows and 1 <= y <= self.columns and
+                    self.white >> ((x - 1) * self.columns + y - 1) & 1):
+                found.append((x, y))
+        return found
+
+
+def grade(puzzle, answer):
+    """
+    Grades one answer against a Puzzle (or a Board, which is converted first); returns a Grade.
+    """
+    if not isinstance(puzzle, Puzzle):
+        puzzle = Puzzle.from_board(puzzle)
+    return puzzle.grade(answer)
+
+
+def grade_batch(pairs):
+    """
+    Grades many (puzzle, answer) pairs and returns a list of Grades in the same order.
+    Each distinct puzzle (Puzzle, Board or tuple of grid lines) is prepared only once.
+    """
+    puzzles = {}        # grid lines or id(Board) -> (Board or None, Puzzle)
+    grades = []
+    for puzzle, answer in pairs:
+        if isinstance(puzzle, tuple):
+            if puzzle not in puzzles:
+                puzzles[puzzle] = None, Puzzle(list(puzzle))
+            puzzle = puzzles[puzzle][1]
+        elif not isinstance(puzzle, Puzzle):
+            # keep the Board referenced, so its id cannot be reused while the batch runs
+            if id(puzzle) not in puzzles:
+                puzzles[id(puzzle)] = puzzle, Puzzle.from_board(puzzle)
+            puzzle = puzzles[id(puzzle)][1]
+        grades.append(puzzle.grade(answer))
+    return grades
@@ -0,0 +1,413 @@
+import os
+import sys
+
+import pygame
+
+from history import MoveHistory
+from lightup import Board, Black, White
+
+# the light bulb images are next to this file, wherever the game is started from
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class Pygame:
+
+    def __init__(self, rows=7, columns=7, density=None):
+        """
+        Initiate RGB code for color referencing and constants for window settings.
+
+        rows, columns and density are passed on to the Board; the square size shrinks
+        for large Boards so that the window still fits on the screen.
+
+        lb.png and lb2.png images are from:
+        http://clipart-library.com/clipart/pT5dGE7T9.htm
+        http://clipart-library.com/clipart/rcLgLx57i.htm
+        """
+        self.black = (0, 0, 0)
+        self.white = (255, 255, 255)
+        self.green = (0, 255, 0)
+        self.red = (255, 102, 102)
+        self.gray = (105, 105, 105)
+        self.yellow = (255, 255, 204)
+        self.rows = rows                                             # number of playable rows on the Board
+        self.columns = columns                                       # number of playable columns on the Board
+        self.density = density                                       # fraction of Black squares (None for default)
+        self.divider_width = 2                                       # size for the borders dividing the Board
+        self.width = max(6, min(40, 756 // (max(rows, columns) + 2) - self.divider_width))
+        self.height = self.width                                     # the width and height in pixels for each square
+        self.step = self.width + self.divider_width                  # distance in pixels between two squares
+        self.board_right = self.step * (columns + 1)                 # right edge of the Board in pixels
+        self.board_bottom = self.step * (rows + 1)                   # bottom edge of the Board in pixels
+        self.windows = [max(380, self.step * (columns + 2) + 2), self.board_bottom + 114]   # screen size (width x height)
+        self.screen = pygame.display.set_mode(self.windows)          # initiate display when object is created
+        self.image = pygame.image.load(os.path.join(HERE, 'lb.png')).convert()    # normal light bulb image
+        self.image2 = pygame.image.load(os.path.join(HERE, 'lb2.png')).convert()  # red light bulb image
+
+        # shrink the light bulb images along with the squares
+        if self.height < 40:
+            size = (21 * self.height // 40, 36 * self.height // 40)
+            self.image = pygame.transform.scale(self.image, size)
+            self.image2 = pygame.transform.scale(self.image2, size)
+
+        self.fps = 30                                                # most frames drawn per second
+        self.clock = pygame.time.Clock()
+        self.drawn = {}                                              # location -> state of the square on screen
+        self.dirty = []                                              # rects to update at the end of the frame
+        self.shown_messages = None                                   # messages currently on screen
+        self.glyphs = {}                                             # (font, text, color) -> rendered tag or label
+        self.fonts = {}
+
+    def load_fonts(self):
+        """
+        Load the fonts once (the font module must be initialized first).
+        """
+        self.fonts['tag'] = pygame.font.SysFont('Arial', self.height * 3 // 4)
+        self.fonts['button'] = pygame.font.SysFont('Calibri', 35)
+        self.fonts['message'] = pygame.font.SysFont('Calibri', 15)
+
+    def glyph(self, font, text, color, antialias=True):
+        """
+        Returns the rendered surface for the text. Square tags and button labels (a few fixed
+        texts) are rendered only the first time; messages can be any text and are only drawn
+        when they change, so they are not kept.
+        """
+        if font == 'message':
+            return self.fonts[font].render(text, antialias, color)
+        key = (font, text, color)
+        if key not in self.glyphs:
+            self.glyphs[key] = self.fonts[font].render(text, antialias, color)
+        return self.glyphs[key]
+
+    def setup(self):
+        """
+        Take no parameters; initiate all necessary methods to create
+        a playable and solvable instance of Light Up.
+        """
+        board = Board(self.rows, self.columns, self.density)
+        board.generate_white_squares()      
+        board.generate_black_squares()      
+        board.generate_edges()             
+        board.create_instance()             
+        board.assign_number()               
+        board.remove_lightbulbs()           
+        verification = board.verifier(board.get_certificate()) 
+        board.remove_lightbulbs()           
+
+        # initiate Pygame and title
+        pygame.init()
+        pygame.display.set_caption("Light Up")
+        self.load_fonts()
+
+        # only wake up for the events the game handles; mouse motion would redraw nothing
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN])
+        self.draw_window(board)
+
+        # 'save_user_answers' toggles between showing/hiding in-game solution and the player's answers
+        # 'solution_mode' indicates whether the Player is currently viewing the in-game solution
+        save_user_answers = True
+        solution_mode = False
+        victory = False
+
+        # record the Player's light bulbs as moves that can be undone and redone; the solution
+        # and the Player's light bulbs are snapshots, so the 'Solution' button only changes
+        # the light bulbs that differ between them
+        history = MoveHistory(board)
+        solution_bulbs = history.snapshot_of(board.get_certificate())
+        user_bulbs = history.snapshot()
+
+        # Keep the game's loop running until the Player manually exists or if he/she submits a verified solution
+        # The loop sleeps until the next event instead of redrawing the window all the time
+        while True:
+            moved = []      # light bulbs placed or removed in this frame
+            for event in [pygame.event.wait()] + pygame.event.get():
+
+                # get the Player's mouse coordinates when the screen is clicked
+                coordinates = pygame.mouse.get_pos()
+
+                buttons_top = self.board_bottom + 34
+                submit = 200 <= coordinates[0] <= 200 + 110 and buttons_top <= coordinates[1] <= buttons_top + 40
+                solution = 55 <= coordinates[0] <= 166 + 115 and buttons_top + 6 <= coordinates[1] <= buttons_top + 40
+                hint = 315 <= coordinates[0] <= 315 + 60 and buttons_top <= coordinates[1] <= buttons_top + 40
+
+                ESC = event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
+                if event.type == pygame.QUIT or ESC:
+                    pygame.quit()
+                    exit()
+
+                # Ctrl+Z undoes the Player's last move, Ctrl+Y (or Ctrl+Shift+Z) redoes it
+                elif event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL and solution_mode is False:
+                    board.set_message('', '', '')
+                    if event.key == pygame.K_y or (event.key == pygame.K_z and event.mod & pygame.KMOD_SHIFT):
+                        moved += history.redo()
+                    elif event.key == pygame.K_z:
+                        moved += history.undo()
+
+                # listen for Player's clicks on the Board
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+
+                    column = coordinates[0] // self.step
+                    row = coordinates[1] // self.step
+
+                    # reset system messages after Player does an action
+                    board.set_message('', '', '')
+
+                    # listen for Player's click on the 'Submit' button for submitting his/her solution
+                    # also limit the click area for this function to take effect
+                    # 'solution_mode' prevent Player from submitting the in-game solution as their own answer
+                    if submit and solution_mode is False:
+                        results = board.verifier(history.get_answers())
+                        if results is True:
+                            board.set_message('Congratulations! You win!', '', '')
+                            victory = True
+
+                    # listen for Player's click on the 'Hint' button for the next logical move
+                    elif hint:
+                        if solution_mode is False:
+                            self.show_hint(board, board.get_hint(history.get_answers()))
+
+                    # listen for Player's click on the 'Solution' button for showing the in-game solution
+                    elif solution:
+                        if save_user_answers is True:
+                            user_bulbs = history.snapshot()
+                            moved += history.restore(solution_bulbs)
+                            save_user_answers = False
+                            solution_mode = True
+
+                        # if the button is clicked a second time, remove the in-game solution on the Board
+                        # and let the Player continue to play the same instance
+                        elif save_user_answers is False:
+                            moved += history.restore(user_bulbs)
+                            solution_mode = False
+                            save_user_answers = True
+
+                    elif self.step + 2 <= coordinates[0] <= self.board_right and \
+                            self.step + 2 <= coordinates[1] <= self.board_bottom and \
+                            1 <= row <= self.rows and 1 <= column <= self.columns:
+                        square = board.get_square((row, column))
+
+                        if type(square) == White and solution_mode is False:
+                            # if the White square isn't a light bulb, then add a light bulb to this
+                            # square as the Player's next move
+                            if square.get_light_bulb() is False:
+                                moved += history.place((row, column))
+
+                            # if the square already has one of the Player's light bulbs, this indicates
+                            # he/she is asking to remove the light bulb, then proceed to remove it
+                            # the light counts of the squares in the light bulb's row and column are
+                            # updated, which also turns a red light bulb back to normal when the mistake is fixed
+                            else:
+                                moved += history.remove((row, column))
+
+            # Based on the Player's request to update light bulbs above, redraw the squares
+            # that changed and the in-game messages, then update only those parts of the display
+            # (a light bulb placed or removed only changes the squares of its two runs)
+            self.draw_board(board, self.runs_of(board, moved))
+            self.update_message(board)
+            pygame.display.update(self.dirty)
+            self.dirty = []
+            # check if Player has won the game, if so, give congratulatory message and exit game
+            if victory is True:
+                self.check_victory(victory, board)
+            self.clock.tick(self.fps)
+
+    def draw_window(self, board):
+        """
+        Draw the whole window once: the Board, its borders and the buttons.
+        """
+        self.screen.fill(self.black)
+        self.drawn = {}
+        self.shown_messages = None
+        self.draw_board(board)
+        self.draw_borders()
+        self.add_buttons()
+        self.update_message(board)
+        self.dirty = []
+        pygame.display.flip()
+
+    def runs_of(self, board, locations):
+        """
+        Returns the locations of the squares in the two runs of each (White) square at the
+        locations, i.e. every square that placing or removing those light bulbs can change.
+        """
+        squares = set()
+        for location in locations:
+            for run in board.get_runs(board.get_square(location)):
+                squares.update(square.get_location() for square in run)
+        return squares
+
+    def draw_board(self, board, locations=None):
+        """
+        Redraw the squares at the locations (every square of the Board by default) whose tag
+        (or light bulb color) changed since they were last drawn, and remember the rects to update.
+        """
+        if locations is None:
+            locations = [(row, column) for row in range(1, self.rows + 1) for column in range(1, self.columns + 1)]
+        changed = False
+        for row, column in locations:
+            square = board.get_square((row, column))
+            state = (square.get_tag(), type(square) == White and square.get_overlap())
+            if self.drawn.get((row, column)) == state:
+                continue
+            self.drawn[(row, column)] = state
+            changed = True
+
+            color = self.black
+            if square.get_tag() == 'W':
+                color = self.white
+            elif square.get_tag() == '@' or square.get_tag() == '*':
+                color = self.yellow
+
+            # draw the square, then its tag on top of its color
+            rect = pygame.Rect(self.step * column + self.divider_width,
+                               self.step * row + self.divider_width, self.width, self.height)
+            pygame.draw.rect(self.screen, color, rect)
+            self.update_square_tags(square, row, column)
+            # the rect is grown by a pixel so that the borders around the square are updated too
+            self.dirty.append(rect.inflate(2, 2))
+
+        # add borders to highlight the Board
+        if changed:
+            self.draw_borders()
+
+    def add_buttons(self):
+        """
+        Creates the text and rects for the 'Submit', 'Solution' and 'Hint' button, and their location on the display.
+        """
+        # draw a rect as background for this button
+        top = self.board_bottom + 34
+        pygame.draw.rect(self.screen, self.gray, [200, top, 100, 40])
+        # add the text to the display
+        self.screen.blit(self.glyph('button', 'Submit', self.black), (200, top))
+
+        # same procedure below for the 'Solution' button as the 'Submit' button
+        pygame.draw.rect(self.screen, self.gray, [50, top, 115, 40])
+        self.screen.blit(self.glyph('button', 'Solution', self.black), (50, top))
+
+        pygame.draw.rect(self.screen, self.gray, [315, top, 60, 40])
+        self.screen.blit(self.glyph('button', 'Hint', self.black), (315, top))
+
+    def show_hint(self, board, hint):
+        """
+        Shows a hints.Hint to the Player in the in-game messages.
+        """
+        if hint.kind == 'solved':
+            board.set_message('Every light bulb is placed, press Submit!', '', '')
+        elif hint.kind == 'bulb':
+            reasons = {'clue saturation': 'The number at {} needs all of its free neighbors.',
+                       'lone lighter': 'Square {} can only be lit from there.',
+                       'search': 'No simple rule applies; this one is from the solution.{}'}
+            board.set_message('Hint: a light bulb goes at {}'.format(hint.location),
+                              reasons[hint.reason].format(hint.cause or ''), '')
+        else:
+            reasons = {'bulb conflict': 'Light bulbs {} light each other.',
+                       'clue exceeded': 'The number at {} has too many light bulbs.',
+                       'contradiction': 'Check the light bulb(s) at {}.'}
+            cause = ', '.join(str(c) for c in hint.cause) if type(hint.cause) == list else hint.cause
+            board.set_message('These light bulbs cannot lead to a solution!',
+                              reasons[hint.reason].format(cause or ''), '')
+
+    def draw_borders(self):
+        """
+        Draw the borders that highlight the Board.
+        """
+        # draw.line(surface, color, (starting column, starting row), (ending column, ending row), thickness)
+        start, right, bottom = self.step, self.board_right, self.board_bottom
+        pygame.draw.line(self.screen, self.gray, (start, start), (right, start), 2)        # top horizontal
+        pygame.draw.line(self.screen, self.gray, (start, bottom), (right, bottom), 2)      # bottom horizontal
+        pygame.draw.line(self.screen, self.gray, (start, start), (start, bottom), 2)       # left vertical
+        pygame.draw.line(self.screen, self.gray, (right, start), (right, bottom + 1), 2)   # right vertical
+
+    def check_victory(self, victory, board):
+        """
+        Presents a countdown for the game to exit when the Player's
+        solution is verified correct by the verification algorithm.
+        """
+        if victory is True:
+            # Show the congratulatory message for 2 second
+            pygame.time.wait(1000)
+            pygame.display.flip()
+
+            pygame.time.wait(1000)
+            pygame.draw.rect(self.screen, self.black, [1, 1, 375, 35])
+
+            # Change the message that the game ends in 5 seconds for the Player
+            board.set_message('Game ends in 5 seconds...', '', '')
+            warning = self.glyph('message', board.get_message()[0], self.yellow, False)
+            self.screen.blit(warning, (5, 5))
+            pygame.display.flip()
+
+            # Initiate a countdown from 5 to 0
+            for i in range(5, -1, -1):
+                pygame.time.wait(1000)
+                board.set_message(str(i) + '...', '', '')
+
+                warning = self.glyph('message', board.get_message()[0], self.yellow, False)
+                self.screen.blit(warning, (185, 5))
+                pygame.display.flip()
+
+                # After displaying each second of the countdown, then erase it for the next number
+                pygame.draw.rect(self.screen, self.black, [170, 1, 375, 35])
+            pygame.quit()
+            exit()
+
+    def update_message(self, board):
+        """
+        Update the in-game messages that will be displayed to the Player (only when they changed).
+        """
+        if board.get_message() == self.shown_messages:
+            return
+        self.shown_messages = board.get_message()
+
+        # clear the old messages first
+        top = pygame.Rect(5, 1, 375, 35)
+        bottom = pygame.Rect(50, self.board_bottom + 9, 320, 20)
+        pygame.draw.rect(self.screen, self.black, top)
+        pygame.draw.rect(self.screen, self.black, bottom)
+        self.dirty += [top, bottom]
+
+        if board.get_message()[0] != '' or board.get_message()[1] != '' or board.get_message()[2] != '':
+            # Set the font and position of the first warning message,
+            # notifying the Player, the Black squares have wrong # of adjacent light bulbs
+            warning = self.glyph('message', board.get_message()[0], self.green, False)
+            self.screen.blit(warning, (5, 5))
+
+            # Update the second warning message, the Player has not yet illuminated all light bulbs
+            warning = self.glyph('message', board.get_message()[1], self.green, False)
+            self.screen.blit(warning, (5, 20))
+
+            warning = self.glyph('message', board.get_message()[2], self.green, False)
+            self.screen.blit(warning, (60, self.board_bottom + 9))
+
+    def update_square_tags(self, square, row, column):
+        """
+        Update the display with each square's latest tag attributes.
+        """
+        # for Black squares, draw their assigned number to the display
+        if type(square) == Black:
+            text = self.glyph('tag', square.get_tag(), (100, 255, 55))
+            rect = column * self.step + self.width * 3 // 8, row * self.step
+            self.screen.blit(text, rect)
+
+        # for White squares, draw the light bulb image (.png) to the display
+        if type(square) == White and square.get_light_bulb() is True:
+            rect = column * self.step + self.width * 3 // 10, row * self.step + self.height * 3 // 40
+
+            if square.get_overlap():
+                self.screen.blit(self.image2, rect)
+            else:
+                self.screen.blit(self.image, rect)
+
+
+def main(arguments):
+    """
+    Initiate the Pygame object and also the setup() to get the game running;
+    'arguments' may hold the number of rows and columns of the Board.
+    """
+    game = Pygame(*[int(arg) for arg in arguments])
+    game.setup()
+
+
+# e.g. 'python3 gui.py 10 12'
+if __name__ == '__main__':
+    main(sys.argv[1:3])
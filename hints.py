@@ -0,0 +1,210 @@
+import itertools
+from collections import namedtuple
+
+import sat
+from solver import Solver, SearchLimit, UNKNOWN, BULB
+
+# A hint for the player:
+#   kind     - 'bulb' (place a light bulb at 'location'), 'dead end' (the light bulbs placed
+#              so far cannot be part of a solution) or 'solved'
+#   location - the square for the light bulb, or None
+#   reason   - why: 'clue saturation' (a numbered Black square needs all of its free neighbors),
+#              'lone lighter' (an unlit square can only be lit from one square), 'search' (no
+#              single rule applies, the square is taken from a solution), 'bulb conflict',
+#              'clue exceeded' or 'contradiction' (for dead ends), or None
+#   cause    - the square(s) behind the reason: the numbered Black square, the unlit square or
+#              the light bulbs that conflict
+Hint = namedtuple('Hint', ['kind', 'location', 'reason', 'cause'])
+
+# search nodes a hint may take before the SAT backend finds the solution instead; the player's
+# light bulbs make the formula easy, so SAT answers in a few milliseconds on a 20 x 20 Board
+HINT_NODES = 200
+
+
+def layout(board):
+    """
+    Returns what a HintEngine depends on: the version of the run index (rebuilt whenever a
+    Black square is added) and the numbers of the Black squares.
+    """
+    return board.runs_version, tuple(square.get_number() for square in board.black)
+
+
+class HintEngine(Solver):
+    # Finds the next forced move for the player's light bulbs.
+    #
+    # The player's light bulbs are assumed (assigned before the clues are applied), and the
+    # solver's propagation finds everything that follows from them. Every light bulb the
+    # propagation places remembers the rule that forced it, so the first one is the hint.
+    # The engine is built once per Board and keeps its state between calls: when the player
+    # only added light bulbs since the last hint, they are propagated on top of the old state
+    # instead of starting over. The first call also checks whether the Board has a unique
+    # solution; if it does, a light bulb outside of it is a dead end right away. Otherwise the
+    # engine keeps the last solution it found and only searches for one that keeps the
+    # player's light bulbs when they are no longer all part of it. A search that takes more
+    # than HINT_NODES nodes hands the Board to the SAT backend.
+    def __init__(self, board):
+        """
+        Takes the Board to give hints for; the Board must have its edges (and run index) generated.
+        """
+        Solver.__init__(self, board)
+        self.layout = layout(board)
+        self.clue_locations = [square.get_location() for square in board.black if square.get_number() != 'B']
+        self.answers = []           # cell ids of the player's light bulbs, in the order assumed
+        self.fresh = False          # whether the state holds exactly the propagated answers
+        self.rule = None            # (reason, cause) of the rule that is running
+        self.why = {}               # cell id -> (reason, cause) for light bulbs placed by a rule
+        self.checked = False        # whether the solutions of the Board were counted
+        self.unique = None          # cell ids of the light bulbs of the only solution, if unique
+        self.known = None           # cell ids of the light bulbs of the last solution found
+
+    def assign(self, i, value, reason):
+        """Assigns like Solver.assign and remembers which rule placed a light bulb."""
+        if value == BULB and self.value[i] == UNKNOWN and self.rule is not None:
+            self.why[i] = self.rule
+        return Solver.assign(self, i, value, reason)
+
+    def check_clue(self, c):
+        """Applies clue saturation (see Solver.check_clue) as the 'clue saturation' rule."""
+        self.rule = 'clue saturation', self.clue_locations[c]
+        try:
+            return Solver.check_clue(self, c)
+        finally:
+            self.rule = None
+
+    def check_light(self, i):
+        """Forces a lone lighter (see Solver.check_light) as the 'lone lighter' rule."""
+        self.rule = 'lone lighter', self.locations[i]
+        try:
+            return Solver.check_light(self, i)
+        finally:
+            self.rule = None
+
+    def start(self):
+        """
+        Assumes the player's light bulbs, then applies the clues and forced squares
+        (see Solver.start); returns False if that leads to a contradiction.
+        """
+        for i in self.answers:
+            if self.assign(i, BULB, 0) is False:
+                return False
+        return Solver.start(self)
+
+    def dead_end(self, answers):
+        """
+        Returns the Hint for light bulbs that cannot be part of a solution, naming the
+        light bulbs in conflict or the clue with too many light bulbs if there is one.
+        """
+        for run in self.runs:
+            bulbs = [self.locations[j] for j in run if j in answers]
+            if len(bulbs) > 1:
+                return Hint('dead end', None, 'bulb conflict', bulbs)
+        for c, (number, cells) in enumerate(self.clues):
+            if sum(1 for j in cells if j in answers) > number:
+                return Hint('dead end', None, 'clue exceeded', self.clue_locations[c])
+        return Hint('dead end', None, 'contradiction', None)
+
+    def count(self):
+        """
+        Counts the solutions of the empty Board (up to 2); keeps the first one, and
+        the only one as self.unique if the Board has a unique solution.
+        """
+        self.checked = True
+        self.answers = []
+        self.fresh = False
+        self.limit = self.nodes + HINT_NODES
+        try:
+            found = list(itertools.islice(self.solutions(), 2))
+        except SearchLimit:
+            found = list(itertools.islice(sat.solutions(self.board), 2))
+        finally:
+            self.limit = None
+        if found:
+            self.known = {self.cell_id[location] for location in found[0]}
+        if len(found) == 1:
+            self.unique = self.known
+
+    def find(self, cells):
+        """
+        Returns the cell ids of a solution that keeps the light bulbs in 'cells', or None
+        (this leaves the state of the search).
+        """
+        self.answers = cells
+        self.fresh = False
+        self.limit = self.nodes + HINT_NODES
+        try:
+            solution = self.solve()
+        except SearchLimit:
+            solution = sat.solve(self.board, bulbs=[self.locations[i] for i in cells])
+        finally:
+            self.limit = None
+        if solution is None:
+            return None
+        return {self.cell_id[location] for location in solution}
+
+    def extends(self, cells):
+        """
+        Returns whether some solution keeps the light bulbs in 'cells'; the last solution
+        found is reused while it keeps them, otherwise a new one is searched for.
+        """
+        if self.unique is not None:
+            return all(i in self.unique for i in cells)
+        if self.known is not None and all(i in self.known for i in cells):
+            return True
+        solution = self.find(cells)
+        if solution is None:
+            return False
+        self.known = solution
+        return True
+
+    def hint(self, answers):
+        """
+        Returns the Hint for the player's light bulbs ('answers', a collection of locations).
+        """
+        cells = [self.cell_id[location] for location in answers if location in self.cell_id]
+        if not self.checked:
+            self.count()
+        if not self.extends(cells):
+            dead = self.dead_end(set(cells))
+            if dead.reason == 'contradiction' and self.unique is not None:
+                # name the light bulbs that are not part of the solution
+                return dead._replace(cause=[self.locations[i] for i in cells if i not in self.unique])
+            return dead
+
+        assumed = set(self.answers)
+        if self.fresh and assumed <= set(cells):
+            # only new light bulbs: propagate them on top of the current state
+            new = [i for i in cells if i not in assumed]
+            self.answers += new
+            ok = True
+            for i in new:
+                if self.assign(i, BULB, 0) is False:
+                    ok = False
+                    break
+            ok = ok and self.propagate()
+        else:
+            self.answers = cells
+            self.why = {}
+            self.undo(0)
+            ok = self.start()
+
+        self.fresh = ok
+        if not ok:
+            return self.dead_end(set(cells))
+
+        # the first light bulb that a rule placed (everything before it in the trail is
+        # either the player's or a square it depends on)
+        assumed = set(self.answers)
+        for i in self.trail:
+            if self.value[i] == BULB and i in self.why and i not in assumed:
+                reason, cause = self.why[i]
+                return Hint('bulb', self.locations[i], reason, cause)
+
+        if self.choose() is None:
+            return Hint('solved', None, None, None)
+
+        # no rule applies: take a light bulb of the solution that keeps the player's light
+        # bulbs (extends made sure there is one)
+        for location in sorted(self.locations[i] for i in self.known):
+            if self.cell_id[location] not in assumed:
+                return Hint('bulb', location, 'search', None)
+        return Hint('solved', None, None, None)
@@ -0,0 +1,100 @@
+class MoveHistory:
+    # The player's moves on a Board, with undo and redo.
+    #
+    # The light bulbs on the Board are kept as a snapshot: an int with bit i set for a light
+    # bulb on the i-th White square (in row order). Ints are immutable, so a snapshot is taken
+    # in O(1) and shared by the undo and redo stacks instead of being copied. Going from one
+    # snapshot to another only places or removes the light bulbs that differ (the bits of
+    # their XOR), which updates only the runs of those light bulbs; the Board is never reset
+    # and rebuilt. The same is used to show another set of light bulbs for a while (e.g. the
+    # solution) without recording it as a move.
+    def __init__(self, board):
+        """
+        Takes a Board with its edges (and run index) generated; the light bulbs already on it
+        are the starting snapshot.
+        """
+        self.board = board
+        self.locations = sorted(board.run_index)
+        self.bit = {location: 1 << i for i, location in enumerate(self.locations)}
+        self.bulbs = self.snapshot_of(location for location in self.locations
+                                      if board.get_square(location).get_light_bulb())
+        self.done = []          # snapshots before each move, the last move last
+        self.undone = []        # snapshots after each undone move, the last undone last
+
+    def snapshot(self):
+        """Returns the snapshot of the light bulbs on the Board."""
+        return self.bulbs
+
+    def snapshot_of(self, locations):
+        """Returns the snapshot for light bulbs on the White squares at the locations."""
+        mask = 0
+        for location in locations:
+            mask |= self.bit[location]
+        return mask
+
+    def get_answers(self, snapshot=None):
+        """
+        Returns the light bulbs of the snapshot (the current one by default) as a
+        dictionary {location: White square}.
+        """
+        snapshot = self.bulbs if snapshot is None else snapshot
+        answers = {}
+        while snapshot:
+            low = snapshot & -snapshot
+            location = self.locations[low.bit_length() - 1]
+            answers[location] = self.board.get_square(location)
+            snapshot ^= low
+        return answers
+
+    def can_undo(self):
+        """Returns whether there is a move to undo."""
+        return bool(self.done)
+
+    def can_redo(self):
+        """Returns whether there is an undone move to redo."""
+        return bool(self.undone)
+
+    def restore(self, snapshot):
+        """
+        Changes the light bulbs on the Board to the snapshot (without recording a move);
+        returns the locations whose light bulb was placed or removed.
+        """
+        changed = self.bulbs ^ snapshot
+        removed = self.get_answers(changed & self.bulbs)
+        placed = self.get_answers(changed & snapshot)
+        for square in removed.values():
+            self.board.remove_lightbulb(square)
+        for square in placed.values():
+            self.board.place_lightbulb(square)
+        self.bulbs = snapshot
+        return list(removed) + list(placed)
+
+    def move(self, snapshot):
+        """Records a move to the snapshot (clearing the redo stack) and restores it."""
+        if snapshot == self.bulbs:
+            return []
+        self.done.append(self.bulbs)
+        self.undone = []
+        return self.restore(snapshot)
+
+    def place(self, location):
+        """Places a light bulb at the location as a move; returns the locations changed."""
+        return self.move(self.bulbs | self.bit[location])
+
+    def remove(self, location):
+        """Removes the light bulb at the location as a move; returns the locations changed."""
+        return self.move(self.bulbs & ~self.bit[location])
+
+    def undo(self):
+        """Undoes the last move; returns the locations changed."""
+        if not self.done:
+            return []
+        self.undone.append(self.bulbs)
+        return self.restore(self.done.pop())
+
+    def redo(self):
+        """Redoes the last undone move; returns the locations changed."""
+        if not self.undone:
+            return []
+        self.done.append(self.bulbs)
+        return self.restore(self.undone.pop())
@@ -1,15 +1,47 @@
-import pygame
 import random
+import sys
+from array import array
+from collections import deque
+
+import profiling
+
+
+def make_rng(seed=None, rng=None):
+    """
+    Returns the random number generator for a Board: 'rng' if given, a new random.Random(seed)
+    if a seed is given, or else the global random module.
+    """
+    if rng is not None:
+        return rng
+    if seed is not None:
+        return random.Random(seed)
+    return random
+
 
 class Board:
-    def __init__(self):
+    def __init__(self, rows=7, columns=7, density=None, seed=None, rng=None):
         """
         Initializes the puzzle board.
-        """
-        self.board = [[''] * 9 for i in range(9)]
-        self.squares = {}
+
+        rows, columns - the size of the playable area (a border of '-' sentinels is added around it)
+        density - the fraction of squares that will be Black, or None for the classic 16-22% range
+        seed - if given, the Board draws from its own random.Random(seed), so the same seed
+        always generates the same puzzle
+        rng - a random.Random to draw from instead (e.g. shared by the Boards of one generator)
+        Without either, the Board uses the global random module.
+        """
+        self.rows = rows
+        self.columns = columns
+        self.density = density
+        self.seed = seed
+        self.random = make_rng(seed, rng)
+        self.board = [[''] * (columns + 2) for i in range(rows + 2)]   # the squares, with a '-' border
         self.black = []
+        self.runs = []              # runs of White squares between Black squares, in rows then columns
+        self.run_index = {}         # White square location -> (horizontal run ID, vertical run ID)
+        self.runs_version = 0       # counts the times the run index was built (see hints.layout)
         self.certificate = {}
+        self.hints = None           # hints.HintEngine, built by the first get_hint
         self.message, self.message2, self.message3 = '', '', ''
 
     def get_board(self):
@@ -19,13 +51,42 @@ class Board:
     def get_square(self, coordinates):
         """
         Returns the square at the specified location.
+        Raises KeyError if the location is outside of the Board and its border.
+        """
+        x, y = coordinates
+        if 0 <= x <= self.rows + 1 and 0 <= y <= self.columns + 1:
+            return self.board[x][y]
+        raise KeyError(coordinates)
+
+    def get_squares(self):
+        """Returns the squares of the playable area (without the border), row by row."""
+        return [square for row in self.board[1:-1] for square in row[1:-1]]
+
+    def get_size(self):
+        """Returns the size of the playable area as a tuple (rows, columns)."""
+        return self.rows, self.columns
+
+    def get_runs(self, square):
         """
-        return self.squares[coordinates]
+        Returns the horizontal and vertical run (lists of White squares) of the White square.
+        """
+        horizontal, vertical = self.run_index[square.get_location()]
+        return self.runs[horizontal], self.runs[vertical]
 
     def get_certificate(self):
         """Returns the certificate."""
         return self.certificate
 
+    def get_hint(self, answers):
+        """
+        Returns the next logical move for the player's light bulbs ('answers', a collection
+        or dictionary of locations) as a hints.Hint; the hint engine is kept between calls.
+        """
+        import hints
+        if self.hints is None or self.hints.layout != hints.layout(self):
+            self.hints = hints.HintEngine(self)
+        return self.hints.hint(answers)
+
     def get_message(self):
         """Returns all the messages (1, 2, and 3)."""
         return self.message, self.message2, self.message3
@@ -35,7 +96,6 @@ class Board:
         Places the square at the specified location on the board.
         """
         self.board[x][y] = square
-        self.squares[(x, y)] = square
 
     def set_message(self, message, message2, message3):
         """Sets warning messages for the player."""
@@ -47,55 +107,95 @@ class Board:
         """
         Generate white squares throughout the board.
         """
-        for i in range(9):
-            for j in range(9):
-                if i == 0 or i == 8 or j == 0 or j == 8:
+        for i in range(self.rows + 2):
+            for j in range(self.columns + 2):
+                if i == 0 or i == self.rows + 1 or j == 0 or j == self.columns + 1:
                     self.set_board(i, j, '-')
                 else:
                     if self.board[i][j] == '':
-                        square = White(i, j)
-                        self.board[i][j] = square
-                        self.squares[(i, j)] = square
+                        self.board[i][j] = White(i, j)
 
     def generate_black_squares(self):
         """
-        Randomly generate between 8-12 black squares throughout the board.
+        Randomly generate black squares throughout the board.
+
+        Without a density, the count is picked from the same range as the original
+        7x7 Board (8-11 out of 49 squares), scaled to the size of the Board.
         """
-        coordinates = []
+        coordinates = set()
+        area = self.rows * self.columns
+
+        if self.density is None:
+            sq_num = self.random.randint(8 * area // 49, 11 * area // 49)
+        else:
+            sq_num = min(area, round(self.density * area))
 
-        sq_num = random.randrange(8, 12)
         while len(coordinates) != sq_num:
-            x, y = random.randrange(1, 8), random.randrange(1, 8)
+            x, y = self.random.randrange(1, self.rows + 1), self.random.randrange(1, self.columns + 1)
             if (x, y) not in coordinates:
-                coordinates.append((x, y))
+                coordinates.add((x, y))
                 sq = Black(x, y)
                 self.set_board(x, y, sq)
                 self.black.append(sq)
 
     def generate_edges(self):
         """
-        Add neighbors (i.e. adjacent squares) for each square.
-        """
-
-        # traverse the Board, for each row and column,
-        for i in range(1, 8):
-            for j in range(1, 8):
-
-                # specify the adjacent directions
-                top = self.board[i - 1][j]
-                left = self.board[i][j - 1]
-                right = self.board[i][j + 1]
-                bottom = self.board[i + 1][j]
-
-                # add each neighbor found in the adjacent directions to a list
-                neighbors = [top, left, right, bottom]
+        Connect each square to its neighbors (i.e. adjacent squares).
+
+        The squares share the Board's grid as their adjacency: a square reads its neighbors
+        from the grid around its location, so no square keeps a list of its own and a square
+        that is replaced (see add_black_square) is seen by its neighbors right away.
+        """
+        for row in self.board[1:-1]:
+            for square in row[1:-1]:
+                square.set_grid(self.board)
+
+        self.generate_runs()
+
+    def add_black_square(self, location, number='B'):
+        """
+        Turns the White square at the location into a Black square with the given number,
+        and updates the run index.
+        """
+        white = self.get_square(location)
+        square = Black(location[0], location[1])
+        square.set_number(number)
+        square.set_tag(number)
+        square.set_grid(white.get_grid())
+        self.set_board(location[0], location[1], square)
+        self.black.append(square)
+        self.generate_runs()
+        return square
+
+    def generate_runs(self):
+        """
+        Build the run index: split every row and column into runs of White squares that are
+        separated by Black squares (or the edge of the Board), number the runs and map each
+        White square to its horizontal and vertical run ID. A light bulb illuminates exactly
+        the squares of its two runs.
+        """
+        rows = [[self.board[i][j] for j in range(self.columns + 2)] for i in range(1, self.rows + 1)]
+        columns = [[self.board[i][j] for i in range(self.rows + 2)] for j in range(1, self.columns + 1)]
+        self.runs = []
+        ids = {}
+
+        for line in rows + columns:
+            run = []
+            for square in line:
+                if type(square) == White:
+                    if not run:
+                        # the squares of a run share one int object for its ID
+                        run_id = len(self.runs)
+                        self.runs.append(run)
+                    run.append(square)
+                    ids.setdefault(square.get_location(), []).append(run_id)
+                else:
+                    run = []
 
-                # visit each neighbor and add edges between current square and the neighbor
-                for p in neighbors:
-                    if p != '-':
-                        curr = self.board[i][j]
-                        curr.add_neighbors(p)
+        self.run_index = {location: tuple(run_ids) for location, run_ids in ids.items()}
+        self.runs_version += 1
 
+    @profiling.timed('assign_number')
     def assign_number(self):
         """
         Assign a number between 0-4 for each black square.
@@ -128,7 +228,7 @@ class Board:
 
             # give 10% chance to assign 0
             else:
-                if random.random() >= 0.9:
+                if self.random.random() >= 0.9:
                     sq.set_number(str(0))
                     sq.set_tag(str(0))
 
@@ -141,40 +241,37 @@ class Board:
                 if j != '-':
                     if type(j) == White and j.get_illuminated() is True:
                         j.set_illuminated(False)
-                        j.set_visited(False)
+                        j.set_overlap(False)
+                        j.set_light_count(0)
 
-    def create_instance(self):
+    @profiling.timed('create_instance')
+    def create_instance(self, chance=0.40):
         """
         Traverse the board and randomly place light bulbs to squares
         that are not yet illuminated.
-        """
 
-        no_space = False
-        while no_space is False:
+        chance - passed on to generate_lightbulbs for every unlit square the traversal visits
+        """
+        if not self.rows or not self.columns:
+            return
 
-            not_lit = []
-            # for squares in each row and column,
-            for i in self.get_board():
-                for j in i:
-                    if j != '-':
-                        # set visited to false and add to not_lit list if it is a White square
-                        j.set_visited(False)
-                        if j.get_tag() == 'W':
-                            not_lit.append(j)
+        # the traversal order only depends on the Board's layout, so it is found once
+        source = self.board[1][1]
+        order = self.breadth_first(source)
 
-            # return the boolean results, whether all squares are illuminated
-            if len(not_lit) == 0:
-                no_space = True
+        # keep the White squares that are not illuminated yet (in traversal order) and drop the
+        # squares of a new light bulb's runs as it is placed, so the Board is never rescanned;
+        # the traversal does not visit its source square, which is only lit by others (or last)
+        unlit = dict.fromkeys(j for j in order + [source] if type(j) == White and j.get_tag() == 'W')
 
-            elif len(not_lit) == 1:
-                self.generate_lightbulbs(not_lit[0], 0, 'admin')
-                no_space = True
+        while len(unlit) > 1:
+            self.fill_board([j for j in unlit if j is not source], unlit, chance)
 
-            if no_space is False:
-                source = self.board[1][1]
-                self.BFS('fill_board', source)
-                not_lit = []
+        # a single square that is still not lit gets its own light bulb
+        if unlit:
+            self.generate_lightbulbs(next(iter(unlit)), 0, 'admin')
 
+    @profiling.timed('verifier')
     def verifier(self, certificate):
         """
         Verifies the player's solution - whether it meets all winning criteria.
@@ -182,20 +279,29 @@ class Board:
         """
         single_bulbs = True
 
+        # count the light bulbs in each run
+        bulbs_in_run = [0] * len(self.runs)
         for i in certificate:
             self.generate_lightbulbs(certificate[i], 0, None)
+            for run_id in self.run_index[i]:
+                bulbs_in_run[run_id] += 1
 
-            single_bulbs = self.generate_light(certificate[i], False, True)
-            # if single_bulb is False, then this light bulb is lighting another light bulb
-            # then mark this square by setting its overlap attribute as True
-            if single_bulbs is False:
+        # if a run holds more than one light bulb, then these light bulbs are lighting each other
+        # then mark them by setting their overlap attribute as True
+        for i in certificate:
+            if any(bulbs_in_run[run_id] > 1 for run_id in self.run_index[i]):
+                single_bulbs = False
                 certificate[i].set_overlap(True)
 
-        # check if all white square are illuminated
-        all_illu = self.BFS('check_lights', self.board[1][1])
+        # check if all white square are illuminated, i.e. every White square has a light bulb in one of its runs
+        all_illu = True
+        for horizontal, vertical in self.run_index.values():
+            if bulbs_in_run[horizontal] == 0 and bulbs_in_run[vertical] == 0:
+                all_illu = False
+                break
 
         # check if all Black squares have required # of adjacent light bulbs
-        black_sq_ok = self.BFS('check_numbers', self.black[0])
+        black_sq_ok = self.check_numbers()
 
         # give warning message to player if a winning condition is not met
         if all_illu is True and single_bulbs is True and black_sq_ok is True:
@@ -209,163 +315,133 @@ class Board:
                 self.message3 = 'A light bulb is illuminating another light bulb!'
             return False
 
-    def BFS(self, coordinates, source):
+    def breadth_first(self, source):
         """
-        Breadth-first search traversal to visit each square on the board.
-
+        Returns the squares in breadth-first order from the source square, following each
+        square's neighbors (the source itself is not included).
         """
-        # for each square, set visited as False to traverse properly
-        for i in self.board:
-            for j in i:
-                if type(j) == White or type(j) == Black:
-                    j.set_visited(False)
-
-        # initialize a queue with source square (i.e. vertex)
-        # 'group' is the neighboring squares of the current square
-        queue = [source]
-        group = None
-
-        # continue traversing the board while queue has squares not visited
+        order = []
+        visited = {source, '-'}     # the border is never visited
+        queue = deque([source])
+        grid = self.board
         while queue:
-            # remove first item of queue
-            s = queue.pop(0)
-
-            # decide which group of squares to traverse
-            if coordinates == 'check_lights':
-                group = s.get_neighbors()
-            elif coordinates == 'fill_board':
-                group = s.get_neighbors()
-            elif coordinates == 'check_numbers':
-                group = self.black
-
-            # for each square in the group, visit if not visited yet
-            for i in group:
-                if i.get_visited() is False:
-                    i.set_visited(True)
-
-                    # if traversing to randomly assigning light bulbs, and create a 
-                    # valid instance, then add light bulb at 40% chance
-                    if coordinates == 'fill_board':
-                        if type(i) == White and i.get_illuminated(
-                        ) is False and i.get_light_bulb() is False:
-                            chance = 0.40
-                            self.generate_lightbulbs(i, chance, 'admin')
-
-                    # if traversing to check if all (White) squares are
-                    # illuminated, return False if one is unlit
-                    elif coordinates == 'check_lights' and type(i) == White:
-                        if i.get_illuminated() is False:
-                            return False
-
-                    # if traversing to count light bulbs around the
-                    # black squares, return False if count doesn't match
-                    # the number attribute
-                    elif coordinates == 'check_numbers' and type(i) == Black:
-                        if i.get_number() != 'B':
-                            total = 0
-                            for x in i.get_neighbors():
-                                if type(x) == White and x.get_light_bulb(
-                                ) is True:
-                                    total += 1
-                            if str(total) != i.get_number():
-                                return False
+            x, y = queue.popleft().get_location()
+            # the neighbors are read straight from the grid, in the order of get_neighbors
+            for i in (grid[x - 1][y], grid[x][y - 1], grid[x][y + 1], grid[x + 1][y]):
+                if i not in visited:
+                    visited.add(i)
+                    order.append(i)
                     queue.append(i)
-
-            s.set_visited(True)
-
-        if coordinates == 'check_lights' or coordinates == 'check_numbers':
-            return True
+        if profiling.active is not None:
+            profiling.active.count('bfs_visits', len(order) + 1)
+        return order
+
+    def fill_board(self, order, unlit, chance=0.40):
+        """
+        Visit the squares in the given order and add a light bulb at 40% chance to
+        each White square that is not illuminated yet, to create a valid instance.
+        'unlit' holds the squares that are not illuminated; the squares lit by a new
+        light bulb are removed from it.
+        """
+        if profiling.active is not None:
+            profiling.active.count('fill_visits', len(order))
+        for i in order:
+            if i in unlit:
+                self.generate_lightbulbs(i, chance, 'admin')
+                if i.get_light_bulb() is True:
+                    for run in self.get_runs(i):
+                        for lit in run:
+                            unlit.pop(lit, None)
+
+    def check_numbers(self):
+        """
+        Returns whether every numbered Black square has its number of adjacent light bulbs.
+        """
+        if profiling.active is not None:
+            profiling.active.count('clue_checks', len(self.black))
+        for square in self.black:
+            if square.get_number() != 'B':
+                total = 0
+                for x in square.get_neighbors():
+                    if type(x) == White and x.get_light_bulb() is True:
+                        total += 1
+                if str(total) != square.get_number():
+                    return False
+        return True
 
     def generate_lightbulbs(self, sq, chance, user):
         """
         Generate a light bulb with a given percent chance.
         """
-        if random.random() >= chance and type(sq) == White and sq.get_light_bulb() is False:
+        if profiling.active is not None:
+            profiling.active.count('lightbulb_calls')
+        if self.random.random() >= chance and type(sq) == White and sq.get_light_bulb() is False:
 
             if user == 'admin':
                 self.certificate[sq.get_location()] = sq
-            status = sq.toggle_light_bulb()
-
-            if status is True:
-                self.generate_light(sq, True, False)
-
-    def generate_light(self, square, toggle, verification):
-        """
-        Takes two parameters,
-        curr - the square object that will be the source of the light emission
-        toggle - True/False, whether to turn on the light or turn off the light
-        """
-
-        # get the current square's location (row, column)
-        loc = square.get_location()
-        # 'counter' is used to increment each index
-        counter = 1
-
-        # point to the square's adjacent sides
-        directions = [
-            [loc[0], loc[1] + counter],  # right
-            [loc[0], loc[1] - counter],  # left
-            [loc[0] + counter, loc[1]],  # top
-            [loc[0] - counter, loc[1]]   # bottom
-        ]
-
-        # for each direction,
-        for x in range(4):
-            # nex is the following square to visit, starting from the (current) square
-            nex = self.get_square((directions[x][0], directions[x][1]))
-
-            while type(nex) == White:
-                # if traversing to illuminate or de-illuminate squares, stop when next square is a light bulb
-                if verification is False and nex.get_tag() == '@':
-                    break
-
-                # traversing to check if the current square (a light bulb) is illuminating some other light bulb(s)
-                if verification is True:
-                    if nex.get_light_bulb() is True:
-                        return False
-
-                # traversing to illuminate/de-illuminate squares, then call set_illuminate for either case
-                if verification is False:
-                    nex.set_illuminated(toggle)
-                counter += 1
-
-                if x == 0:
-                    nex = self.get_square((loc[0], loc[1] + counter))
-                elif x == 1:
-                    nex = self.get_square((loc[0], loc[1] - counter))
-                elif x == 2:
-                    nex = self.get_square((loc[0] + counter, loc[1]))
-                elif x == 3:
-                    nex = self.get_square((loc[0] - counter, loc[1]))
-
-            counter = 1
-
-        if verification:
-            return True
+            self.place_lightbulb(sq)
+
+    def place_lightbulb(self, square):
+        """
+        Put a light bulb on the White square and illuminate its two runs.
+        """
+        square.toggle_light_bulb()
+        self.update_light(square, 1)
+
+    def remove_lightbulb(self, square):
+        """
+        Remove the light bulb from the White square and de-illuminate the squares
+        of its two runs that are not lit by another light bulb.
+        """
+        square.set_illuminated(False)
+        square.set_overlap(False)
+        self.update_light(square, -1)
+
+    def update_light(self, square, change):
+        """
+        Add 'change' (1 or -1) to the light count of every square in the horizontal and
+        vertical run of the square; only those runs are visited, not the whole Board.
+        """
+        row, column = self.get_runs(square)
+        if profiling.active is not None:
+            profiling.active.count('ray_steps', len(row) + len(column) - 1)
+        for sq in row:
+            sq.add_light(change)
+        for sq in column:
+            if sq is not square:
+                sq.add_light(change)
+
 
 class Squares:
     # Represents a square that is on the puzzle Board.
+    # Squares use __slots__ (no __dict__ per square), since a Board holds one per cell and a
+    # process can keep many Boards alive.
+    __slots__ = ('grid', 'tag', 'location')
+
     def __init__(self, x, y):
         """
         Initializes the square's attributes.
         """
-        self.neighbors = []
+        self.grid = None            # the Board's grid, set by generate_edges
         self.tag = ''
-        self.visited = False
         self.location = (x, y)
 
     def get_neighbors(self):
-        """Returns the Square's list of adjacent neighbors."""
-        return self.neighbors
+        """Returns the Square's adjacent neighbors (top, left, right, bottom) from the Board's grid."""
+        if self.grid is None:
+            return []
+        x, y = self.location
+        grid = self.grid
+        return [p for p in (grid[x - 1][y], grid[x][y - 1], grid[x][y + 1], grid[x + 1][y]) if p != '-']
+
+    def get_grid(self):
+        """Returns the grid of the Board the Square is on (None before generate_edges)."""
+        return self.grid
 
     def get_tag(self):
         """Returns the Square's tag attribute ('W', 'B', or '@')."""
         return self.tag
 
-    def get_visited(self):
-        """Returns the Square's visited attribute (True or False)."""
-        return self.visited
-
     def get_location(self):
         """Returns the Square's coordinate position on the board as a tuple (row, column)."""
         return self.location
@@ -374,23 +450,20 @@ class Squares:
         """Sets the Square's tag attribute ('W', 'B', or '@')."""
         self.tag = tag
 
-    def set_visited(self, status):
-        """Sets the Square's visited attribute to the parameter (either as True or as False)."""
-        self.visited = status
-
-    def add_neighbors(self, square):
-        """Adds 'square' as the current Square's neighbor"""
-        self.neighbors.append(square)
+    def set_grid(self, grid):
+        """Sets the grid of the Board the Square is on, which its neighbors are read from."""
+        self.grid = grid
 
 
 class Black(Squares):
     # Represents a Black square on the Board.
+    __slots__ = ('number',)
+
     def __init__(self, x, y):
         """
         Initializes a black square's characteristics.
         """
         super().__init__(x, y)
-        self.edges = []
         self.number = 'B'
         self.tag = 'B'
 
@@ -408,6 +481,8 @@ class Black(Squares):
 
 class White(Squares):
     # Represents a White square on the Board.
+    __slots__ = ('illuminated', 'light_bulb', 'overlap', 'light_count')
+
     def __init__(self, x, y):
         """
         Initializes a white square's characteristics.
@@ -417,6 +492,7 @@ class White(Squares):
         self.light_bulb = False
         self.tag = 'W'
         self.overlap = False
+        self.light_count = 0        # number of light bulbs illuminating the square (including its own)
 
     def __str__(self):
         """Returns the square's tag rather than the object when it is printed."""
@@ -434,6 +510,27 @@ class White(Squares):
         """Returns a boolean, whether it illuminates another light bulb."""
         return self.overlap
 
+    def get_light_count(self):
+        """Returns the number of light bulbs illuminating the square."""
+        return self.light_count
+
+    def set_light_count(self, count):
+        """Sets the number of light bulbs illuminating the square."""
+        self.light_count = count
+
+    def add_light(self, change):
+        """
+        Adds 'change' to the light count and updates the square's state; a light bulb
+        that is lit by another light bulb is marked as overlapping.
+        """
+        self.light_count += change
+        if self.light_bulb is True:
+            self.overlap = self.light_count > 1
+        elif self.light_count > 0:
+            self.set_illuminated(True)
+        else:
+            self.set_illuminated(False)
+
     def set_illuminated(self, toggle):
         """
         Takes a boolean as a parameter, if True, then set illuminated as True
@@ -470,284 +567,387 @@ class White(Squares):
             self.light_bulb = False
         return self.light_bulb
 
-class Pygame:
-
-    def __init__(self):
-        """
-        Initiate RGB code for color referencing and constants for window settings.
-        
-        lb.png and lb2.png images are from:
-        http://clipart-library.com/clipart/pT5dGE7T9.htm
-        http://clipart-library.com/clipart/rcLgLx57i.htm
-        """
-        self.black = (0, 0, 0)
-        self.white = (255, 255, 255)
-        self.green = (0, 255, 0)
-        self.red = (255, 102, 102)
-        self.gray = (105, 105, 105)
-        self.yellow = (255, 255, 204)
-        self.width = 40                                              # the width in pixels for each square
-        self.height = 40                                             # the height in pixels for each square
-        self.divider_width = 2                                       # size for the borders dividing the Board
-        self.windows = [380, 450]                                    # default screen size (width x height)
-        self.screen = pygame.display.set_mode(self.windows)          # initiate display when object is created
-        self.image = pygame.image.load('lb.png').convert()    # normal light bulb image
-        self.image2 = pygame.image.load('lb2.png').convert()  # red light bulb image
-
-    def setup(self):
-        """
-        Take no parameters; initiate all necessary methods to create
-        a playable and solvable instance of Light Up.
-        """
-        board = Board()                     
-        board.generate_white_squares()      
-        board.generate_black_squares()      
-        board.generate_edges()             
-        board.create_instance()             
-        board.assign_number()               
-        board.remove_lightbulbs()           
-        verification = board.verifier(board.get_certificate()) 
-        board.remove_lightbulbs()           
-
-        # initiate Pygame and title
-        pygame.init()
-        pygame.display.set_caption("Light Up")
-
-        # 'save_user_answers' toggles between showing/hiding in-game solution and the player's answers
-        # 'solution_mode' indicates whether the Player is currently viewing the in-game solution
-        save_user_answers = True
-        solution_mode = False
-        victory = False
-
-        # store the Player's answers in form of a dictionary
-        user_answers = dict()
-
-        # Keep the game's loop running until the Player manually exists or if he/she submits a verified solution
-        while True:
-            for event in pygame.event.get():
-
-                # get the Player's mouse coordinates when the screen is clicked
-                coordinates = pygame.mouse.get_pos()
-
-                submit = 200 <= coordinates[0] <= 200 + 110 and 370 <= coordinates[1] <= 370 + 40
-                solution = 55 <= coordinates[0] <= 166 + 115 and 376 <= coordinates[1] <= 370 + 40
-
-                ESC = event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
-                if event.type == pygame.QUIT or ESC:
-                    pygame.quit()
-                    exit()
-
-                # listen for Player's clicks on the Board
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-
-                    column = coordinates[0] // (self.width + self.divider_width)
-                    row = coordinates[1] // (self.height + self.divider_width)
-
-                    # reset system messages after Player does an action
-                    board.set_message('', '', '')
-
-                    # listen for Player's click on the 'Submit' button for submitting his/her solution
-                    # also limit the click area for this function to take effect
-                    # 'solution_mode' prevent Player from submitting the in-game solution as their own answer
-                    if submit and solution_mode is False:
-                        results = board.verifier(user_answers)
-                        if results is True:
-                            board.set_message('Congratulations! You win!', '', '')
-                            victory = True
-
-                    # listen for Player's click on the 'Solution' button for showing the in-game solution
-                    elif solution:
-                        if save_user_answers is True:
-                            board.remove_lightbulbs()
-                            board.verifier(board.get_certificate())
-                            save_user_answers = False
-                            solution_mode = True
-
-                        # if the button is clicked a second time, remove the in-game solution on the Board
-                        # and let the Player continue to play the same instance
-                        elif save_user_answers is False:
-                            board.remove_lightbulbs()
-                            solution_mode = False
-                            for i in user_answers:
-                                square = user_answers[i]
-                                board.generate_lightbulbs(square, 0, None)
-                            save_user_answers = True
-
-                    elif 44 <= coordinates[0] <= 336 and 44 <= coordinates[1] <= 336:
-                        square = board.get_square((row, column))
-
-                        if type(square) == White and solution_mode is False:
-                            # if the White square isn't a light bulb and isn't illuminated, then add
-                            # a light bulb to this square, and add it to the Player's list of answers
-                            if (row, column) not in user_answers:
-                                square = board.get_square((row, column))
-                                board.generate_lightbulbs(square, 0, None)
-                                if square.get_light_bulb() is True:
-                                    user_answers[(row, column)] = square
-
-                            # if click is already part of the Player's answers, this indicates he/she
-                            # is asking to remove the light bulb, then proceed to remove it from the Board
-                            # and from Player's answer list
-                            elif (row, column) in user_answers:
-                                if square.get_light_bulb() is True:
-                                    board.generate_light(square, False, False)
-                                    square.set_illuminated(False)
-                                    del user_answers[(row, column)]
-
-                                    # While light bulb is removed, also de-illuminate all the squares that were lit up by this
-                                    for i in board.get_board():
-                                        for j in i:
-                                            if type(j) == White and j.get_light_bulb() is True:
-                                                board.generate_light(j, True, False)
-
-                    # set the image for light bulbs depending if the Player keeps the mistake
-                    # or if he/she has corrected the mistake, then change the image back to non-red.
-                    for i in board.get_board():
-                        for j in i:
-                            if type(j) == White and j.get_light_bulb() is True:
-                                overlap = board.generate_light(j, False, True)
-                                if overlap is False:
-                                    j.set_overlap(True)
-                                else:
-                                    j.set_overlap(False)
-
-            # Based on the Player's request to update light bulbs above, use the latest Board
-            # and update each square's color
-            for row in range(1, 8):
-                for column in range(1, 8):
-                    color = self.black
-                    square = board.get_square((row, column))
-                    if square.get_tag() == 'W':
-                        color = self.white
-                    elif square.get_tag() == '@' or square.get_tag() == '*':
-                        color = self.yellow
-
-                    # draw the board
-                    pygame.draw.rect(self.screen, color, [(self.divider_width + self.width) * column + self.divider_width,
-                                (self.divider_width + self.height) * row + self.divider_width, self.width, self.height])
-
-                    # update the square's tag in addition to the square's color that was performed already
-                    self.update_square_tags(square, row, column)
-                    # add borders to highlight the Board
-                    self.draw_borders()
-
-            # draw the 'Solution' and 'Submit' button to the display
-            self.add_buttons()
-            # draw in-game messages to the Player to the display
-            self.update_message(board)
-            # check if Player has won the game, if so, give congratulatory message and exit game
-            if victory is True:
-                self.check_victory(victory, board)
-            pygame.display.flip()
-
-    def add_buttons(self):
-        """
-        Creates the text and rects for the 'Submit' and 'Solution' button, and their location on the display.
-        """
-        # initiate the font and font size for the button
-        font = pygame.font.SysFont('Calibri', 35)
-        # draw a rect as background for this button
-        pygame.draw.rect(self.screen, self.gray, [200, 370, 100, 40])
-        # add the text to the display
-        text = font.render('Submit', True, self.black)
-        self.screen.blit(text, (200, 370))
-
-        # same procedure below for the 'Solution' button as the 'Submit' button
-        pygame.draw.rect(self.screen, self.gray, [50, 370, 115, 40])
-        text = font.render('Solution', True, self.black)
-        self.screen.blit(text, (50, 370))
-
-    def draw_borders(self):
-        """
-        Draw the borders that highlight the Board.
-        """
-        # draw.line(surface, color, (starting column, starting row), (ending column, ending row), thickness)
-        pygame.draw.line(self.screen, self.gray, (42, 42), (336, 42), 2)        # top horizontal
-        pygame.draw.line(self.screen, self.gray, (42, 336), (336, 336), 2)      # bottom horizontal
-        pygame.draw.line(self.screen, self.gray, (42, 42), (42, 336), 2)        # left vertical
-        pygame.draw.line(self.screen, self.gray, (336, 42), (336, 337), 2)      # right vertical
-
-    def check_victory(self, victory, board):
-        """
-        Presents a countdown for the game to exit when the Player's
-        solution is verified correct by the verification algorithm.
-        """
-        if victory is True:
-            # Show the congratulatory message for 2 second
-            pygame.time.wait(1000)
-            pygame.display.flip()
-
-            pygame.time.wait(1000)
-            pygame.draw.rect(self.screen, self.black, [1, 1, 375, 35])
-
-            # Change the message that the game ends in 5 seconds for the Player
-            board.set_message('Game ends in 5 seconds...', '', '')
-            warning_font = pygame.font.SysFont('Calibri', 15)
-            warning = warning_font.render(board.get_message()[0], False, self.yellow)
-            self.screen.blit(warning, (5, 5))
-            pygame.display.flip()
-
-            # Initiate a countdown from 5 to 0
-            for i in range(5, -1, -1):
-                pygame.time.wait(1000)
-                board.set_message(str(i) + '...', '', '')
-
-                warning_font = pygame.font.SysFont('Calibri', 15)
-                warning = warning_font.render(board.get_message()[0], False, self.yellow)
-                self.screen.blit(warning, (185, 5))
-                pygame.display.flip()
-
-                # After displaying each second of the countdown, then erase it for the next number
-                pygame.draw.rect(self.screen, self.black, [170, 1, 375, 35])
-            pygame.quit()
-            exit()
-
-    def update_message(self, board):
-        """
-        Update the in-game messages that will be displayed to the Player.
-        """
-        if board.get_message()[0] != '' or board.get_message()[1] != '' or board.get_message()[2] != '':
-            # Set the font and position of the first warning message,
-            # notifying the Player, the Black squares have wrong # of adjacent light bulbs
-            warning_font = pygame.font.SysFont('Calibri', 15)
-            warning = warning_font.render(board.get_message()[0], False, self.green)
-            self.screen.blit(warning, (5, 5))
-
-            # Update the second warning message, the Player has not yet illuminated all light bulbs
-            warning = warning_font.render(board.get_message()[1], False, self.green)
-            self.screen.blit(warning, (5, 20))
-
-            warning = warning_font.render(board.get_message()[2], False, self.green)
-            self.screen.blit(warning, (60, 345))
-
-
-        if board.get_message()[0] == '' and board.get_message()[1] == '' and board.get_message()[2] == '':
-            pygame.draw.rect(self.screen, self.black, [5, 1, 375, 35])
-            pygame.draw.rect(self.screen, self.black, [50, 345, 320, 20])
-
-    def update_square_tags(self, square, row, column):
-        """
-        Update the display with each square's latest tag attributes.
-        """
-        # set the font for the tag
-        font = pygame.font.SysFont('Arial', 30)
-        # for Black squares, draw their assigned number to the display
-        if type(square) == Black:
-            font = pygame.font.SysFont('Arial', 30)
-            text = font.render(square.get_tag(), 1, (100, 255, 55))
-            rect = column * (self.divider_width + self.width) + 15, row * (self.divider_width + self.height)
-            self.screen.blit(text, rect)
+# turn the '0' and '1' characters of a binary number into 0 and 1 and back (see BitBoard.flags)
+FLAG_BYTES = bytes.maketrans(b'01', b'\x00\x01')
+FLAG_CHARACTERS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+class BitBoard:
+    # A compact puzzle board that keeps the walls, clues, light bulbs and lit squares as integer bitmasks.
+    #
+    # Square (x, y) of the playable area is stored at bit (x - 1) * (columns + 1) + (y - 1); the extra
+    # bit at the end of every row is never part of the Board, so shifting a mask left or right by one
+    # cannot wrap a ray around to the next row. BitBoard has the same generation and verification
+    # methods as Board, so either one may be used to build and check a puzzle.
+    # Like Board, generate_edges indexes the runs: a run is kept as (first bit, length, step) and
+    # its mask is only built when a light bulb lights it, so one light bulb costs two masks
+    # instead of a shift of the whole Board per square of its rays. The runs and the run IDs of
+    # every bit are kept in flat arrays of 16-bit (or on very large Boards 32-bit) integers
+    # rather than in tuples and dictionaries, so they take a few bytes per square.
+    __slots__ = ('rows', 'columns', 'density', 'seed', 'random', 'stride', 'cells', 'walls', 'clues', 'bulbs', 'lit',
+                 'overlap', 'solution', 'runs', 'run_ids', 'column', 'message', 'message2', 'message3')
+
+    def __init__(self, rows=7, columns=7, density=None, seed=None, rng=None):
+        """
+        Initializes the puzzle board; takes the same parameters as Board.
+        """
+        self.rows = rows
+        self.columns = columns
+        self.density = density
+        self.seed = seed
+        self.random = make_rng(seed, rng)
+        self.stride = columns + 1
+        self.cells = 0              # every square of the playable area
+        self.walls = 0              # Black squares
+        self.clues = [0] * 5        # clues[k] holds the Black squares numbered k
+        self.bulbs = 0              # squares with a light bulb
+        self.lit = 0                # illuminated White squares (light bulbs included)
+        self.overlap = 0            # light bulbs that are illuminated by another light bulb
+        self.solution = 0           # light bulbs placed by create_instance
+        self.runs = array('H')      # first bit, length and step of every run, in rows then columns
+        self.run_ids = array('H')   # horizontal and vertical run ID of the White square at every bit index
+        self.column = 0             # the first bit of every row, the mask of a whole column
+        self.message, self.message2, self.message3 = '', '', ''
 
-        # for White squares, draw the light bulb image (.png) to the display
-        if type(square) == White and square.get_light_bulb() is True:
-            text = font.render(square.get_tag(), 1, self.red)
-            rect = column * (self.divider_width + self.width) + 12, row * (self.divider_width + self.height) + 3
+    def get_size(self):
+        """Returns the size of the playable area as a tuple (rows, columns)."""
+        return self.rows, self.columns
 
-            if square.get_overlap():
-                self.screen.blit(self.image2, rect)
-            else:
-                self.screen.blit(self.image, rect)
+    def get_certificate(self):
+        """Returns the certificate as a dictionary keyed by each light bulb's location."""
+        return {location: location for location in self.locations(self.solution)}
+
+    def get_message(self):
+        """Returns all the messages (1, 2, and 3)."""
+        return self.message, self.message2, self.message3
+
+    def set_message(self, message, message2, message3):
+        """Sets warning messages for the player."""
+        self.message = message
+        self.message2 = message2
+        self.message3 = message3
+
+    def get_tag(self, coordinates):
+        """
+        Returns the tag of the square at the specified location, using the same
+        tags as the Squares objects ('W', '*', '@', 'B' or the Black square's number).
+        """
+        bit = 1 << self.index(coordinates)
+        if self.walls & bit:
+            for k in range(5):
+                if self.clues[k] & bit:
+                    return str(k)
+            return 'B'
+        if self.bulbs & bit:
+            return '@'
+        if self.lit & bit:
+            return '*'
+        return 'W'
+
+    def lines(self):
+        """Returns the walls and clues as grid lines, one string per row (see puzzle_format.grid)."""
+        squares = self.flags(self.walls).translate(bytes.maketrans(b'\x00\x01', b'.#'))
+        for k, mask in enumerate(self.clues):
+            for location in self.locations(mask):
+                squares[self.index(location)] = ord(str(k))
+        return [squares[i * self.stride:i * self.stride + self.columns].decode() for i in range(self.rows)]
+
+    def index(self, coordinates):
+        """Returns the bit index of the square at location (row, column)."""
+        return (coordinates[0] - 1) * self.stride + coordinates[1] - 1
+
+    def flags(self, mask):
+        """Returns the mask as a bytearray with a 1 or 0 for every bit index of the Board."""
+        size = self.rows * self.stride
+        return bytearray(format(mask, '0{}b'.format(size))[::-1].encode()).translate(FLAG_BYTES)[:size]
+
+    def mask(self, flags):
+        """Returns the bitmask of a bytearray of flags (see flags)."""
+        return int(flags.translate(FLAG_CHARACTERS)[::-1].decode() or '0', 2)
+
+    def locations(self, mask):
+        """Yields the location (row, column) of every square in the mask, row by row."""
+        flags = self.flags(mask)
+        i = flags.find(1)
+        while i != -1:
+            row, column = divmod(i, self.stride)
+            yield row + 1, column + 1
+            i = flags.find(1, i + 1)
+
+    def generate_white_squares(self):
+        """
+        Mark every square of the playable area as part of the Board.
+        """
+        row = (1 << self.columns) - 1
+        for i in range(self.rows):
+            self.cells |= row << (i * self.stride)
+
+    def generate_black_squares(self):
+        """
+        Randomly generate black squares throughout the board, using the same counts as Board.
+        """
+        area = self.rows * self.columns
+
+        if self.density is None:
+            sq_num = self.random.randint(8 * area // 49, 11 * area // 49)
+        else:
+            sq_num = min(area, round(self.density * area))
+
+        walls = self.flags(self.walls)
+        count = 0
+        while count != sq_num:
+            i = self.index((self.random.randrange(1, self.rows + 1), self.random.randrange(1, self.columns + 1)))
+            if not walls[i]:
+                walls[i] = 1
+                count += 1
+        self.walls = self.mask(walls)
+
+    def generate_edges(self):
+        """
+        Neighbors are found by shifting the bitmasks, so there are no edges to add; builds the
+        run index instead (see Board.generate_runs).
+        """
+        self.column = 0
+        for i in range(self.rows):
+            self.column |= 1 << (i * self.stride)
+
+        walls = self.flags(self.walls)
+        runs = []
+        run_ids = [0] * (2 * len(walls))
+        lines = [(i * self.stride, 1, self.columns) for i in range(self.rows)]
+        lines += [(j, self.stride, self.rows) for j in range(self.columns)]
+        for first, step, length in lines:
+            vertical = step != 1
+            run = None
+            for k in range(length):
+                i = first + k * step
+                if walls[i]:
+                    run = None
+                    continue
+                if run is None:
+                    run = len(runs) // 3
+                    runs += [i, 0, step]
+                runs[3 * run + 1] += 1
+                run_ids[2 * i + vertical] = run
+
+        typecode = 'H' if max(len(walls), len(runs) // 3) < 1 << 16 else 'I'
+        self.runs = array(typecode, runs)
+        self.run_ids = array(typecode, run_ids)
+
+    def get_runs(self, i):
+        """Returns the (horizontal, vertical) run IDs of the White square at bit index i."""
+        return self.run_ids[2 * i], self.run_ids[2 * i + 1]
+
+    def run_mask(self, run):
+        """Returns the bitmask of the squares of a run."""
+        first, length, step = self.runs[3 * run:3 * run + 3]
+        if step == 1:
+            return ((1 << length) - 1) << first
+        return (self.column & ((1 << ((length - 1) * self.stride + 1)) - 1)) << first
+
+    def run_squares(self, run):
+        """Returns the bit indices of the squares of a run."""
+        first, length, step = self.runs[3 * run:3 * run + 3]
+        return range(first, first + length * step, step)
+
+    def shift(self, mask, step):
+        """Moves every bit of the mask by 'step' squares and drops the ones that leave the Board."""
+        if step > 0:
+            return (mask << step) & self.cells
+        return (mask >> -step) & self.cells
+
+    def adjacent_counts(self, mask):
+        """
+        Returns three bitmasks (ones, twos, fours) that hold, for each square, the binary
+        number of squares from 'mask' that are adjacent to it.
+        """
+        a, b = self.shift(mask, 1), self.shift(mask, -1)
+        c, d = self.shift(mask, self.stride), self.shift(mask, -self.stride)
+        ab0, ab1 = a ^ b, a & b
+        cd0, cd1 = c ^ d, c & d
+        carry = ab0 & cd0
+        return ab0 ^ cd0, ab1 ^ cd1 ^ carry, (ab1 & cd1) | ((ab1 ^ cd1) & carry)
+
+    def light(self, bulbs):
+        """
+        Returns two bitmasks: the squares illuminated by the light bulbs in 'bulbs'
+        (the light bulbs included) and the light bulbs that illuminate another light bulb.
+        """
+        open_squares = self.cells & ~self.walls
+        lit, seen = bulbs, 0
+        for step in (1, -1, self.stride, -self.stride):
+            ray = self.shift(bulbs, step) & open_squares
+            while ray:
+                lit |= ray
+                seen |= ray & bulbs
+                ray = self.shift(ray & ~bulbs, step) & open_squares
+        return lit, seen
+
+    def assign_number(self):
+        """
+        Assign a number between 0-4 for each black square.
+        """
+        ones, twos, fours = (self.flags(mask) for mask in self.adjacent_counts(self.bulbs))
+        clues = [self.flags(mask) for mask in self.clues]
+
+        for location in self.locations(self.walls):
+            i = self.index(location)
+            needed_bulbs = ones[i] + 2 * twos[i] + 4 * fours[i]
+
+            if needed_bulbs > 0:
+                clues[needed_bulbs][i] = 1
+
+            # give 10% chance to assign 0
+            elif self.random.random() >= 0.9:
+                clues[0][i] = 1
+        self.clues = [self.mask(flags) for flags in clues]
+
+    def remove_lightbulbs(self):
+        """
+        Remove all light bulbs on the board.
+        """
+        self.bulbs = self.lit = self.overlap = 0
 
-# initiate the Pygame object and also the setup() to get the game running.
-game = Pygame()
-game.setup()
+    def create_instance(self):
+        """
+        Randomly place light bulbs on squares that are not yet illuminated until the board is
+        lit; the squares are visited row by row with the same 60% chance as Board.
+        The unlit squares and the new light bulbs are kept as one flag per bit index, and a new
+        light bulb clears the flags of its two runs, so the masks are only built at the end.
+        """
+        unlit = self.flags(self.cells & ~self.walls & ~self.lit)
+        placed = bytearray(len(unlit))
+
+        while unlit.count(1) > 1:
+            for i in range(len(unlit)):
+                if unlit[i] and self.random.random() >= 0.40:
+                    placed[i] = 1
+                    for run in self.get_runs(i):
+                        for j in self.run_squares(run):
+                            unlit[j] = 0
+
+        # a single square that is still not lit gets its own light bulb
+        if unlit.count(1) == 1:
+            placed[unlit.index(1)] = 1
+
+        bulbs = self.mask(placed)
+        self.solution |= bulbs
+        self.bulbs |= bulbs
+        self.lit |= self.light(bulbs)[0]
+
+    def generate_lightbulbs(self, bit, chance, user):
+        """
+        Generate a light bulb on the square 'bit' (a single-bit mask) with a given percent chance;
+        returns whether a light bulb was placed. The light bulb lights its two runs.
+        """
+        if self.random.random() >= chance and bit & self.walls == 0 and bit & self.bulbs == 0:
+            if user == 'admin':
+                self.solution |= bit
+            self.bulbs |= bit
+            for run in self.get_runs(bit.bit_length() - 1):
+                self.lit |= self.run_mask(run)
+            return True
+        return False
+
+    def verifier(self, certificate):
+        """
+        Verifies the player's solution - whether it meets all winning criteria.
+
+        'certificate' may be any iterable (or dictionary) of light bulb locations.
+        """
+        bulbs = self.flags(self.bulbs)
+        for location in certificate:
+            if 1 <= location[0] <= self.rows and 1 <= location[1] <= self.columns:
+                bulbs[self.index(location)] = 1
+        self.bulbs = self.mask(bulbs) & self.cells & ~self.walls
+
+        self.lit, self.overlap = self.light(self.bulbs)
+        open_squares = self.cells & ~self.walls
+
+        all_illu = self.lit & open_squares == open_squares
+        single_bulbs = self.overlap == 0
+
+        # each numbered Black square must have exactly its number of adjacent light bulbs
+        ones, twos, fours = self.adjacent_counts(self.bulbs)
+        black_sq_ok = True
+        for k in range(5):
+            exact = (ones if k & 1 else ~ones) & (twos if k & 2 else ~twos) & (fours if k & 4 else ~fours)
+            if self.clues[k] & ~exact:
+                black_sq_ok = False
+
+        # give warning message to player if a winning condition is not met
+        if all_illu and single_bulbs and black_sq_ok:
+            return True
+        if not all_illu:
+            self.message = 'Not all squares are illuminated!'
+        if not black_sq_ok:
+            self.message2 = 'Some Black square(s) have wrong # of surrounding light bulbs!'
+        if not single_bulbs:
+            self.message3 = 'A light bulb is illuminating another light bulb!'
+        return False
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Returns a BitBoard with the same walls, clues, light bulbs and certificate as the Board.
+        """
+        rows, columns = board.get_size()
+        compact = cls(rows, columns, board.density, board.seed, board.random)
+        compact.generate_white_squares()
+
+        for square in board.get_squares():
+            if square == '':
+                continue
+            bit = 1 << compact.index(square.get_location())
+            if type(square) == Black:
+                compact.walls |= bit
+                if square.get_number() != 'B':
+                    compact.clues[int(square.get_number())] |= bit
+            elif square.get_light_bulb() is True:
+                compact.bulbs |= bit
+        for location in board.get_certificate():
+            compact.solution |= 1 << compact.index(location)
+
+        compact.generate_edges()
+        compact.lit, compact.overlap = compact.light(compact.bulbs)
+        return compact
+
+    def to_board(self, rng=None):
+        """
+        Returns a Board (with Squares objects) holding the same walls, clues and certificate.
+        rng - the random.Random for the Board (by default the BitBoard's)
+        """
+        board = Board(self.rows, self.columns, self.density, self.seed, rng or self.random)
+        board.generate_white_squares()
+
+        for location in self.locations(self.walls):
+            square = Black(*location)
+            tag = self.get_tag(location)
+            if tag != 'B':
+                square.set_number(tag)
+                square.set_tag(tag)
+            board.set_board(location[0], location[1], square)
+            board.black.append(square)
+
+        board.generate_edges()
+        for location in self.locations(self.solution):
+            board.certificate[location] = board.get_square(location)
+        return board
+
+
+def __getattr__(name):
+    """
+    Loads the game window (gui.Pygame) only when it is asked for, so that importing the
+    Board engine does not import pygame.
+    """
+    if name == 'Pygame':
+        from gui import Pygame
+        return Pygame
+    raise AttributeError("module 'lightup' has no attribute '{}'".format(name))
+
+
+# start the game window, see gui.py.
+# the Board size may be given on the command line, e.g. 'python3 lightup.py 10 12'
+if __name__ == '__main__':
+    import gui
+    gui.main(sys.argv[1:3])
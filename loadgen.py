@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+
+from benchmark import percentile
+from server import TEXT, CLOSE, PING, PONG, accept_key, frame, read_headers, read_message
+
+KINDS = ['new', 'place', 'remove', 'hint', 'submit']
+
+
+class Client:
+    # One WebSocket connection to the server, playing one game at a time.
+    def __init__(self, reader, writer):
+        """
+        Takes the streams of a connection that finished its handshake (see connect).
+        """
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, message):
+        """Sends a JSON message and returns the server's reply."""
+        self.writer.write(frame(TEXT, json.dumps(message).encode(), masked=True))
+        await self.writer.drain()
+        while True:
+            opcode, payload = await read_message(self.reader)
+            if opcode == TEXT:
+                return json.loads(payload)
+            if opcode == PING:
+                self.writer.write(frame(PONG, payload, masked=True))
+            elif opcode == CLOSE:
+                raise ConnectionError('the server closed the connection')
+
+    async def close(self):
+        """Closes the connection."""
+        self.writer.write(frame(CLOSE, b'\x03\xe8', masked=True))
+        self.writer.close()
+
+
+async def connect(host, port):
+    """Opens a WebSocket connection to the server and returns a Client."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write('GET / HTTP/1.1\r\nHost: {}:{}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                 'Sec-WebSocket-Key: {}\r\nSec-WebSocket-Version: 13\r\n\r\n'.format(host, port, key).encode())
+    status, headers = await read_headers(reader)
+    if ' 101 ' not in status or headers.get('sec-websocket-accept') != accept_key(key):
+        writer.close()
+        raise ConnectionError('WebSocket handshake failed: {}'.format(status))
+    return Client(reader, writer)
+
+
+async def play(client, rng, rows, columns, games, moves, think, latencies):
+    """
+    Plays 'games' games on the connection: each starts a new puzzle, makes 'moves' random
+    moves (placing or removing light bulbs, asking for a hint now and then) and submits.
+    Between two requests the player thinks for a random time of 'think' seconds on average.
+    The latency of every request is added to latencies[kind].
+    """
+    async def timed(kind, message):
+        start = time.perf_counter()
+        reply = await client.request(message)
+        latencies[kind].append(time.perf_counter() - start)
+        if reply['type'] == 'error':
+            raise RuntimeError(reply['message'])
+        return reply
+
+    for game in range(games):
+        puzzle = await timed('new', {'type': 'new', 'rows': rows, 'columns': columns})
+        white = [(i, j) for i, line in enumerate(puzzle['grid'], 1)
+                 for j, character in enumerate(line, 1) if character == '.']
+        bulbs = set()
+        for move in range(moves):
+            if think:
+                await asyncio.sleep(rng.expovariate(1 / think))
+            if rng.random() < 0.1:
+                await timed('hint', {'type': 'hint'})
+            elif bulbs and rng.random() < 0.3:
+                location = rng.choice(sorted(bulbs))
+                bulbs.discard(location)
+                await timed('remove', {'type': 'remove', 'location': location})
+            else:
+                location = rng.choice(white)
+                bulbs.add(location)
+                await timed('place', {'type': 'place', 'location': location})
+        await timed('submit', {'type': 'submit'})
+
+
+async def run(host='127.0.0.1', port=8765, sessions=1000, rows=7, columns=7, games=1, moves=50,
+              think=0.5, connect_limit=200, seed=0):
+    """
+    Opens 'sessions' concurrent sessions (at most 'connect_limit' handshakes at a time),
+    plays them all at once and returns the report as a dictionary (see main).
+    """
+    latencies = {kind: [] for kind in KINDS}
+    errors = []
+    limit = asyncio.Semaphore(connect_limit)
+
+    async def session(n):
+        async with limit:
+            client = await connect(host, port)
+        try:
+            await play(client, random.Random('{}-{}'.format(seed, n)), rows, columns, games, moves, think,
+                       latencies)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    for result in await asyncio.gather(*[session(n) for n in range(sessions)], return_exceptions=True):
+        if isinstance(result, BaseException):
+            errors.append(repr(result))
+    seconds = time.perf_counter() - start
+
+    report = {'sessions': sessions, 'errors': len(errors), 'first_errors': errors[:5],
+              'seconds': seconds, 'results': []}
+    kinds = KINDS + ['move']
+    latencies['move'] = latencies['place'] + latencies['remove']
+    for kind in kinds:
+        values = sorted(latencies[kind])
+        if values:
+            report['results'].append({
+                'kind': kind, 'count': len(values), 'per_sec': len(values) / seconds,
+                'p50_ms': percentile(values, 50) * 1000, 'p90_ms': percentile(values, 90) * 1000,
+                'p99_ms': percentile(values, 99) * 1000, 'max_ms': values[-1] * 1000})
+    return report
+
+
+def main():
+    """
+    Runs the load generator from the command line and prints the latency of every kind of
+    request ('move' is place and remove together). The report can be saved as JSON:
+    {'sessions', 'errors', 'first_errors', 'seconds', 'results': [{'kind', 'count', 'per_sec',
+    'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}]}.
+    """
+    parser = argparse.ArgumentParser(description='Load test a Light Up server (see server.py).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sessions', type=int, default=1000, help='concurrent sessions')
+    parser.add_argument('--size', type=int, nargs=2, default=[7, 7], metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--games', type=int, default=1, help='games per session')
+    parser.add_argument('--moves', type=int, default=50, help='moves per game')
+    parser.add_argument('--think', type=float, default=0.5,
+                        help='mean seconds between two moves of a player (0 for none)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file for the report')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.host, args.port, args.sessions, args.size[0], args.size[1],
+                             args.games, args.moves, args.think, seed=args.seed))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1)
+
+    print('{} sessions in {:.2f} s, {} errors'.format(report['sessions'], report['seconds'], report['errors']))
+    for error in report['first_errors']:
+        print('  ' + error)
+    print('{:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'request', 'count', 'per sec', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'max (ms)'))
+    for result in report['results']:
+        print('{kind:>8} {count:>8} {per_sec:>10.1f} {p50_ms:>10.3f} {p90_ms:>10.3f} '
+              '{p99_ms:>10.3f} {max_ms:>10.3f}'.format(**result))
+
+
+# e.g. 'python3 loadgen.py --sessions 2000 --moves 50' (with 'python3 server.py' running)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+# The Stats object that the engine reports to, or None when profiling is off. The hot paths
+# only check this before counting, so profiling costs almost nothing while it is off.
+active = None
+
+
+class Stats:
+    # Counters and timers for the engine's hot paths, broken down by stage.
+    #
+    # A stage is a named part of the work (timed with the stage context manager); stages can
+    # be nested, and the nested names are joined with '/'. Counters are added to the stage
+    # that is running when they are counted ('total' outside of any stage). The engine counts:
+    #   ray_steps        - squares visited by update_light while placing or removing a light bulb
+    #   lightbulb_calls  - calls to generate_lightbulbs
+    #   bfs_visits       - squares visited by the breadth-first traversal
+    #   fill_visits      - unlit squares visited by create_instance's fill_board passes
+    #   clue_checks      - numbered Black squares checked by the verifier
+    #   solver_nodes, solver_propagations, solver_backtracks, solver_backjumps - see Solver
+    # and times the stages create_instance, assign_number, verifier and solve.
+    def __init__(self):
+        """
+        Starts with no stages and no counters.
+        """
+        self.stages = {}        # name -> {'calls', 'seconds', 'counters'}
+        self.path = []          # names of the running stages, outermost first
+
+    def current(self):
+        """Returns the record of the running stage (creating it if needed)."""
+        name = '/'.join(self.path) or 'total'
+        if name not in self.stages:
+            self.stages[name] = {'calls': 0, 'seconds': 0.0, 'counters': {}}
+        return self.stages[name]
+
+    def count(self, name, n=1):
+        """Adds n to the counter in the running stage."""
+        counters = self.current()['counters']
+        counters[name] = counters.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name):
+        """Times the code in the with block as the stage 'name' (inside the running stage)."""
+        self.path.append(name)
+        record = self.current()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['calls'] += 1
+            record['seconds'] += time.perf_counter() - start
+            self.path.pop()
+
+    def get_counters(self):
+        """Returns every counter summed over all stages."""
+        totals = {}
+        for record in self.stages.values():
+            for name, n in record['counters'].items():
+                totals[name] = totals.get(name, 0) + n
+        return totals
+
+    def get_stats(self):
+        """Returns the stages and the summed counters as a dictionary (ready for JSON)."""
+        return {'stages': self.stages, 'counters': self.get_counters()}
+
+    def export(self, path):
+        """Saves get_stats() as JSON to the file at 'path'."""
+        with open(path, 'w') as file:
+            json.dump(self.get_stats(), file, indent=1, sort_keys=True)
+
+    def report(self):
+        """Returns a table of the stages with their calls, times and counters."""
+        lines = ['{:<32} {:>8} {:>12}  {}'.format('stage', 'calls', 'seconds', 'counters')]
+        for name in sorted(self.stages):
+            record = self.stages[name]
+            counters = ', '.join('{}={}'.format(k, v) for k, v in sorted(record['counters'].items()))
+            lines.append('{:<32} {:>8} {:>12.6f}  {}'.format(name, record['calls'], record['seconds'], counters))
+        return '\n'.join(lines)
+
+
+@contextmanager
+def profile(stats=None):
+    """
+    Turns profiling on for the with block and yields the Stats object that collects it
+    (a new one unless 'stats' is given); the previous setting is restored afterwards.
+    """
+    global active
+    previous = active
+    active = Stats() if stats is None else stats
+    try:
+        yield active
+    finally:
+        active = previous
+
+
+def timed(name):
+    """
+    Decorator that times every call of the function as the stage 'name' while profiling is on.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if active is None:
+                return function(*args, **kwargs)
+            with active.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
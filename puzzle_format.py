@@ -0,0 +1,269 @@
+import mmap
+import struct
+
+from lightup import Board, BitBoard, Black
+
+# Binary puzzle files start with an 8 byte header: MAGIC, the format version, a flags byte
+# and two reserved bytes. Every record then holds:
+#   - rows and columns as two big-endian unsigned 16-bit integers
+#   - the grid, 3 bits per square in row order (see CODES), packed from the high bit down
+#   - if FLAG_SOLUTION is set, 1 bit per square for the light bulbs of the certificate
+#   - if FLAG_ANSWER is set, 1 bit per square for the light bulbs of a player's answer
+# so every record of a given size has the same width.
+MAGIC = b'LTUP'
+VERSION = 1
+FLAG_SOLUTION = 1
+FLAG_ANSWER = 2
+HEADER = struct.Struct('>4sBBH')
+SIZE = struct.Struct('>HH')
+
+# grid characters: '.' White square, '#' Black square without a number, '0'-'4' numbered Black square
+CODES = {'.': 0, '#': 1, '0': 2, '1': 3, '2': 4, '3': 5, '4': 6}
+CHARACTERS = {code: character for character, code in CODES.items()}
+
+
+def grid(board):
+    """
+    Returns the Board's (or BitBoard's) walls and clues as a list of strings, one per row (see CODES).
+    """
+    if isinstance(board, BitBoard):
+        return board.lines()
+    rows, columns = board.get_size()
+    lines = []
+    for i in range(1, rows + 1):
+        line = ''
+        for j in range(1, columns + 1):
+            square = board.get_square((i, j))
+            if type(square) == Black:
+                line += '#' if square.get_number() == 'B' else square.get_number()
+            else:
+                line += '.'
+        lines.append(line)
+    return lines
+
+
+def board_from_grid(lines, solution=()):
+    """
+    Builds a Board (with its edges and run index) from grid lines, and fills its
+    certificate with the light bulb locations in 'solution'.
+    """
+    board = Board(len(lines), len(lines[0]) if lines else 0)
+    board.generate_white_squares()
+    for i, line in enumerate(lines, 1):
+        for j, character in enumerate(line, 1):
+            if character != '.':
+                square = Black(i, j)
+                if character != '#':
+                    square.set_number(character)
+                    square.set_tag(character)
+                board.set_board(i, j, square)
+                board.black.append(square)
+    board.generate_edges()
+    for location in solution:
+        board.certificate[tuple(location)] = board.get_square(tuple(location))
+    return board
+
+
+def to_tatham(board):
+    """
+    Returns the puzzle in the game ID notation of Simon Tatham's Light Up ('<width>x<height>:'
+    followed by the squares in row order: 'a'-'z' for 1-26 White squares in a row, 'B' for a
+    Black square without a number and '0'-'4' for a numbered Black square).
+    """
+    rows, columns = board.get_size()
+    description = ''
+    blanks = 0
+    for character in ''.join(grid(board)):
+        if character == '.':
+            blanks += 1
+            if blanks == 26:
+                description += 'z'
+                blanks = 0
+            continue
+        if blanks:
+            description += chr(ord('a') + blanks - 1)
+            blanks = 0
+        description += 'B' if character == '#' else character
+    if blanks:
+        description += chr(ord('a') + blanks - 1)
+    return '{}x{}:{}'.format(columns, rows, description)
+
+
+def tatham_grid(game_id):
+    """
+    Returns (rows, columns, grid lines) for a game ID in Simon Tatham's Light Up notation
+    (see to_tatham) without building a Board.
+    """
+    size, description = game_id.strip().split(':')
+    columns, rows = (int(n) for n in size.split('x'))
+    squares = ''
+    for character in description:
+        if 'a' <= character <= 'z':
+            squares += '.' * (ord(character) - ord('a') + 1)
+        else:
+            squares += '#' if character == 'B' else character
+    if len(squares) != rows * columns:
+        raise ValueError('game ID does not describe a {}x{} grid'.format(columns, rows))
+    return rows, columns, [squares[i * columns:(i + 1) * columns] for i in range(rows)]
+
+
+def from_tatham(game_id):
+    """
+    Returns the Board for a game ID in Simon Tatham's Light Up notation (see to_tatham).
+    """
+    return board_from_grid(tatham_grid(game_id)[2])
+
+
+def pack(values, bits):
+    """
+    Packs the small integers into bytes, 'bits' bits each, from the high bit down.
+    Eight values always fill 'bits' whole bytes, so the values are packed eight at a time
+    and the work grows linearly with their number.
+    """
+    data = bytearray()
+    for start in range(0, len(values), 8):
+        group = values[start:start + 8]
+        number = 0
+        for value in group:
+            number = number << bits | value
+        data += (number << (bits * (8 - len(group)))).to_bytes(bits, 'big')
+    return bytes(data[:-(-len(values) * bits // 8)])
+
+
+def unpack(data, count, bits):
+    """Returns the 'count' integers of 'bits' bits each that pack stored in data (eight at a time)."""
+    mask = (1 << bits) - 1
+    shifts = range(bits * 7, -1, -bits)
+    values = []
+    for start in range(0, -(-count // 8) * bits, bits):
+        number = int.from_bytes(bytes(data[start:start + bits]).ljust(bits, b'\0'), 'big')
+        values += [number >> shift & mask for shift in shifts]
+    return values[:count]
+
+
+def record_size(rows, columns, flags):
+    """Returns the width in bytes of a record for a Board of the given size."""
+    area = rows * columns
+    size = SIZE.size + -(-area * 3 // 8)
+    if flags & FLAG_SOLUTION:
+        size += -(-area // 8)
+    if flags & FLAG_ANSWER:
+        size += -(-area // 8)
+    return size
+
+
+def encode(board, flags=FLAG_SOLUTION, answer=()):
+    """
+    Returns the binary record for the Board (with its certificate and/or the player's
+    answer, a collection of light bulb locations, depending on the flags).
+    """
+    rows, columns = board.get_size()
+    lines = grid(board)
+    data = SIZE.pack(rows, columns) + pack([CODES[c] for line in lines for c in line], 3)
+    locations = [(i, j) for i in range(1, rows + 1) for j in range(1, columns + 1)]
+    if flags & FLAG_SOLUTION:
+        certificate = board.get_certificate()
+        data += pack([location in certificate for location in locations], 1)
+    if flags & FLAG_ANSWER:
+        answer = set(answer)
+        data += pack([location in answer for location in locations], 1)
+    return data
+
+
+def decode(data, offset=0, flags=FLAG_SOLUTION):
+    """
+    Reads the record that starts at 'offset'. Returns (rows, columns, grid lines, solution
+    locations, answer locations, offset of the next record); the solution and answer are
+    None when the flags say they are not stored.
+    """
+    rows, columns = SIZE.unpack_from(data, offset)
+    area = rows * columns
+    start = offset + SIZE.size
+    end = start + -(-area * 3 // 8)
+    squares = ''.join(CHARACTERS[code] for code in unpack(data[start:end], area, 3))
+    lines = [squares[i * columns:(i + 1) * columns] for i in range(rows)]
+
+    stored = []
+    for flag in (FLAG_SOLUTION, FLAG_ANSWER):
+        if flags & flag:
+            start, end = end, end + -(-area // 8)
+            bits = unpack(data[start:end], area, 1)
+            stored.append([divmod(n, columns) for n in range(area) if bits[n]])
+            stored[-1] = [(i + 1, j + 1) for i, j in stored[-1]]
+        else:
+            stored.append(None)
+    return rows, columns, lines, stored[0], stored[1], end
+
+
+class PuzzleWriter:
+    # Streams puzzles to a file, either as binary records or as text (one game ID per line,
+    # see to_tatham; the text form does not store solutions or answers).
+    def __init__(self, path, binary=True, flags=FLAG_SOLUTION):
+        """
+        Opens the file at 'path' for writing and writes the header of a binary file.
+        """
+        self.binary = binary
+        self.flags = flags
+        self.file = open(path, 'wb' if binary else 'w')
+        if binary:
+            self.file.write(HEADER.pack(MAGIC, VERSION, flags, 0))
+
+    def write(self, board, answer=()):
+        """Appends the Board (and the player's answer, if the file stores answers)."""
+        if self.binary:
+            self.file.write(encode(board, self.flags, answer))
+        else:
+            self.file.write(to_tatham(board) + '\n')
+
+    def close(self):
+        """Closes the file."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(path):
+    """
+    Yields every record of a puzzle file as (rows, columns, grid lines, solution, answer)
+    without building Boards. Binary files are memory-mapped and text files are read line
+    by line, so only one puzzle is held in memory at a time.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            file.seek(0)
+            for line in file:
+                if line.strip():
+                    rows, columns, lines = tatham_grid(line.decode())
+                    yield rows, columns, lines, None, None
+            return
+
+        file.seek(0)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, flags, reserved = HEADER.unpack_from(data, 0)
+            if version != VERSION:
+                raise ValueError('unsupported puzzle file version {}'.format(version))
+            offset = HEADER.size
+            while offset < len(data):
+                rows, columns, lines, solution, answer, offset = decode(data, offset, flags)
+                yield rows, columns, lines, solution, answer
+
+
+def read_puzzles(path):
+    """
+    Yields a Board (with its certificate, when the file stores it) for every puzzle in the file.
+    """
+    for rows, columns, lines, solution, answer in iter_records(path):
+        yield board_from_grid(lines, solution or ())
+
+
+def read_answers(path):
+    """
+    Yields (Board, answer) for every puzzle in a file that stores player answers,
+    where the answer is a list of light bulb locations.
+    """
+    for rows, columns, lines, solution, answer in iter_records(path):
+        yield board_from_grid(lines, solution or ()), answer
@@ -0,0 +1,802 @@
+import argparse
+import concurrent.futures
+import os
+import random
+import resource
+import time
+from array import array
+from collections import namedtuple
+
+from solver import Solver, SearchLimit, UNKNOWN, BULB, EMPTY
+
+# Solving and verifying Boards far larger than Board and Solver can hold (1000 x 1000 and up).
+#
+# A puzzle is kept as flat arrays of a few bytes per square instead of Square objects: square
+# (x, y) is cell (x - 1) * columns + (y - 1), and every run is a start cell, a step (1 along a
+# row, columns along a column) and a length. Solving first applies the solver's rules (see
+# Solver) to the whole Board. The squares that are still open then only interact through runs
+# without a light bulb and clues that still need light bulbs, so they split into independent
+# regions. On a large random Board most open squares form one region, so large regions are
+# cut into parts first by committing a solution on strips across them (see Propagator.cuts).
+# The regions are solved by worker processes and their light bulbs are streamed back as each
+# one finishes. Generation and verification go row by row and only keep a few rows and one
+# record per column.
+
+# The result of verifying a solution: 'solved' and the number of light bulbs that are not on a
+# White square, White squares that are not lit, runs with more than one light bulb and
+# numbered Black squares with another number of light bulbs.
+Check = namedtuple('Check', ['solved', 'invalid', 'unlit', 'conflicts', 'wrong_clues'])
+
+
+class Grid:
+    # The walls, clues and runs of a puzzle as flat arrays.
+    __slots__ = ('rows', 'columns', 'walls', 'clues', 'horizontal', 'vertical', 'run_start', 'run_step',
+                 'run_length')
+
+    def __init__(self, lines):
+        """
+        Reads the puzzle from grid lines (see puzzle_format.grid), which may be any iterable
+        of strings, e.g. an open file with one row per line.
+        """
+        self.rows = 0
+        self.columns = None
+        self.walls = bytearray()            # 1 for a Black square
+        self.clues = bytearray()            # the number of a numbered Black square, 255 otherwise
+        self.horizontal = array('i')        # cell -> its horizontal run, -1 for Black squares
+        self.vertical = array('i')          # cell -> its vertical run, -1 for Black squares
+        self.run_start = array('i')
+        self.run_step = array('i')
+        self.run_length = array('i')
+
+        open_runs = None                    # column -> its open vertical run, or -1
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if self.columns is None:
+                self.columns = len(line)
+                open_runs = array('i', [-1]) * self.columns
+            if len(line) != self.columns:
+                raise ValueError('row {} has {} squares instead of {}'.format(self.rows + 1, len(line), self.columns))
+
+            base = self.rows * self.columns
+            run = -1
+            for y, character in enumerate(line):
+                i = base + y
+                if character == '.':
+                    self.walls.append(0)
+                    self.clues.append(255)
+                    if run == -1:
+                        run = self.add_run(i, 1)
+                    self.run_length[run] += 1
+                    if open_runs[y] == -1:
+                        open_runs[y] = self.add_run(i, self.columns)
+                    self.run_length[open_runs[y]] += 1
+                    self.horizontal.append(run)
+                    self.vertical.append(open_runs[y])
+                else:
+                    self.walls.append(1)
+                    self.clues.append(255 if character == '#' else int(character))
+                    self.horizontal.append(-1)
+                    self.vertical.append(-1)
+                    run = -1
+                    open_runs[y] = -1
+            self.rows += 1
+        self.columns = self.columns or 0
+
+    def add_run(self, start, step):
+        """Adds an empty run starting at cell 'start'; returns its ID."""
+        self.run_start.append(start)
+        self.run_step.append(step)
+        self.run_length.append(0)
+        return len(self.run_start) - 1
+
+    def run_cells(self, run):
+        """Returns the cells of a run."""
+        start, step = self.run_start[run], self.run_step[run]
+        return range(start, start + self.run_length[run] * step, step)
+
+    def location(self, i):
+        """Returns the location (row, column) of cell i."""
+        x, y = divmod(i, self.columns)
+        return x + 1, y + 1
+
+    def neighbors(self, i):
+        """Returns the cells next to cell i (north, west, east, south)."""
+        x, y = divmod(i, self.columns)
+        found = []
+        if x > 0:
+            found.append(i - self.columns)
+        if y > 0:
+            found.append(i - 1)
+        if y < self.columns - 1:
+            found.append(i + 1)
+        if x < self.rows - 1:
+            found.append(i + self.columns)
+        return found
+
+
+class Propagator:
+    # Applies the solver's rules to a whole Grid without branching: one light bulb per run,
+    # clue saturation and lone lighters (see Solver). Nothing is undone, so only the current
+    # value of every cell and the state of every run are kept.
+    def __init__(self, grid):
+        """
+        Starts with every White square UNKNOWN.
+        """
+        self.grid = grid
+        self.value = bytearray(len(grid.walls))
+        self.unknown_in_run = array('i', grid.run_length)
+        self.bulb_in_run = array('i', [-1]) * len(grid.run_length)
+        self.queue = []
+
+    def lit(self, i):
+        """Returns whether cell i has a light bulb in one of its runs."""
+        return self.bulb_in_run[self.grid.horizontal[i]] != -1 or self.bulb_in_run[self.grid.vertical[i]] != -1
+
+    def lighters(self, i):
+        """Returns how many UNKNOWN cells could still light cell i (itself included)."""
+        grid = self.grid
+        return (self.unknown_in_run[grid.horizontal[i]] + self.unknown_in_run[grid.vertical[i]] -
+                (self.value[i] == UNKNOWN))
+
+    def assign(self, i, value):
+        """Sets cell i to BULB or EMPTY; returns False if this contradicts its current value."""
+        if self.value[i] != UNKNOWN:
+            return self.value[i] == value
+        self.value[i] = value
+        self.queue.append(i)
+        for run in (self.grid.horizontal[i], self.grid.vertical[i]):
+            self.unknown_in_run[run] -= 1
+            if value == BULB:
+                self.bulb_in_run[run] = i
+        return True
+
+    def check_clue(self, c):
+        """Applies clue saturation to the numbered Black square at cell c; returns False on a contradiction."""
+        bulbs, unknown = 0, []
+        for i in self.grid.neighbors(c):
+            if self.value[i] == BULB:
+                bulbs += 1
+            elif self.value[i] == UNKNOWN and not self.grid.walls[i]:
+                unknown.append(i)
+        number = self.grid.clues[c]
+        if bulbs > number or bulbs + len(unknown) < number:
+            return False
+        if unknown and bulbs == number:
+            for i in unknown:
+                self.assign(i, EMPTY)
+        elif unknown and bulbs + len(unknown) == number:
+            for i in unknown:
+                if self.assign(i, BULB) is False:
+                    return False
+        return True
+
+    def check_light(self, i):
+        """Forces a light bulb if only one cell can light cell i; returns False if none can."""
+        if self.lit(i) or self.lighters(i) > 1:
+            return True
+        for run in (self.grid.horizontal[i], self.grid.vertical[i]):
+            for j in self.grid.run_cells(run):
+                if self.value[j] == UNKNOWN:
+                    return self.assign(j, BULB)
+        return False
+
+    def propagate(self):
+        """Deduces everything that follows from the queued assignments; returns False on a contradiction."""
+        grid = self.grid
+        while self.queue:
+            i = self.queue.pop()
+            for c in grid.neighbors(i):
+                if grid.clues[c] != 255 and self.check_clue(c) is False:
+                    return False
+
+            for run in (grid.horizontal[i], grid.vertical[i]):
+                if self.value[i] == BULB:
+                    for j in grid.run_cells(run):
+                        if j != i and self.assign(j, EMPTY) is False:
+                            return False
+                elif self.bulb_in_run[run] == -1:
+                    for j in grid.run_cells(run):
+                        if self.lighters(j) <= 1 and self.check_light(j) is False:
+                            return False
+        return True
+
+    def start(self):
+        """Applies the clues and forced squares of the empty Board; returns False if it has no solution."""
+        grid = self.grid
+        for c in range(len(grid.clues)):
+            if grid.clues[c] != 255 and self.check_clue(c) is False:
+                return False
+            if not self.propagate():
+                return False
+        for i in range(len(grid.walls)):
+            if not grid.walls[i] and self.check_light(i) is False:
+                return False
+            if not self.propagate():
+                return False
+        return True
+
+    def open_cells(self, i):
+        """Returns whether cell i is still open: UNKNOWN, or EMPTY and not lit."""
+        return not self.grid.walls[i] and (self.value[i] == UNKNOWN or
+                                           (self.value[i] == EMPTY and not self.lit(i)))
+
+    def snapshot(self):
+        """Returns a copy of the state of every cell and run (see restore)."""
+        return bytes(self.value), array('i', self.unknown_in_run), array('i', self.bulb_in_run)
+
+    def restore(self, snapshot):
+        """Returns every cell and run to a snapshot."""
+        self.value[:] = snapshot[0]
+        self.unknown_in_run = array('i', snapshot[1])
+        self.bulb_in_run = array('i', snapshot[2])
+        self.queue = []
+
+    def components(self):
+        """
+        Returns the independent regions of the open cells, each a list of cells in row order:
+        open cells share a region with the open cells of their runs without a light bulb and
+        with the other open neighbors of a clue.
+        """
+        grid = self.grid
+        parent = array('i', range(len(grid.walls)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(cells):
+            root = None
+            for i in cells:
+                if root is None:
+                    root = find(i)
+                else:
+                    other = find(i)
+                    if other != root:
+                        parent[other] = root
+
+        for run in range(len(grid.run_length)):
+            if self.bulb_in_run[run] == -1:
+                union(i for i in grid.run_cells(run) if self.open_cells(i))
+        for c in range(len(grid.clues)):
+            if grid.clues[c] != 255:
+                union(i for i in grid.neighbors(c) if self.value[i] == UNKNOWN and not grid.walls[i])
+
+        members = {}
+        for i in range(len(grid.walls)):
+            if self.open_cells(i):
+                members.setdefault(find(i), []).append(i)
+        return list(members.values())
+
+    def task(self, cells, limit=None):
+        """
+        Returns the task for solve_region over some open cells: (locations, cell runs, runs,
+        clues, empty, limit) in cell indices local to the task, where 'empty' lists the cells
+        that are EMPTY already and 'limit' is the number of nodes after which to give up. A
+        run that goes on to open cells outside of 'cells' gets a virtual cell (with location
+        None) that can light it but needs nothing itself, and a clue with open neighbors
+        outside is left out, so the task for part of a region is a relaxation of it.
+        """
+        grid = self.grid
+        local = {i: k for k, i in enumerate(cells)}
+        locations = [grid.location(i) for i in cells]
+        runs, run_id, cell_runs, outside = [], {}, [], []
+        for i in cells:
+            ids = []
+            for run in (grid.horizontal[i], grid.vertical[i]):
+                if run not in run_id:
+                    run_id[run] = len(runs)
+                    members = [j for j in grid.run_cells(run) if self.open_cells(j)]
+                    runs.append([local[j] for j in members if j in local])
+                    if len(runs[-1]) < len(members):
+                        outside.append(run_id[run])
+                ids.append(run_id[run])
+            cell_runs.append(tuple(ids))
+        for run in outside:
+            locations.append(None)
+            runs[run].append(len(cell_runs))
+            cell_runs.append((run, len(runs)))
+            runs.append([len(cell_runs) - 1])
+
+        clues, seen = [], set()
+        for i in cells:
+            for c in grid.neighbors(i):
+                if grid.clues[c] != 255 and c not in seen and self.value[i] == UNKNOWN:
+                    seen.add(c)
+                    adjacent = grid.neighbors(c)
+                    unknown = [j for j in adjacent if self.value[j] == UNKNOWN and not grid.walls[j]]
+                    if all(j in local for j in unknown):
+                        bulbs = sum(1 for j in adjacent if self.value[j] == BULB)
+                        clues.append((grid.clues[c] - bulbs, [local[j] for j in unknown]))
+        empty = [k for k, i in enumerate(cells) if self.value[i] == EMPTY]
+        return locations, cell_runs, runs, clues, empty, limit
+
+    def position(self, i, axis):
+        """Returns the row (axis 0) or column (axis 1) of cell i, counted from 0."""
+        return i // self.grid.columns if axis == 0 else i % self.grid.columns
+
+    def across(self, i, axis):
+        """Returns the run of cell i across the lines of an axis, and its first and last line."""
+        grid = self.grid
+        run = grid.vertical[i] if axis == 0 else grid.horizontal[i]
+        start = grid.run_start[run]
+        end = start + (grid.run_length[run] - 1) * grid.run_step[run]
+        return run, self.position(start, axis), self.position(end, axis)
+
+    def cuts(self, cells, size, margin):
+        """
+        Returns (axis, line, first, last) for the strips that cut a region of more than 'size'
+        cells into parts of about 'size' cells. A strip is two lines across the longer side of
+        the region (rows 'line' and 'line' + 1 for axis 0, columns for axis 1), picked where
+        the region has the fewest cells, and its window holds the lines from 'first' to 'last':
+        'margin' lines before and after the strip and the runs across it.
+        """
+        columns = self.grid.columns
+        spans = ((cells[0] // columns, cells[-1] // columns),
+                 (min(i % columns for i in cells), max(i % columns for i in cells)))
+        axis = 0 if spans[0][1] - spans[0][0] >= spans[1][1] - spans[1][0] else 1
+        low, high = spans[axis]
+        step = max(4 * margin + 4, size * (high - low + 1) // len(cells))
+
+        counts = {}
+        for i in cells:
+            p = self.position(i, axis)
+            counts[p] = counts.get(p, 0) + 1
+        strips = {}
+        for target in range(low + step, high + 1 - step // 2, step):
+            line = min(range(target - step // 4, target + step // 4 + 1),
+                       key=lambda line: counts.get(line, 0) + counts.get(line + 1, 0))
+            strips[line] = [line - margin, line + 1 + margin]
+
+        for i in cells:
+            p = self.position(i, axis)
+            window = strips.get(p, strips.get(p - 1))
+            if window is not None:
+                run, first, last = self.across(i, axis)
+                window[0] = min(window[0], first - margin)
+                window[1] = max(window[1], last + margin)
+        return [(axis, line, first, last) for line, (first, last) in strips.items()]
+
+    def window(self, cells, axis, first, last):
+        """Returns the cells of a region that are still open, from line 'first' to line 'last' of an axis."""
+        return [i for i in cells if first <= self.position(i, axis) <= last and self.open_cells(i)]
+
+    def commit(self, axis, line, cells, bulbs):
+        """
+        Commits the part of a window's solution (see cuts) that separates its region at the
+        strip: the light bulbs in the runs across the strip, and EMPTY for the rest of the
+        strip. Returns False, leaving everything as it was, if this contradicts what is
+        committed already.
+        """
+        snapshot = self.snapshot()
+        ok = True
+        for x, y in bulbs:
+            i = (x - 1) * self.grid.columns + y - 1
+            run, first, last = self.across(i, axis)
+            if first <= line + 1 and last >= line:
+                ok = ok and self.assign(i, BULB)
+        for i in cells:
+            if line <= self.position(i, axis) <= line + 1 and self.value[i] == UNKNOWN:
+                self.assign(i, EMPTY)
+        if ok and self.propagate():
+            return True
+        self.restore(snapshot)
+        return False
+
+    def bulbs(self):
+        """Yields the location of every light bulb placed so far."""
+        for i, value in enumerate(self.value):
+            if value == BULB:
+                yield self.grid.location(i)
+
+
+class RegionSolver(Solver):
+    # Solves one region (see Propagator.task) with the Solver's search; the cells that
+    # are EMPTY already are assumed before the clues are applied.
+    def __init__(self, task):
+        """
+        Takes a region task: (locations, cell runs, runs, clues, empty, limit).
+        """
+        locations, cell_runs, runs, clues, self.empty, self.limit = task
+        self.board = None
+        self.setup(locations, cell_runs, runs, clues)
+
+    def start(self):
+        """Assumes the EMPTY cells, then applies the clues and forced squares (see Solver.start)."""
+        for i in self.empty:
+            self.assign(i, EMPTY, 0)
+        return Solver.start(self)
+
+    def solution(self):
+        """Returns the locations of the current light bulbs (without the virtual cells, see Propagator.task)."""
+        return [self.locations[i] for i in range(len(self.locations))
+                if self.value[i] == BULB and self.locations[i] is not None]
+
+
+def solve_region(task):
+    """
+    Worker: returns the light bulb locations of one region, None if it has no solution or
+    False if the search gave up at the task's node limit.
+    """
+    try:
+        return RegionSolver(task).solve()
+    except SearchLimit:
+        return False
+
+
+def solve_regions(tasks):
+    """
+    Worker: solves a chunk of regions; returns their light bulbs, or None or False as soon as
+    one region has no solution or gives up (see solve_region).
+    """
+    bulbs = []
+    for task in tasks:
+        found = solve_region(task)
+        if found is None or found is False:
+            return found
+        bulbs += found
+    return bulbs
+
+
+def chunks(tasks, size):
+    """
+    Groups (key, region task) pairs into (key, list of region tasks) of about 'size' cells,
+    the tasks of a list all with the same key.
+    """
+    chunk, cells, last = [], 0, None
+    for key, task in tasks:
+        if chunk and (key != last or cells >= size):
+            yield last, chunk
+            chunk, cells = [], 0
+        chunk.append(task)
+        cells += len(task[0])
+        last = key
+    if chunk:
+        yield last, chunk
+
+
+def completed(executor, function, tasks, window):
+    """
+    Runs function(task) for every (key, task) and yields (key, result) as the results come
+    in, with at most 'window' tasks in flight; without an executor, the tasks run here in order.
+    """
+    if executor is None:
+        for key, task in tasks:
+            yield key, function(task)
+        return
+
+    pending = {}
+    for key, task in tasks:
+        pending[executor.submit(function, task)] = key
+        while len(pending) >= window:
+            done, waiting = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    for future in concurrent.futures.as_completed(list(pending)):
+        yield pending.pop(future), future.result()
+
+
+def solve(lines, workers=None, chunk_size=5000, max_region=20000, margin=8, stats=None):
+    """
+    Solves a puzzle given as grid lines and yields lists of light bulb locations as they are
+    found. Raises ValueError if the puzzle has no solution.
+
+    The rules place the first light bulbs (see Propagator), and the open cells left split into
+    independent regions, which are solved by 'workers' processes (all cores by default, 0 to
+    solve them in this process) in chunks of about 'chunk_size' cells, with at most two chunks
+    per worker in flight. Regions of more than 'max_region' cells (unless it is None) are cut
+    into parts first (see Propagator.cuts), with 'margin' lines around each strip. The light bulbs of the parts
+    are held back until every part is solved: if a commit left a part without a solution, the
+    cuts are taken back and the large regions are solved whole.
+    If a dictionary is given as 'stats', the time of each step and the sizes of the regions
+    are added to it.
+    """
+    stats = {} if stats is None else stats
+    start = time.perf_counter()
+    grid = Grid(lines)
+    stats['read_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    propagator = Propagator(grid)
+    if not propagator.start():
+        raise ValueError('the puzzle has no solution')
+    stats['propagate_seconds'] = time.perf_counter() - start
+    yield list(propagator.bulbs())
+
+    workers = workers if workers == 0 else workers or os.cpu_count() or 1
+    window = 2 * max(workers, 1)
+    executor = concurrent.futures.ProcessPoolExecutor(workers) if workers else None
+    try:
+        start = time.perf_counter()
+        regions = propagator.components()
+        large = bytearray(len(grid.walls))      # 1 for the cells of the regions that are cut
+        pending = []
+        for cells in regions:
+            if max_region is not None and len(cells) > max_region:
+                for i in cells:
+                    large[i] = 1
+                pending += [(cells, cut) for cut in propagator.cuts(cells, max_region, margin)]
+        base = propagator.snapshot()
+
+        # windows are solved in rounds of windows that do not overlap, all of a round from the
+        # same state, and committed after the round, so a window never misses a commit in its
+        # own lines
+        stats['cuts'] = 0
+        while pending:
+            batch, taken, later = [], [], []
+            for cells, (axis, line, first, last) in pending:
+                if any(axis == other and first <= end and last >= begin for other, begin, end in taken):
+                    later.append((cells, (axis, line, first, last)))
+                else:
+                    taken.append((axis, first, last))
+                    batch.append((cells, (axis, line, first, last)))
+            pending = later
+            windows = (((axis, line, part), propagator.task(part, 2 * len(part) + 1000))
+                       for cells, (axis, line, first, last) in batch
+                       for part in [propagator.window(cells, axis, first, last)])
+            solved = []
+            for cut, bulbs in completed(executor, solve_region, windows, window):
+                if bulbs is None and not stats['cuts']:
+                    # before any commit, a window is a relaxation of the puzzle
+                    raise ValueError('the puzzle has no solution')
+                if bulbs:
+                    solved.append((cut, bulbs))
+            for cut, bulbs in solved:
+                stats['cuts'] += propagator.commit(*cut, bulbs)
+        regions = propagator.components()
+        stats['cut_seconds'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats['regions'] = len(regions)
+        stats['open_cells'] = sum(len(cells) for cells in regions)
+        stats['largest_region'] = max([len(cells) for cells in regions] + [0])
+        stats['fallback'] = False
+        held = []
+
+        def tasks():
+            for cells in regions:
+                if not large[cells[0]]:
+                    yield False, propagator.task(cells)
+            for cells in regions:
+                # the search of a part gives up instead of proving that it has no solution
+                if large[cells[0]] and not stats['fallback']:
+                    yield True, propagator.task(cells, 10 * len(cells) + 10000)
+
+        for cut, bulbs in completed(executor, solve_regions, chunks(tasks(), chunk_size), window):
+            if cut and (bulbs is None or bulbs is False):
+                stats['fallback'] = True
+            elif bulbs is None:
+                raise ValueError('the puzzle has no solution')
+            elif cut:
+                held.append(bulbs)
+            else:
+                yield bulbs
+
+        if not stats['fallback']:
+            for bulbs in held:
+                yield bulbs
+            yield [grid.location(i) for i, value in enumerate(propagator.value) if value == BULB and base[0][i] != BULB]
+        else:
+            del held
+            propagator.restore(base)
+            whole = ((True, propagator.task(cells)) for cells in propagator.components() if large[cells[0]])
+            for cut, bulbs in completed(executor, solve_regions, chunks(whole, chunk_size), window):
+                if bulbs is None:
+                    raise ValueError('the puzzle has no solution')
+                yield bulbs
+        stats['regions_seconds'] = time.perf_counter() - start
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def place_bulbs(walls, lit, rng):
+    """
+    Returns the light bulbs of one generated row (see generate_rows) and updates 'lit', whether
+    the open vertical run of each column has a light bulb.
+    """
+    columns = len(walls)
+    bulbs = [False] * columns
+    y = 0
+    while y < columns:
+        if walls[y]:
+            lit[y] = False
+            y += 1
+            continue
+        end = y
+        while end < columns and not walls[end]:
+            end += 1
+        candidates = [k for k in range(y, end) if not lit[k]]
+        if candidates:
+            k = rng.choice(candidates)
+            bulbs[k] = True
+            lit[k] = True
+        y = end
+    return bulbs
+
+
+def number_row(above, row, below, rng):
+    """
+    Returns the grid line of a generated row from the (walls, light bulbs) of the row and of
+    the rows above and below it (None at the edges), numbering the Black squares like
+    Board.assign_number does.
+    """
+    walls, bulbs = row
+    line = []
+    for y, wall in enumerate(walls):
+        if not wall:
+            line.append('.')
+            continue
+        count = ((above is not None and above[1][y]) + (below is not None and below[1][y]) +
+                 (y > 0 and bulbs[y - 1]) + (y < len(walls) - 1 and bulbs[y + 1]))
+        if count > 0:
+            line.append(str(count))
+        else:
+            # give 10% chance to assign 0
+            line.append('0' if rng.random() >= 0.9 else '#')
+    return ''.join(line)
+
+
+def generate_rows(rows, columns, density=None, seed=None):
+    """
+    Generates a puzzle of any size row by row and yields (grid line, light bulb columns) for
+    every row. Only three rows and one flag per column are kept: each horizontal run that is
+    not lit from above gets one light bulb, on a square whose column is not lit yet, so the
+    light bulbs are always a solution. Without a density, it is picked from the same range as
+    Board.generate_black_squares.
+    """
+    rng = random.Random(seed)
+    if density is None:
+        density = rng.uniform(8 / 49, 11 / 49)
+    lit = [False] * columns
+
+    # a row can only be numbered once the light bulbs of the row below it are placed
+    above = current = None
+    for x in range(rows):
+        walls = [rng.random() < density for y in range(columns)]
+        row = walls, place_bulbs(walls, lit, rng)
+        if current is not None:
+            yield number_row(above, current, row, rng), [y + 1 for y in range(columns) if current[1][y]]
+        above, current = current, row
+    if current is not None:
+        yield number_row(above, current, None, rng), [y + 1 for y in range(columns) if current[1][y]]
+
+
+def verify(rows):
+    """
+    Checks an answer row by row and returns a Check of counts (see grading.Puzzle.grade for
+    what is checked). 'rows' yields (grid line, light bulb columns) for every row, e.g. from
+    generate_rows or zip(lines, answer rows). Only three rows and the open vertical run of
+    each column are kept, so the Board can be any size.
+    """
+    invalid = unlit = conflicts = wrong_clues = 0
+    columns = None
+    column_bulbs = None     # column -> [row, counted as a conflict] for the light bulbs of its open vertical run
+    column_unlit = None     # column -> squares of its open vertical run that are not lit horizontally
+
+    def close(y):
+        nonlocal unlit, conflicts
+        if not column_bulbs[y]:
+            unlit += column_unlit[y]
+        elif len(column_bulbs[y]) > 1:
+            conflicts += sum(1 for bulb in column_bulbs[y] if not bulb[1])
+        column_bulbs[y] = []
+        column_unlit[y] = 0
+
+    def check_clues(above, row, below):
+        nonlocal wrong_clues
+        line, bulbs = row
+        for y, character in enumerate(line):
+            if character not in '.#':
+                count = ((above is not None and y in above[1]) + (below is not None and y in below[1]) +
+                         (y - 1 in bulbs) + (y + 1 in bulbs))
+                wrong_clues += count != int(character)
+
+    above = current = None
+    x = 0
+    for line, answer in rows:
+        line = line.rstrip('\r\n')
+        x += 1
+        if columns is None:
+            columns = len(line)
+            column_bulbs = [[] for y in range(columns)]
+            column_unlit = [0] * columns
+        if len(line) != columns:
+            raise ValueError('row {} has {} squares instead of {}'.format(x, len(line), columns))
+
+        bulbs = set()
+        for y in answer:
+            if 1 <= y <= columns and line[y - 1] == '.':
+                bulbs.add(y - 1)
+            else:
+                invalid += 1
+
+        y = 0
+        while y < columns:
+            if line[y] != '.':
+                close(y)
+                y += 1
+                continue
+            end = y
+            while end < columns and line[end] == '.':
+                end += 1
+            run = [k for k in range(y, end) if k in bulbs]
+            for k in range(y, end):
+                if not run:
+                    column_unlit[k] += 1
+                if k in bulbs:
+                    column_bulbs[k].append([x, len(run) > 1])
+            if len(run) > 1:
+                conflicts += len(run)
+            y = end
+
+        row = line, bulbs
+        if current is not None:
+            check_clues(above, current, row)
+        above, current = current, row
+    if current is not None:
+        check_clues(above, current, None)
+    for y in range(columns or 0):
+        close(y)
+
+    return Check(invalid == unlit == conflicts == wrong_clues == 0, invalid, unlit, conflicts, wrong_clues)
+
+
+def main():
+    """
+    Generates a large puzzle to a file, solves it from the file and verifies both the
+    generator's light bulbs and the solver's, printing the time and memory of every step.
+    """
+    parser = argparse.ArgumentParser(description='Generate, solve and verify a very large Light Up puzzle.')
+    parser.add_argument('rows', type=int)
+    parser.add_argument('columns', type=int)
+    parser.add_argument('--density', type=float, default=None, help='fraction of Black squares')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: all cores, 0 for none)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='open squares per worker task')
+    parser.add_argument('--max-region', type=int, default=20000,
+                        help='open squares above which a region is cut (0: never cut)')
+    parser.add_argument('--path', default='large_puzzle.txt', help='file for the grid lines')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.path, 'w') as file:
+        def written():
+            for line, bulbs in generate_rows(args.rows, args.columns, args.density, args.seed):
+                file.write(line + '\n')
+                yield line, bulbs
+        check = verify(written())
+    print('generated {}x{} in {:.2f}s, certificate solved: {}'.format(
+        args.rows, args.columns, time.perf_counter() - start, check.solved))
+
+    # the answer is kept as one bit per square, so it can be verified row by row
+    start = time.perf_counter()
+    stats = {}
+    answer = bytearray(-(-args.rows * args.columns // 8))
+    with open(args.path) as file:
+        for bulbs in solve(file, args.workers, args.chunk_size, args.max_region or None, stats=stats):
+            for x, y in bulbs:
+                i = (x - 1) * args.columns + y - 1
+                answer[i >> 3] |= 1 << (i & 7)
+    print('solved in {:.2f}s (read {read_seconds:.2f}s, propagate {propagate_seconds:.2f}s, {cuts} cuts '
+          '{cut_seconds:.2f}s, regions {regions_seconds:.2f}s); {regions} regions, {open_cells} open squares, '
+          'largest {largest_region}'.format(
+              time.perf_counter() - start, **stats))
+
+    def answer_rows():
+        for x in range(args.rows):
+            base = x * args.columns
+            yield [y + 1 for y in range(args.columns) if answer[(base + y) >> 3] >> ((base + y) & 7) & 1]
+
+    start = time.perf_counter()
+    with open(args.path) as file:
+        check = verify(zip(file, answer_rows()))
+    print('verified in {:.2f}s: {}'.format(time.perf_counter() - start, check))
+    print('peak memory: {:.1f} MB (workers {:.1f} MB)'.format(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+import heapq
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from lightup import White
+
+
+class CNF:
+    # A Light Up Board written as a formula in conjunctive normal form.
+    #
+    # Variable v (1 <= v <= len(locations)) is True when the White square locations[v - 1]
+    # has a light bulb; larger variables are helpers for the at-most-one constraints.
+    # Clauses are lists of non-zero integers, -v meaning 'not v' (as in the DIMACS format):
+    #   - at most one light bulb in every run (pairwise for short runs, and a sequential
+    #     counter for long ones so that the formula stays linear in the size of the Board)
+    #   - at least one light bulb in the two runs of every White square
+    #   - exactly 'number' light bulbs next to every numbered Black square
+    def __init__(self, board):
+        """
+        Encodes the walls and clues of the Board (the certificate is not used).
+        """
+        self.board = board
+        self.locations = list(board.run_index)
+        self.variable = {location: v + 1 for v, location in enumerate(self.locations)}
+        self.num_vars = len(self.locations)
+        self.clauses = []
+
+        for run in board.runs:
+            self.at_most_one([self.variable[square.get_location()] for square in run])
+
+        for location, (horizontal, vertical) in board.run_index.items():
+            lighters = {self.variable[square.get_location()] for square in board.runs[horizontal]}
+            lighters.update(self.variable[square.get_location()] for square in board.runs[vertical])
+            self.clauses.append(sorted(lighters))
+
+        for square in board.black:
+            if square.get_number() != 'B':
+                cells = [self.variable[p.get_location()] for p in square.get_neighbors() if type(p) == White]
+                self.exactly(int(square.get_number()), cells)
+
+    def new_variable(self):
+        """Returns a new helper variable."""
+        self.num_vars += 1
+        return self.num_vars
+
+    def at_most_one(self, variables):
+        """Adds the clauses that allow at most one of the variables to be True."""
+        if len(variables) <= 5:
+            for a, b in itertools.combinations(variables, 2):
+                self.clauses.append([-a, -b])
+            return
+
+        # sequential counter: s[i] is True if one of variables[0..i] is True
+        s = [self.new_variable() for i in range(len(variables) - 1)]
+        self.clauses.append([-variables[0], s[0]])
+        for i in range(1, len(variables) - 1):
+            self.clauses.append([-variables[i], s[i]])
+            self.clauses.append([-s[i - 1], s[i]])
+            self.clauses.append([-variables[i], -s[i - 1]])
+        self.clauses.append([-variables[-1], -s[-1]])
+
+    def exactly(self, number, variables):
+        """Adds the clauses that make exactly 'number' of the (at most 4) variables True."""
+        if number > len(variables):
+            self.clauses.append([])
+            return
+        # no number + 1 of them may be True, and no len - number + 1 of them may be False
+        for group in itertools.combinations(variables, number + 1):
+            self.clauses.append([-v for v in group])
+        for group in itertools.combinations(variables, len(variables) - number + 1):
+            self.clauses.append(list(group))
+
+    def to_dimacs(self):
+        """Returns the formula in the DIMACS text format."""
+        lines = ['p cnf {} {}'.format(self.num_vars, len(self.clauses))]
+        lines.extend(' '.join(map(str, clause)) + ' 0' for clause in self.clauses)
+        return '\n'.join(lines) + '\n'
+
+    def certificate(self, true_variables):
+        """Returns the certificate {location: White square} for a set of True variables."""
+        return {location: self.board.get_square(location)
+                for location in self.locations if self.variable[location] in true_variables}
+
+
+class SATSolver:
+    # A small CDCL SAT solver in pure Python: two watched literals per clause, first-UIP
+    # clause learning, variable activities (VSIDS) with phase saving, and geometric restarts.
+    def __init__(self, num_vars, clauses=()):
+        """
+        Takes the number of variables and, optionally, the clauses to start with.
+        """
+        self.num_vars = num_vars
+        self.watches = [[] for i in range(2 * num_vars + 2)]
+        self.values = [0] * (num_vars + 1)          # 1 True, -1 False, 0 unassigned
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)
+        self.activity = [0.0] * (num_vars + 1)
+        self.phase = [-1] * (num_vars + 1)          # start by trying False (no light bulb)
+        self.var_inc = 1.0
+        self.heap = [(0.0, v) for v in range(1, num_vars + 1)]
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.unsatisfiable = False
+        self.decisions = 0
+        self.conflicts = 0
+        self.propagations = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def get_stats(self):
+        """Returns the search statistics as a dictionary."""
+        return {'decisions': self.decisions, 'conflicts': self.conflicts, 'propagations': self.propagations}
+
+    def watch(self, literal):
+        """Returns the index of the literal's watch list."""
+        return 2 * literal if literal > 0 else -2 * literal + 1
+
+    def value(self, literal):
+        """Returns 1 if the literal is True, -1 if it is False and 0 if it is unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        """
+        Adds a clause (only allowed at decision level 0, i.e. before or between solves).
+        """
+        self.backtrack(0)
+        literals = []
+        for literal in clause:
+            if self.value(literal) == 1 or -literal in literals:
+                return
+            if self.value(literal) == 0 and literal not in literals:
+                literals.append(literal)
+
+        if not literals:
+            self.unsatisfiable = True
+        elif len(literals) == 1:
+            self.enqueue(literals[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watches[self.watch(literals[0])].append(literals)
+            self.watches[self.watch(literals[1])].append(literals)
+
+    def enqueue(self, literal, reason):
+        """Makes the literal True because of the reason clause (None for decisions)."""
+        v = abs(literal)
+        self.values[v] = 1 if literal > 0 else -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Unit propagation over the watched literals; returns a conflicting clause or None.
+        """
+        while self.qhead < len(self.trail):
+            false_literal = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = self.watches[self.watch(false_literal)]
+            kept = []
+
+            for n, clause in enumerate(watchers):
+                # keep the false literal in position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) == 1:
+                    kept.append(clause)
+                    continue
+
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[self.watch(clause[1])].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(clause[0]) == -1:
+                        kept.extend(watchers[n + 1:])
+                        self.watches[self.watch(false_literal)] = kept
+                        return clause
+                    self.propagations += 1
+                    self.enqueue(clause[0], clause)
+
+            self.watches[self.watch(false_literal)] = kept
+        return None
+
+    def bump(self, v):
+        """Raises the activity of variable v."""
+        self.activity[v] += self.var_inc
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[u], u) for u in range(1, self.num_vars + 1) if self.values[u] == 0]
+            heapq.heapify(self.heap)
+        elif self.values[v] == 0:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP learnt clause (asserting literal first) and the level to backtrack to.
+        """
+        seen = set()
+        learnt = [None]
+        current = len(self.trail_lim)
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+
+        while True:
+            for q in (conflict if literal is None else conflict[1:]):
+                v = abs(q)
+                if v not in seen and self.level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if self.level[v] == current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            conflict = self.reason[abs(literal)]
+            seen.discard(abs(literal))
+            pending -= 1
+            if pending == 0:
+                break
+
+        learnt[0] = -literal
+        level = 0
+        if len(learnt) > 1:
+            deepest = max(range(1, len(learnt)), key=lambda i: self.level[abs(learnt[i])])
+            learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+            level = self.level[abs(learnt[1])]
+        self.var_inc /= 0.95
+        return learnt, level
+
+    def backtrack(self, level):
+        """Undo every assignment above the decision level."""
+        if len(self.trail_lim) <= level:
+            return
+        for literal in self.trail[self.trail_lim[level]:]:
+            v = abs(literal)
+            self.phase[v] = self.values[v]
+            self.values[v] = 0
+            self.reason[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        while self.heap:
+            activity, v = heapq.heappop(self.heap)
+            if self.values[v] == 0 and -activity == self.activity[v]:
+                return v
+        for v in range(1, self.num_vars + 1):
+            if self.values[v] == 0:
+                return v
+        return None
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable (see model) and False if they are not.
+        """
+        if self.unsatisfiable:
+            return False
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.unsatisfiable = True
+            return False
+
+        restart_limit = 100
+        conflicts_here = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts_here += 1
+                if not self.trail_lim:
+                    self.unsatisfiable = True
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.watches[self.watch(learnt[0])].append(learnt)
+                    self.watches[self.watch(learnt[1])].append(learnt)
+                    self.enqueue(learnt[0], learnt)
+                continue
+
+            if conflicts_here >= restart_limit:
+                conflicts_here = 0
+                restart_limit = int(restart_limit * 1.5)
+                self.backtrack(0)
+                continue
+
+            v = self.pick()
+            if v is None:
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(v if self.phase[v] == 1 else -v, None)
+
+    def model(self):
+        """Returns the set of True variables of the last solution."""
+        return {v for v in range(1, self.num_vars + 1) if self.values[v] == 1}
+
+
+def run_external(command, cnf):
+    """
+    Solves the formula with a local SAT solver executable that prints its answer in the
+    SAT competition format ('s SATISFIABLE' and 'v' lines), e.g. kissat or cadical.
+    Returns the set of True variables, or None if the formula is unsatisfiable.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.cnf', delete=False) as file:
+        file.write(cnf.to_dimacs())
+    try:
+        output = subprocess.run([command, file.name], capture_output=True, text=True).stdout
+    finally:
+        os.remove(file.name)
+
+    true_variables = set()
+    satisfiable = None
+    for line in output.splitlines():
+        if line.startswith('s '):
+            satisfiable = line.strip() == 's SATISFIABLE'
+        elif line.startswith('v '):
+            true_variables.update(int(v) for v in line[2:].split() if int(v) > 0)
+    if satisfiable is None:
+        raise RuntimeError('{} did not report a result'.format(command))
+    return true_variables if satisfiable else None
+
+
+def solutions(board, command=None, bulbs=()):
+    """
+    Yields every solution of the Board as a certificate {location: White square}, by adding a
+    clause that blocks each solution found. 'command' names a local SAT solver executable to
+    use instead of the pure-Python SATSolver.
+    bulbs - locations that must have a light bulb (only the solutions that keep them are yielded)
+    """
+    cnf = CNF(board)
+    cnf.clauses.extend([cnf.variable[location]] for location in bulbs)
+    solver = None if command else SATSolver(cnf.num_vars, cnf.clauses)
+    primary = range(1, len(cnf.locations) + 1)
+
+    while True:
+        if solver is None:
+            true_variables = run_external(command, cnf)
+            if true_variables is None:
+                return
+        else:
+            if not solver.solve():
+                return
+            true_variables = solver.model()
+
+        yield cnf.certificate(true_variables)
+        blocking = [-v if v in true_variables else v for v in primary]
+        if solver is None:
+            cnf.clauses.append(blocking)
+        else:
+            solver.add_clause(blocking)
+
+
+def solve(board, command=None, bulbs=()):
+    """
+    Solves the Board with the SAT backend; returns a certificate or None.
+    bulbs - see solutions
+    """
+    for certificate in solutions(board, command, bulbs):
+        return certificate
+    return None
+
+
+def count_solutions(board, limit=2, command=None):
+    """
+    Returns the number of solutions of the Board, but stops counting at 'limit'.
+    """
+    count = 0
+    for certificate in solutions(board, command):
+        count += 1
+        if count == limit:
+            break
+    return count
+
+
+def is_unique(board, command=None):
+    """
+    Returns whether the Board has exactly one solution, using the SAT backend.
+    """
+    return count_solutions(board, 2, command) == 1
+
+
+def compare(sizes=(20, 50, 100), densities=(None, 0.1), boards=3, command=None):
+    """
+    Times the native solver against the SAT backend on generated Boards and prints the
+    average time and a uniqueness check for each size and density.
+    """
+    import generator
+    from solver import Solver
+
+    print('{:>9} {:>8} {:>12} {:>12} {:>14} {:>14}'.format(
+        'board', 'density', 'native (ms)', 'SAT (ms)', 'native 2 (ms)', 'SAT 2 (ms)'))
+    for size in sizes:
+        for density in densities:
+            times = [0.0] * 4
+            for i in range(boards):
+                board = generator.generate(size, size, density)
+                for column, count in enumerate((
+                        lambda: Solver(board).solve(),
+                        lambda: solve(board, command),
+                        lambda: Solver(board).count_solutions(2),
+                        lambda: count_solutions(board, 2, command))):
+                    start = time.perf_counter()
+                    count()
+                    times[column] += (time.perf_counter() - start) * 1000 / boards
+            print('{:>9} {:>8} {:>12.1f} {:>12.1f} {:>14.1f} {:>14.1f}'.format(
+                '{0} x {0}'.format(size), str(density), *times))
+
+
+# compare the two backends, e.g. 'python3 sat.py 20 50' (or 'python3 sat.py 50 kissat')
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()] or (20, 50, 100)
+    commands = [arg for arg in sys.argv[1:] if not arg.isdigit()]
+    compare(sizes, command=commands[0] if commands else None)
@@ -0,0 +1,354 @@
+import argparse
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import signal
+import struct
+
+import batch
+from cache import PuzzleCache
+from history import MoveHistory
+from puzzle_format import board_from_grid
+
+# WebSocket opcodes (RFC 6455)
+CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_MESSAGE = 1 << 20           # largest message a client may send, in bytes
+TOO_BIG = 1009                  # close code for a message over MAX_MESSAGE
+
+
+class MessageTooBig(ConnectionError):
+    # Raised by read_message when a message (all of its fragments together) is over MAX_MESSAGE.
+    pass
+
+
+def mask(key, payload):
+    """Returns the payload XORed with the 4-byte masking key (masking and unmasking are the same)."""
+    n = len(payload)
+    key = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+
+
+def accept_key(key):
+    """Returns the Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key."""
+    return base64.b64encode(hashlib.sha1(key.encode() + GUID).digest()).decode()
+
+
+async def read_headers(reader):
+    """Reads an HTTP request or response head; returns (first line, headers dictionary)."""
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError('connection closed during the handshake')
+        if line in (b'\r\n', b'\n'):
+            break
+        lines.append(line.decode('latin-1').rstrip('\r\n'))
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return (lines[0] if lines else ''), headers
+
+
+async def read_message(reader):
+    """
+    Reads one WebSocket message (joining fragmented frames); returns (opcode, payload).
+    Client frames are masked, server frames are not; both are accepted here.
+    Raises MessageTooBig before reading a frame that would take the message over MAX_MESSAGE.
+    """
+    opcode, message = None, b''
+    while True:
+        head = await reader.readexactly(2)
+        fin, frame_opcode = head[0] & 0x80, head[0] & 0x0F
+        masked, length = head[1] & 0x80, head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', await reader.readexactly(8))[0]
+        if length > MAX_MESSAGE or (frame_opcode < CLOSE and len(message) + length > MAX_MESSAGE):
+            raise MessageTooBig('message too large')
+        key = await reader.readexactly(4) if masked else None
+        payload = await reader.readexactly(length)
+        if key:
+            payload = mask(key, payload)
+
+        # control frames may arrive between the fragments of a message
+        if frame_opcode >= CLOSE:
+            return frame_opcode, payload
+        if frame_opcode != CONTINUATION:
+            opcode = frame_opcode
+        message += payload
+        if fin:
+            return opcode, message
+
+
+def frame(opcode, payload, masked=False):
+    """Returns a single (final) WebSocket frame; clients must mask their frames."""
+    head = bytes([0x80 | opcode])
+    bit = 0x80 if masked else 0
+    if len(payload) < 126:
+        head += bytes([bit | len(payload)])
+    elif len(payload) < 1 << 16:
+        head += bytes([bit | 126]) + struct.pack('>H', len(payload))
+    else:
+        head += bytes([bit | 127]) + struct.pack('>Q', len(payload))
+    if masked:
+        key = os.urandom(4)
+        return head + key + mask(key, payload)
+    return head + payload
+
+
+class PuzzlePool:
+    # Puzzles generated ahead of time, per board size, so that a new game never waits for the
+    # generator. When a size runs below 'low' puzzles, a background task asks the worker
+    # processes for another chunk (see batch.generate_chunk) until it holds 'target' again.
+    def __init__(self, target=200, low=50, chunk_size=25, unique=True, workers=None, seed=0, cache=None):
+        """
+        Sets up the pool; the worker processes start with the first refill. If a
+        cache.PuzzleCache is given, the solution and uniqueness of every puzzle generated
+        are stored in it.
+        """
+        self.cache = cache
+        self.target = target
+        self.low = low
+        self.chunk_size = chunk_size
+        self.unique = unique
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.puzzles = collections.defaultdict(collections.deque)  # (rows, columns) -> records
+        self.refilling = {}                                         # (rows, columns) -> task
+        self.chunks = 0
+
+    def get_stats(self):
+        """Returns the number of puzzles ready for each size."""
+        return {'{}x{}'.format(*size): len(puzzles) for size, puzzles in self.puzzles.items()}
+
+    async def generate(self, size):
+        """Generates one chunk of puzzles of the size in a worker process and adds it to the pool."""
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        self.chunks += 1
+        task = (self.seed, self.chunks, self.chunk_size, size[0], size[1], None, self.unique, None, 'json', False)
+        records = await asyncio.get_running_loop().run_in_executor(self.executor, batch.generate_chunk, task)
+        for key, data, entry in records:
+            self.puzzles[size].append(json.loads(data))
+            if self.cache is not None:
+                self.cache.store(key, self.cache.lookup(key), **entry)
+
+    async def refill(self, size):
+        """Generates chunks (one per worker at a time) until the pool holds 'target' puzzles of the size."""
+        try:
+            while len(self.puzzles[size]) < self.target:
+                chunks = -(-(self.target - len(self.puzzles[size])) // self.chunk_size)
+                await asyncio.gather(*[self.generate(size) for i in range(min(chunks, self.workers))])
+        finally:
+            self.refilling.pop(size, None)
+
+    async def take(self, size):
+        """
+        Returns a puzzle record of the size, starting a background refill when the size runs
+        low; if there is none left, waits for the refill instead of generating one itself.
+        """
+        while True:
+            if len(self.puzzles[size]) <= self.low and size not in self.refilling:
+                self.refilling[size] = asyncio.ensure_future(self.refill(size))
+            if self.puzzles[size]:
+                return self.puzzles[size].popleft()
+            await asyncio.shield(self.refilling[size])
+
+    def close(self):
+        """Stops the worker processes."""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+
+class Session:
+    # The state of one player's game: the Board (with its light bulbs) and the player's moves.
+    def __init__(self, record):
+        """
+        Builds the Board for a puzzle record from the pool.
+        """
+        self.board = board_from_grid(record['grid'], record['solution'])
+        self.history = MoveHistory(self.board)
+
+    def place(self, location):
+        """Places a light bulb; returns whether it is illuminated by another light bulb."""
+        if location not in self.board.run_index:
+            raise ValueError('{} is not a White square'.format(list(location)))
+        self.history.place(location)
+        return self.board.get_square(location).get_overlap()
+
+    def remove(self, location):
+        """Removes a light bulb."""
+        if location in self.board.run_index:
+            self.history.remove(location)
+
+
+class Server:
+    # Serves Light Up games over WebSocket, one Session per connection. Every message is a
+    # JSON object with a 'type':
+    #   {'type': 'new', 'rows': 7, 'columns': 7}     -> {'type': 'puzzle', 'rows', 'columns', 'grid'}
+    #   {'type': 'place', 'location': [x, y]}        -> {'type': 'placed', 'location', 'overlap'}
+    #   {'type': 'remove', 'location': [x, y]}       -> {'type': 'removed', 'location'}
+    #   {'type': 'undo'} or {'type': 'redo'}         -> {'type': 'undone' or 'redone', 'changed'}
+    #   {'type': 'hint'}                             -> {'type': 'hint', 'kind', 'location', 'reason', 'cause'}
+    #   {'type': 'submit'}                           -> {'type': 'result', 'solved', 'invalid', 'unlit',
+    #                                                    'conflicts', 'wrong_clues'}
+    # Errors are answered with {'type': 'error', 'message'}. A plain HTTP GET (without the
+    # WebSocket upgrade) returns the server's status as JSON.
+    def __init__(self, pool, sizes=((7, 7),), cache=None):
+        """
+        Takes the PuzzlePool that new games are taken from and the Board sizes it serves.
+        Answers are graded through a cache.PuzzleCache ('cache', or one in memory), so the
+        sessions of one puzzle share its grading.Puzzle.
+        """
+        self.pool = pool
+        self.cache = cache if cache is not None else PuzzleCache()
+        self.sizes = [tuple(size) for size in sizes]
+        self.sessions = 0
+        self.messages = 0
+
+    def get_stats(self):
+        """Returns the open sessions, messages handled and puzzles ready as a dictionary."""
+        return {'sessions': self.sessions, 'messages': self.messages, 'pool': self.pool.get_stats()}
+
+    async def handle(self, reader, writer):
+        """Runs one connection: the HTTP handshake, then the session's messages."""
+        try:
+            request, headers = await read_headers(reader)
+            if headers.get('upgrade', '').lower() != 'websocket' or 'sec-websocket-key' not in headers:
+                body = json.dumps(self.get_stats()).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\nConnection: close\r\n\r\n' + body)
+                await writer.drain()
+                return
+
+            writer.write('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                         'Sec-WebSocket-Accept: {}\r\n\r\n'.format(accept_key(headers['sec-websocket-key'])).encode())
+            self.sessions += 1
+            try:
+                await self.run_session(reader, writer)
+            finally:
+                self.sessions -= 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def run_session(self, reader, writer):
+        """Answers the messages of one session until the client closes the connection."""
+        session = None
+        while True:
+            try:
+                opcode, payload = await read_message(reader)
+            except MessageTooBig:
+                writer.write(frame(CLOSE, struct.pack('>H', TOO_BIG)))
+                await writer.drain()
+                return
+            if opcode == CLOSE:
+                writer.write(frame(CLOSE, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == PING:
+                writer.write(frame(PONG, payload))
+                await writer.drain()
+                continue
+            if opcode != TEXT:
+                continue
+
+            self.messages += 1
+            try:
+                message = json.loads(payload)
+                if not isinstance(message, dict):
+                    reply = {'type': 'error', 'message': 'a message must be a JSON object'}
+                elif message.get('type') == 'new':
+                    session, reply = await self.new_game(message)
+                elif session is None:
+                    reply = {'type': 'error', 'message': 'no game yet, send a new message first'}
+                else:
+                    reply = await self.answer(session, message)
+            except (ValueError, KeyError, TypeError) as error:
+                reply = {'type': 'error', 'message': str(error)}
+            writer.write(frame(TEXT, json.dumps(reply).encode()))
+            await writer.drain()
+
+    async def new_game(self, message):
+        """Starts a game with a puzzle from the pool; returns (Session, reply)."""
+        rows, columns = message.get('rows', self.sizes[0][0]), message.get('columns', self.sizes[0][1])
+        # bool is a subclass of int, and 7.0 == 7 would pass the size check below
+        if type(rows) is not int or type(columns) is not int or (rows, columns) not in self.sizes:
+            raise ValueError('the board size must be one of {}'.format(
+                ', '.join('{}x{}'.format(*size) for size in self.sizes)))
+        record = await self.pool.take((rows, columns))
+        # building the Board (and below, finding a hint) runs in a thread, off the event loop
+        session = await asyncio.get_running_loop().run_in_executor(None, Session, record)
+        return session, {'type': 'puzzle', 'rows': rows, 'columns': columns, 'grid': record['grid']}
+
+    async def answer(self, session, message):
+        """Returns the reply to a place, remove, undo, redo, hint or submit message."""
+        kind = message['type']
+        if kind in ('place', 'remove'):
+            location = tuple(message['location'])
+            if kind == 'remove':
+                session.remove(location)
+                return {'type': 'removed', 'location': location}
+            return {'type': 'placed', 'location': location, 'overlap': session.place(location)}
+        if kind in ('undo', 'redo'):
+            if kind == 'undo':
+                return {'type': 'undone', 'changed': session.history.undo()}
+            return {'type': 'redone', 'changed': session.history.redo()}
+        if kind == 'hint':
+            hint = await asyncio.get_running_loop().run_in_executor(
+                None, session.board.get_hint, session.history.get_answers())
+            return dict(hint._asdict(), type='hint')
+        if kind == 'submit':
+            grade = self.cache.grade(session.board, session.history.get_answers())
+            return dict(grade._asdict(), type='result')
+        raise ValueError('unknown message type {!r}'.format(kind))
+
+
+async def serve(host='127.0.0.1', port=8765, pool=None, sizes=((7, 7),), cache=None):
+    """
+    Runs the server until it is cancelled; the pool is filled for the given sizes first,
+    and new games can only have one of them. 'cache' is passed on to the Server.
+    """
+    pool = pool or PuzzlePool()
+    for size in sizes:
+        await pool.refill(size)
+    server = Server(pool, sizes, cache)
+    listener = await asyncio.start_server(server.handle, host, port, backlog=4096)
+    print('serving on ws://{}:{} ({})'.format(host, port, pool.get_stats()))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        pool.close()
+
+
+# e.g. 'python3 server.py --port 8765 --size 7 7 --size 10 10 --pool 500'
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve Light Up games over WebSocket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--size', type=int, nargs=2, action='append', metavar=('ROWS', 'COLUMNS'),
+                        help='board sizes to generate ahead of time (default 7 7)')
+    parser.add_argument('--pool', type=int, default=200, help='puzzles kept ready per size')
+    parser.add_argument('--workers', type=int, default=None, help='generator processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', default=None, help='PuzzleCache file for the puzzles served (default: memory only)')
+    args = parser.parse_args()
+
+    # stopping the server with SIGTERM closes it like Ctrl-C does, so the cache is written out
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with PuzzleCache(path=args.cache) as known:
+        puzzles = PuzzlePool(target=args.pool, low=args.pool // 4, workers=args.workers, seed=args.seed, cache=known)
+        try:
+            asyncio.run(serve(args.host, args.port, puzzles, [tuple(size) for size in args.size or [(7, 7)]], known))
+        except KeyboardInterrupt:
+            pass
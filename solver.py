@@ -0,0 +1,390 @@
+import profiling
+import sat
+from lightup import White
+
+UNKNOWN, BULB, EMPTY = 0, 1, 2
+
+
+class SearchLimit(Exception):
+    # Raised by the search when it takes more nodes than the Solver's limit.
+    pass
+
+
+class Solver:
+    # Solves a Light Up Board from its walls and clues alone (the certificate is not used).
+    #
+    # Every White square gets one of three values: UNKNOWN, BULB or EMPTY (no light bulb).
+    # Assignments are propagated with the rules a human would use:
+    #   - a light bulb empties every other square of its two runs (one light bulb per run)
+    #   - a numbered Black square with all of its light bulbs fills the rest of its neighbors
+    #     with EMPTY, and one that needs all of its unknown neighbors fills them with light bulbs
+    #   - an unlit square that can only be lit by one square forces a light bulb there
+    # When nothing more can be deduced, the solver branches (see choose) and backtracks on
+    # contradictions. Every assignment remembers which branching levels it depends on (as a
+    # bitmask), so a contradiction jumps straight back to the deepest level that caused it
+    # instead of retrying unrelated branches in between (conflict-directed backjumping).
+    def __init__(self, board, limit=None):
+        """
+        Takes the Board to solve; the Board must have its edges (and run index) generated.
+        limit - the number of search nodes after which the search raises SearchLimit
+        (None to search until it is done)
+        """
+        self.board = board
+        self.limit = limit
+        locations = list(board.run_index)
+        cell_id = {location: i for i, location in enumerate(locations)}
+        runs = [[cell_id[square.get_location()] for square in run] for run in board.runs]
+
+        # numbered Black squares as (number, adjacent White squares)
+        clues = []
+        for square in board.black:
+            if square.get_number() != 'B':
+                cells = [cell_id[p.get_location()] for p in square.get_neighbors() if type(p) == White]
+                clues.append((int(square.get_number()), cells))
+
+        self.setup(locations, [board.run_index[location] for location in locations], runs, clues)
+
+    def setup(self, locations, cell_runs, runs, clues):
+        """
+        Sets up the search over the cells: 'locations' of the cells, the (horizontal, vertical)
+        run IDs of each cell, the cells of each run and the clues as (number, adjacent cells).
+        """
+        self.locations = locations
+        self.cell_id = {location: i for i, location in enumerate(locations)}
+        self.cell_runs = cell_runs
+        self.runs = runs
+        self.clues = clues
+        self.cell_clues = [[] for i in locations]
+        for c, (number, cells) in enumerate(clues):
+            for i in cells:
+                self.cell_clues[i].append(c)
+
+        self.value = [UNKNOWN] * len(self.locations)
+        self.reason = [0] * len(self.locations)     # levels each assignment depends on
+        self.unknown_in_run = [len(run) for run in self.runs]
+        self.bulb_in_run = [-1] * len(self.runs)
+        self.trail = []
+        self.queue = []
+        self.next = 0                               # every square before it is decided and lit
+        self.conflict = 0                           # levels that caused the last contradiction
+        self.nodes = 0
+        self.propagations = 0
+        self.backtracks = 0
+        self.backjumps = 0
+
+    def get_stats(self):
+        """Returns the search statistics as a dictionary."""
+        return {'nodes': self.nodes, 'propagations': self.propagations,
+                'backtracks': self.backtracks, 'backjumps': self.backjumps}
+
+    def lit(self, i):
+        """Returns whether square i has a light bulb in one of its runs."""
+        horizontal, vertical = self.cell_runs[i]
+        return self.bulb_in_run[horizontal] != -1 or self.bulb_in_run[vertical] != -1
+
+    def lighters(self, i):
+        """Returns how many UNKNOWN squares could still light square i (itself included)."""
+        horizontal, vertical = self.cell_runs[i]
+        return self.unknown_in_run[horizontal] + self.unknown_in_run[vertical] - (self.value[i] == UNKNOWN)
+
+    def assign(self, i, value, reason):
+        """
+        Sets square i to BULB or EMPTY because of the levels in 'reason';
+        returns False if this contradicts its current value.
+        """
+        if self.value[i] != UNKNOWN:
+            if self.value[i] == value:
+                return True
+            self.conflict = reason | self.reason[i]
+            return False
+
+        self.value[i] = value
+        self.reason[i] = reason
+        self.trail.append(i)
+        self.queue.append(i)
+        for run in self.cell_runs[i]:
+            self.unknown_in_run[run] -= 1
+            if value == BULB:
+                self.bulb_in_run[run] = i
+        return True
+
+    def undo(self, mark):
+        """Undo every assignment made after the trail had 'mark' entries."""
+        while len(self.trail) > mark:
+            i = self.trail.pop()
+            for run in self.cell_runs[i]:
+                self.unknown_in_run[run] += 1
+                if self.bulb_in_run[run] == i:
+                    self.bulb_in_run[run] = -1
+                    # the squares of a run are in order, so this is the first one it no longer lights
+                    self.next = min(self.next, self.runs[run][0])
+            self.value[i] = UNKNOWN
+            self.next = min(self.next, i)
+        self.queue = []
+
+    def check_clue(self, c):
+        """
+        Applies clue saturation to the numbered Black square c; returns False on a contradiction.
+        """
+        number, cells = self.clues[c]
+        bulbs, unknown, bulb_reason, empty_reason = 0, [], 0, 0
+        for i in cells:
+            if self.value[i] == BULB:
+                bulbs += 1
+                bulb_reason |= self.reason[i]
+            elif self.value[i] == EMPTY:
+                empty_reason |= self.reason[i]
+            else:
+                unknown.append(i)
+
+        if bulbs > number:
+            self.conflict = bulb_reason
+            return False
+        if bulbs + len(unknown) < number:
+            self.conflict = empty_reason
+            return False
+        if unknown and bulbs == number:
+            for i in unknown:
+                self.propagations += 1
+                self.assign(i, EMPTY, bulb_reason)
+        elif unknown and bulbs + len(unknown) == number:
+            for i in unknown:
+                self.propagations += 1
+                if self.assign(i, BULB, empty_reason) is False:
+                    return False
+        return True
+
+    def light_reason(self, i):
+        """
+        Returns the levels that stop the squares in the runs of the unlit square i from
+        lighting it, and the unknown squares that still can.
+        """
+        reason, candidates = 0, []
+        for run in self.cell_runs[i]:
+            for j in self.runs[run]:
+                if self.value[j] == UNKNOWN:
+                    if j not in candidates:
+                        candidates.append(j)
+                else:
+                    reason |= self.reason[j]
+        return reason, candidates
+
+    def check_light(self, i):
+        """
+        Forces a light bulb if only one square can light the unlit square i;
+        returns False if nothing can light it anymore.
+        """
+        if self.lit(i) or self.lighters(i) > 1:
+            return True
+
+        reason, candidates = self.light_reason(i)
+        if not candidates:
+            self.conflict = reason
+            return False
+        self.propagations += 1
+        return self.assign(candidates[0], BULB, reason)
+
+    def propagate(self):
+        """
+        Deduce everything that follows from the queued assignments; returns False on a contradiction.
+        """
+        while self.queue:
+            i = self.queue.pop()
+
+            for c in self.cell_clues[i]:
+                if self.check_clue(c) is False:
+                    return False
+
+            if self.value[i] == BULB:
+                for run in self.cell_runs[i]:
+                    for j in self.runs[run]:
+                        if j != i:
+                            if self.value[j] == BULB:
+                                self.conflict = self.reason[i] | self.reason[j]
+                                return False
+                            if self.value[j] == UNKNOWN:
+                                self.propagations += 1
+                                self.assign(j, EMPTY, self.reason[i])
+
+            # squares that share a run with the EMPTY square i lost a possible lighter
+            # (the runs with a light bulb are lit, so there is nothing to check there)
+            else:
+                for run in self.cell_runs[i]:
+                    if self.bulb_in_run[run] == -1:
+                        for j in self.runs[run]:
+                            if self.lighters(j) <= 1 and self.check_light(j) is False:
+                                return False
+        return True
+
+    def start(self):
+        """
+        Apply the clues and forced squares of the empty Board; returns False if it has no solution.
+        """
+        for c in range(len(self.clues)):
+            if self.check_clue(c) is False:
+                return False
+        for i in range(len(self.locations)):
+            if self.check_light(i) is False:
+                return False
+        return self.propagate()
+
+    def choose(self):
+        """
+        Picks the next branch; returns (candidates, allow_none, reason) or None if every square is lit.
+
+        Each branch places a light bulb on one of the candidates (the earlier candidates are
+        left EMPTY); if allow_none is True, a last branch leaves all of them EMPTY. 'reason'
+        holds the levels that ruled out every other way of lighting the square.
+        The squares are scanned row by row so that the search finishes one area of the Board
+        before it moves on, and the first square that still needs a decision is picked (the scan
+        starts at self.next, since only undo can make an earlier square need one again):
+          - an unknown square next to a numbered Black square branches on BULB or EMPTY
+          - an unlit square branches over the squares that can light it, itself first
+        Raises SearchLimit once the search has taken more nodes than self.limit.
+        """
+        if self.limit is not None and self.nodes > self.limit:
+            raise SearchLimit()
+        for i in range(self.next, len(self.locations)):
+            if self.value[i] == UNKNOWN and self.cell_clues[i]:
+                self.next = i
+                return [i], True, 0
+            if not self.lit(i):
+                self.next = i
+                reason, candidates = self.light_reason(i)
+                if self.value[i] == UNKNOWN:
+                    candidates.remove(i)
+                    candidates.insert(0, i)
+                return candidates, False, reason
+        self.next = len(self.locations)
+        return None
+
+    def solution(self):
+        """Returns the current light bulbs as a certificate {location: White square}."""
+        return {self.locations[i]: self.board.get_square(self.locations[i])
+                for i in range(len(self.locations)) if self.value[i] == BULB}
+
+    def solutions(self):
+        """
+        Yields every solution of the Board as a certificate {location: White square}.
+        """
+        before = self.get_stats()
+        try:
+            for certificate in self.search():
+                yield certificate
+        finally:
+            # report the work of this search, including when the caller stops early
+            if profiling.active is not None:
+                for name, n in self.get_stats().items():
+                    profiling.active.count('solver_' + name, n - before[name])
+
+    def search(self):
+        """
+        Yields every solution of the Board (see solutions).
+        """
+        self.undo(0)
+        if self.start() is False:
+            return
+
+        # each stack frame is a list of [trail length before branching, candidates, allow_none,
+        # next branch, levels that ruled out other lighters, levels behind each failed branch]
+        stack = []
+        while True:
+            choice = self.choose()
+            if choice is None:
+                yield self.solution()
+                # look for the next solution by backtracking through every level
+                conflict = (1 << (len(stack) + 1)) - 2
+            else:
+                stack.append([len(self.trail), choice[0], choice[1], 0, choice[2], []])
+                conflict = None
+
+            while stack:
+                level = len(stack)
+                frame = stack[-1]
+                mark, candidates, allow_none, k, reason, failed = frame
+                self.undo(mark)
+
+                if conflict is not None:
+                    # the last branch failed without depending on this level: skip the whole level
+                    if conflict >> level & 1 == 0:
+                        self.backjumps += 1
+                        stack.pop()
+                        continue
+                    failed.append(conflict & ~(1 << level))
+                    conflict = None
+
+                if k == len(candidates) + allow_none:
+                    # every branch failed, so the level below caused it
+                    for levels in failed:
+                        reason |= levels
+                    conflict = reason
+                    stack.pop()
+                    continue
+
+                frame[3] = k + 1
+                self.nodes += 1
+
+                # the earlier candidates already failed, so they are EMPTY in this branch
+                for j, levels in zip(candidates, failed):
+                    self.assign(j, EMPTY, levels | 1 << level)
+                if k == len(candidates):
+                    ok = self.propagate()
+                else:
+                    ok = self.assign(candidates[k], BULB, 1 << level) and self.propagate()
+                if ok:
+                    break
+                self.backtracks += 1
+                conflict = self.conflict
+            else:
+                return
+
+    @profiling.timed('solve')
+    def solve(self):
+        """
+        Returns the first solution found as a certificate {location: White square}, or None.
+        """
+        for certificate in self.solutions():
+            return certificate
+        return None
+
+    @profiling.timed('solve')
+    def count_solutions(self, limit=2):
+        """
+        Returns the number of solutions, but stops counting once 'limit' solutions are found.
+        """
+        count = 0
+        for certificate in self.solutions():
+            count += 1
+            if count == limit:
+                break
+        return count
+
+
+def node_limit(board):
+    """
+    Returns the number of search nodes after which solve and is_unique hand the Board to the
+    SAT backend: about as long as the SAT backend takes, so the rare Boards where branching
+    row by row goes astray (seconds or minutes on some 100 x 100 Boards) cost no more than that.
+    """
+    return len(board.run_index) + 1000
+
+
+def solve(board):
+    """
+    Solves the Board using only its walls and clues; returns a certificate or None.
+    If the search passes node_limit, the SAT backend solves the Board instead (see sat.solve).
+    """
+    try:
+        return Solver(board, node_limit(board)).solve()
+    except SearchLimit:
+        return sat.solve(board)
+
+
+def is_unique(board):
+    """
+    Returns whether the Board has exactly one solution (with the same fallback as solve).
+    """
+    try:
+        return Solver(board, node_limit(board)).count_solutions(2) == 1
+    except SearchLimit:
+        return sat.is_unique(board)
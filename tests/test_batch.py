@@ -0,0 +1,56 @@
+import json
+import random
+
+import batch
+import cache
+import puzzle_format
+
+
+def read_json(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_same_seed_writes_the_same_file(tmp_path):
+    paths = [str(tmp_path / name) for name in ('a.jsonl', 'b.jsonl', 'c.jsonl')]
+    batch.generate_batch(30, paths[0], 6, 6, seed=4, workers=1, chunk_size=7)
+    batch.generate_batch(30, paths[1], 6, 6, seed=4, workers=2, chunk_size=7)
+    batch.generate_batch(30, paths[2], 6, 6, seed=5, workers=2, chunk_size=7)
+    with open(paths[0], 'rb') as a, open(paths[1], 'rb') as b, open(paths[2], 'rb') as c:
+        first = a.read()
+        assert first == b.read()
+        assert first != c.read()
+
+
+def test_duplicates_are_skipped(tmp_path):
+    path = str(tmp_path / 'small.jsonl')
+    stats = batch.generate_batch(40, path, 2, 2, seed=1, workers=1, chunk_size=20)
+    records = read_json(path)
+    assert stats['written'] == len(records) < 40
+    assert stats['duplicates'] > 0
+    keys = [cache.digest(cache.canonical(record['grid'])[1]) for record in records]
+    assert len(set(keys)) == len(keys)
+
+
+def test_seeds_rebuild_the_same_puzzles(tmp_path):
+    records = str(tmp_path / 'puzzles.jsonl')
+    seeds = str(tmp_path / 'puzzles.seeds')
+    batch.generate_batch(12, records, 7, 7, unique=True, seed=2, workers=1, chunk_size=5)
+    batch.generate_batch(12, seeds, 7, 7, unique=True, seed=2, workers=1, chunk_size=5, output='seeds')
+    with open(seeds) as file:
+        numbers = [int(line) for line in file]
+    expected = read_json(records)
+    assert numbers == [record['seed'] for record in expected]
+
+    boards = batch.rebuild(numbers, 7, 7, unique=True, workers=1)
+    assert [puzzle_format.grid(board) for board in boards] == [record['grid'] for record in expected]
+    assert [sorted(board.get_certificate()) for board in boards] == \
+           [[tuple(location) for location in record['solution']] for record in expected]
+
+
+def test_boards_do_not_use_the_global_random_module():
+    random.seed(1)
+    first = puzzle_format.grid(batch.build(99, 9, 9)[0])
+    random.seed(2)
+    assert puzzle_format.grid(batch.build(99, 9, 9)[0]) == first
+    assert puzzle_format.grid(batch.build(100, 9, 9)[0]) != first
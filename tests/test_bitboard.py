@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+import generator
+import grading
+import puzzle_format
+from lightup import BitBoard
+
+
+@pytest.fixture(params=range(4))
+def board(request):
+    return generator.generate(9, 12, seed=request.param)
+
+
+def test_generated_bitboard_is_solved_by_its_certificate():
+    for seed in range(5):
+        compact = generator.generate(15, 11, seed=seed, compact=True)
+        assert compact.random is None
+        lines = puzzle_format.grid(compact)
+        assert grading.Puzzle(lines).grade(compact.get_certificate()).solved
+        assert puzzle_format.grid(compact.to_board()) == lines
+
+
+def test_round_trip_with_board(board):
+    compact = BitBoard.from_board(board)
+    assert puzzle_format.grid(compact) == puzzle_format.grid(board)
+    assert compact.get_certificate().keys() == board.get_certificate().keys()
+    assert puzzle_format.grid(compact.to_board()) == puzzle_format.grid(board)
+
+
+def test_verifier_agrees_with_grading(board):
+    puzzle = grading.Puzzle.from_board(board)
+    certificate = sorted(board.get_certificate())
+    white = sorted(board.run_index)
+    rng = random.Random(7)
+    answers = [certificate, certificate[1:], certificate + [rng.choice(white)]]
+    answers += [rng.sample(white, len(certificate)) for i in range(5)]
+    for answer in answers:
+        compact = BitBoard.from_board(board)
+        assert compact.verifier(answer) == puzzle.grade(answer).solved
+        if not puzzle.grade(answer).solved:
+            assert any(compact.get_message())
+
+
+def test_runs_match_the_board(board):
+    compact = BitBoard.from_board(board)
+    for location, (horizontal, vertical) in board.run_index.items():
+        i = compact.index(location)
+        runs = [sorted(compact.run_squares(run)) for run in compact.get_runs(i)]
+        assert runs == [sorted(compact.index(square.get_location()) for square in board.runs[horizontal]),
+                        sorted(compact.index(square.get_location()) for square in board.runs[vertical])]
+
+
+def test_lighting_a_run_matches_the_rays(board):
+    compact = BitBoard.from_board(board)
+    for location in board.get_certificate():
+        bit = 1 << compact.index(location)
+        compact.random = random.Random(0)
+        assert compact.generate_lightbulbs(bit, 0, None)
+        assert compact.lit == compact.light(compact.bulbs)[0]
+    assert compact.verifier(())
+
+
+def test_large_boards_use_32_bit_run_ids():
+    compact = BitBoard(200, 400, 0.2, seed=1)
+    compact.generate_white_squares()
+    compact.generate_black_squares()
+    compact.generate_edges()
+    assert compact.runs.typecode == 'I' and compact.run_ids.typecode == 'I'
+    assert BitBoard.from_board(generator.generate(7, 7, seed=1)).runs.typecode == 'H'
@@ -0,0 +1,68 @@
+import pytest
+
+import cache
+import generator
+import grading
+import puzzle_format
+
+
+@pytest.fixture
+def lines():
+    return puzzle_format.grid(generator.generate(6, 9, seed=8))
+
+
+def test_canonical_is_the_same_for_every_symmetry(lines):
+    k, best = cache.canonical(lines)
+    assert cache.transform(k, lines) == best
+    for moved in range(len(cache.TRANSFORMS)):
+        assert cache.canonical(cache.transform(moved, lines))[1] == best
+
+
+def test_transform_matches_transforms(lines):
+    rows, columns = len(lines), len(lines[0])
+    for k in range(len(cache.TRANSFORMS)):
+        moved = cache.transform(k, lines)
+        for x in range(1, rows + 1):
+            for y in range(1, columns + 1):
+                i, j = cache.TRANSFORMS[k](x, y, rows, columns)
+                assert moved[i - 1][j - 1] == lines[x - 1][y - 1]
+
+
+def test_canonical_hash_and_solution_move_back(lines):
+    board = puzzle_format.board_from_grid(lines)
+    puzzles = cache.PuzzleCache()
+    solution = puzzles.solve(board)
+    for k in range(len(cache.TRANSFORMS)):
+        moved = puzzle_format.board_from_grid(cache.transform(k, lines))
+        assert cache.canonical_hash(moved) == cache.canonical_hash(board)
+        assert sorted(puzzles.solve(moved)) == sorted(cache.move(k, solution, len(lines), len(lines[0])))
+    assert puzzles.get_stats()['misses'] == 1
+
+
+def test_cache_commits_on_close(tmp_path, lines):
+    path = str(tmp_path / 'puzzles.sqlite')
+    with cache.PuzzleCache(path=path) as puzzles:
+        puzzles.solve(puzzle_format.board_from_grid(lines))
+    reopened = cache.PuzzleCache(maxsize=0, path=path)
+    try:
+        assert reopened.lookup(cache.digest(cache.canonical(lines)[1])) is not None
+    finally:
+        reopened.close()
+
+
+def test_grade_matches_grading(lines):
+    board = puzzle_format.board_from_grid(lines)
+    certificate = sorted(cache.PuzzleCache().solve(board))
+    white = sorted(board.run_index)
+    answers = [certificate, certificate[1:], [(9, 9), white[3], (0, 1)] + certificate, white[::-1][:6]]
+    for k in range(len(cache.TRANSFORMS)):
+        moved = puzzle_format.board_from_grid(cache.transform(k, lines))
+        puzzles = cache.PuzzleCache()
+        for answer in answers:
+            answer = cache.move(k, answer, len(lines), len(lines[0]))
+            expected = grading.grade(moved, answer)
+            assert puzzles.grade(moved, answer) == expected     # a miss
+            assert puzzles.grade(moved, answer) == expected     # and a hit
+        stats = puzzles.get_stats()
+        assert (stats['grade_misses'], stats['grade_hits'], stats['hits'], stats['misses']) == \
+               (1, 2 * len(answers) - 1, 0, 0)
@@ -0,0 +1,40 @@
+import pytest
+
+import difficulty
+import grading
+import puzzle_format
+
+
+@pytest.mark.parametrize('level', [1, 2, 3])
+def test_generate_rated_hits_the_level(level):
+    stats = {}
+    board, rating = difficulty.generate_rated(8, 8, level=level, seed=level, stats=stats)
+    assert rating.level == level and rating.name == difficulty.LEVELS[level]
+    # the level is the hardest technique used: it was needed, and nothing harder was
+    assert rating.counts[level] > 0 or level == 1
+    assert not any(rating.counts[level + 1:])
+    assert rating.steps == sum(rating.counts)
+    assert difficulty.rate(board) == rating
+    assert stats['attempts'] == stats['rejected'] + 1
+
+
+def test_step_bounds_and_attempts():
+    board, rating = difficulty.generate_rated(8, 8, level=1, min_steps=20, max_steps=40, seed=4)
+    assert 20 <= rating.steps <= 40
+    stats = {}
+    assert difficulty.generate_rated(6, 6, level=1, min_steps=10 ** 6, attempts=3, seed=4, stats=stats) is None
+    assert stats == {'attempts': 3, 'rejected': 3}
+
+
+def test_rated_board_is_solved_by_the_grader():
+    board, rating = difficulty.generate_rated(8, 8, level=3, seed=5)
+    grader = difficulty.Grader(board)
+    grader.rate()
+    assert grading.grade(board, grader.solution()).solved
+
+
+def test_levels_of_small_puzzles():
+    # clue saturation alone: the 4 needs all of its neighbors
+    assert difficulty.rate(puzzle_format.board_from_grid(['#.#', '.4.', '#.#'])).level == 1
+    # two solutions: no technique decides, so the puzzle needs search
+    assert difficulty.rate(puzzle_format.board_from_grid(['...'])).level == 4
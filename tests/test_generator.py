@@ -0,0 +1,40 @@
+import pytest
+
+import generator
+import grading
+import puzzle_format
+import solver
+from solver import Solver
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_generate_unique_has_one_solution(seed):
+    board = generator.generate_unique(8, 8, seed=seed)
+    assert Solver(board).count_solutions(2) == 1
+    assert solver.is_unique(board)
+    assert grading.grade(board, board.get_certificate()).solved
+
+
+def test_generate_unique_minimize_keeps_uniqueness():
+    board = generator.generate_unique(8, 8, minimize=True, seed=11)
+    assert solver.is_unique(board)
+    clues = sum(1 for square in board.black if square.get_number() != 'B')
+    assert clues <= sum(1 for square in generator.generate_unique(8, 8, seed=11).black
+                        if square.get_number() != 'B')
+
+
+def test_generate_unique_is_reproducible():
+    first = generator.generate_unique(9, 9, seed=3)
+    second = generator.generate_unique(9, 9, seed=3)
+    assert puzzle_format.grid(first) == puzzle_format.grid(second)
+
+
+def test_generate_unique_on_a_bitboard():
+    board = generator.generate_unique(10, 10, seed=3, compact=True)
+    assert solver.is_unique(board)
+    assert grading.grade(board, board.get_certificate()).solved
+
+
+def test_is_unique_rejects_several_solutions():
+    assert not solver.is_unique(puzzle_format.board_from_grid(['...']))
+    assert solver.is_unique(puzzle_format.board_from_grid(['..1']))
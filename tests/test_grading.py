@@ -0,0 +1,80 @@
+import random
+
+import generator
+import grading
+import puzzle_format
+from lightup import White
+
+
+def brute_force(board, answer):
+    """Grades an answer by walking the rays of every light bulb on the Board."""
+    bulbs = [location for location in answer if location in board.run_index]
+    invalid = [location for location in answer if location not in board.run_index]
+    lit = {}
+    for bulb in bulbs:
+        for dx, dy in ((0, 0), (0, 1), (0, -1), (1, 0), (-1, 0)):
+            x, y = bulb[0] + dx, bulb[1] + dy
+            while type(board.get_square((x, y))) == White:
+                lit.setdefault((x, y), set()).add(bulb)
+                if (dx, dy) == (0, 0):
+                    break
+                x, y = x + dx, y + dy
+    unlit = sorted(location for location in board.run_index if location not in lit)
+    conflicts = sorted(bulb for bulb in bulbs if len(lit[bulb]) > 1)
+    wrong = []
+    for square in sorted(board.black, key=lambda square: square.get_location()):
+        if square.get_number() != 'B':
+            count = sum(1 for p in square.get_neighbors() if p.get_location() in bulbs)
+            if count != int(square.get_number()):
+                wrong.append((square.get_location(), int(square.get_number()), count))
+    solved = not (invalid or unlit or conflicts or wrong)
+    return grading.Grade(solved, invalid, unlit, conflicts, wrong)
+
+
+def answers(board, rng):
+    certificate = sorted(board.get_certificate())
+    white = sorted(board.run_index)
+    yield certificate
+    yield certificate[1:]
+    yield certificate + [rng.choice(white)]
+    yield [(0, 0), (1, 1)] + certificate
+    for size in (0, 3, len(certificate)):
+        yield rng.sample(white, size)
+
+
+def test_grade_matches_the_rules():
+    rng = random.Random(10)
+    for seed in range(6):
+        board = generator.generate(8, 11, seed=seed)
+        puzzle = grading.Puzzle.from_board(board)
+        for answer in answers(board, rng):
+            assert puzzle.grade(answer) == brute_force(board, answer)
+
+
+def test_grade_agrees_with_the_verifier():
+    rng = random.Random(11)
+    board = generator.generate(9, 9, seed=12)
+    puzzle = grading.Puzzle(puzzle_format.grid(board))
+    for answer in answers(board, rng):
+        fresh = puzzle_format.board_from_grid(puzzle_format.grid(board))
+        squares = {location: fresh.get_square(location) for location in answer if location in fresh.run_index}
+        grade = puzzle.grade(answer)
+        # the verifier only sees the White squares, so invalid locations are left out
+        assert fresh.verifier(squares) == (not (grade.unlit or grade.conflicts or grade.wrong_clues))
+
+
+def test_grade_batch_keeps_the_order():
+    rng = random.Random(12)
+    boards = [generator.generate(7, 7, seed=seed) for seed in range(4)]
+    pairs = [(board, answer) for board in boards for answer in answers(board, rng)]
+    pairs.append((tuple(puzzle_format.grid(boards[0])), sorted(boards[0].get_certificate())))
+    assert grading.grade_batch(pairs) == [grading.grade(puzzle, answer) if not isinstance(puzzle, tuple)
+                                          else grading.Puzzle(list(puzzle)).grade(answer)
+                                          for puzzle, answer in pairs]
+
+
+def test_grading_does_not_change_the_board():
+    board = generator.generate(7, 7, seed=3)
+    before = [square.get_tag() for square in board.get_squares()]
+    grading.grade(board, sorted(board.run_index)[:5])
+    assert [square.get_tag() for square in board.get_squares()] == before
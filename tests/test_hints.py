@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+import generator
+import grading
+import hints
+import puzzle_format
+import sat
+from solver import Solver
+
+
+def follow(board, answers=()):
+    """Places the hinted light bulbs until the Board is solved; returns the light bulbs and hints."""
+    answers = list(answers)
+    given = []
+    while True:
+        hint = board.get_hint(answers)
+        given.append(hint)
+        if hint.kind != 'bulb':
+            return answers, given
+        assert hint.location not in answers
+        answers.append(hint.location)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_hints_solve_unique_puzzles(seed):
+    board = generator.generate_unique(9, 9, seed=seed)
+    answers, given = follow(board)
+    assert given[-1].kind == 'solved'
+    assert grading.grade(board, answers).solved
+    # every hinted light bulb is part of the only solution, and most come from a rule
+    assert set(answers) == set(board.get_certificate())
+    assert all(hint.reason in ('clue saturation', 'lone lighter', 'search') for hint in given[:-1])
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_hints_on_puzzles_with_several_solutions(seed):
+    board = generator.generate(10, 10, 0.12, seed=seed)
+    assert Solver(board).count_solutions(2) == 2
+    rng = random.Random(seed)
+    # start from some light bulbs of a solution, then let the hints finish it
+    start = rng.sample(sorted(board.get_certificate()), 3)
+    answers, given = follow(board, start)
+    assert given[-1].kind == 'solved'
+    assert grading.grade(board, answers).solved
+
+
+def test_dead_ends():
+    board = generator.generate_unique(8, 8, seed=5)
+    certificate = set(board.get_certificate())
+    wrong = next(location for location in sorted(board.run_index) if location not in certificate)
+    hint = board.get_hint([wrong])
+    assert hint.kind == 'dead end'
+
+    run = next(run for run in board.runs if len(run) > 1)
+    pair = [run[0].get_location(), run[1].get_location()]
+    assert board.get_hint(pair) == hints.Hint('dead end', None, 'bulb conflict', pair)
+
+    # taking the wrong light bulb away gives hints again
+    assert board.get_hint([]).kind == 'bulb'
+
+
+def test_cause_of_a_clue_with_too_many_light_bulbs():
+    board = puzzle_format.board_from_grid(['.1.', '#.#'])
+    assert board.get_hint([(1, 1), (1, 3)]) == hints.Hint('dead end', None, 'clue exceeded', (1, 2))
+    board = puzzle_format.board_from_grid(['.', '1', '.'])
+    assert board.get_hint([(1, 1), (3, 1)]) == hints.Hint('dead end', None, 'clue exceeded', (2, 1))
+
+
+def test_engine_is_rebuilt_when_the_board_changes():
+    board = generator.generate(8, 8, 0.1, seed=6)
+    board.get_hint([])
+    engine = board.hints
+    board.get_hint([])
+    assert board.hints is engine
+    location = next(location for location in sorted(board.run_index) if location not in board.get_certificate())
+    board.add_black_square(location, 'B')
+    board.get_hint([])
+    assert board.hints is not engine
+    assert location not in board.hints.cell_id
+
+
+def test_known_solution_is_reused():
+    board = generator.generate(12, 12, 0.12, seed=7)
+    certificate = sorted(board.get_certificate())
+    board.get_hint(certificate[:1])
+    engine = board.hints
+    known = engine.known
+    nodes = engine.nodes
+    # light bulbs that the known solution keeps need no new search
+    kept = sorted(engine.locations[i] for i in known)
+    board.get_hint(kept[:4])
+    assert engine.known is known and engine.nodes == nodes
+
+
+def test_sat_keeps_fixed_bulbs():
+    board = generator.generate(10, 10, seed=3)
+    location = next(iter(board.get_certificate()))
+    certificate = sat.solve(board, bulbs=[location])
+    assert location in certificate
+    assert grading.grade(board, certificate).solved
@@ -0,0 +1,49 @@
+import generator
+from history import MoveHistory
+
+
+def bulbs(board):
+    return {location for location in board.run_index if board.get_square(location).get_light_bulb()}
+
+
+def test_undo_redo():
+    board = generator.generate(8, 8, seed=2)
+    history = MoveHistory(board)
+    first, second = sorted(board.get_certificate())[:2]
+
+    history.place(first)
+    history.place(second)
+    history.remove(first)
+    assert bulbs(board) == {second}
+    assert set(history.get_answers()) == {second}
+
+    assert history.undo() == [first]
+    assert bulbs(board) == {first, second}
+    history.undo()
+    history.undo()
+    assert bulbs(board) == set()
+    assert not history.can_undo()
+    assert history.undo() == []
+
+    history.redo()
+    assert bulbs(board) == {first}
+    assert board.get_square(first).get_illuminated()
+    assert history.can_redo()
+
+    # a new move clears the redo stack
+    history.place(second)
+    assert not history.can_redo()
+    assert history.redo() == []
+    assert bulbs(board) == {first, second}
+
+
+def test_restore_only_changes_the_difference():
+    board = generator.generate(8, 8, seed=3)
+    history = MoveHistory(board)
+    certificate = sorted(board.get_certificate())
+    for location in certificate[:-1]:
+        history.place(location)
+    solution = history.snapshot_of(certificate)
+    assert history.restore(solution) == [certificate[-1]]
+    assert bulbs(board) == set(certificate)
+    assert all(square.get_illuminated() for square in board.get_squares() if square.get_location() in board.run_index)
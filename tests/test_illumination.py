@@ -0,0 +1,78 @@
+import random
+
+import generator
+from lightup import White
+
+
+def ray_squares(board, location):
+    """Returns the White squares a light bulb at the location lights, walking its four rays."""
+    squares = {location}
+    for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+        x, y = location[0] + dx, location[1] + dy
+        while type(board.get_square((x, y))) == White:
+            squares.add((x, y))
+            x, y = x + dx, y + dy
+    return squares
+
+
+def expected_counts(board, bulbs):
+    counts = dict.fromkeys(board.run_index, 0)
+    for bulb in bulbs:
+        for location in ray_squares(board, bulb):
+            counts[location] += 1
+    return counts
+
+
+def check(board, bulbs):
+    counts = expected_counts(board, bulbs)
+    for location, count in counts.items():
+        square = board.get_square(location)
+        assert square.get_light_count() == count
+        assert square.get_light_bulb() == (location in bulbs)
+        assert square.get_illuminated() == (count > 0)
+        assert square.get_overlap() == (location in bulbs and count > 1)
+
+
+def test_run_index_matches_the_rays():
+    board = generator.generate(12, 9, seed=4)
+    for location in board.run_index:
+        horizontal, vertical = board.get_runs(board.get_square(location))
+        assert {square.get_location() for square in horizontal + vertical} == ray_squares(board, location)
+        assert all(square.get_location()[0] == location[0] for square in horizontal)
+        assert all(square.get_location()[1] == location[1] for square in vertical)
+
+
+def test_place_and_remove_keep_light_counts():
+    board = generator.generate(10, 10, seed=5)
+    rng = random.Random(5)
+    white = sorted(board.run_index)
+    bulbs = set()
+    for step in range(200):
+        location = rng.choice(white)
+        square = board.get_square(location)
+        if location in bulbs:
+            board.remove_lightbulb(square)
+            bulbs.remove(location)
+        else:
+            board.place_lightbulb(square)
+            bulbs.add(location)
+        check(board, bulbs)
+
+
+def test_remove_lightbulbs_clears_the_board():
+    board = generator.generate(8, 8, seed=6)
+    for location in board.get_certificate():
+        board.place_lightbulb(board.get_square(location))
+    check(board, set(board.get_certificate()))
+    board.remove_lightbulbs()
+    check(board, set())
+
+
+def test_add_black_square_rebuilds_the_runs():
+    board = generator.generate(8, 8, 0.05, seed=7)
+    location = sorted(board.run_index)[10]
+    board.add_black_square(location, 'B')
+    assert location not in board.run_index
+    for other in board.run_index:
+        horizontal, vertical = board.get_runs(board.get_square(other))
+        assert {square.get_location() for square in horizontal + vertical} == ray_squares(board, other)
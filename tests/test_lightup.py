@@ -0,0 +1,38 @@
+import pytest
+
+import generator
+import grading
+import puzzle_format
+from lightup import Black, White
+
+
+@pytest.mark.parametrize('rows, columns', [(7, 7), (5, 12), (12, 5), (1, 9), (30, 30)])
+def test_boards_of_any_size(rows, columns):
+    board = generator.generate(rows, columns, seed=rows * 100 + columns)
+    assert board.get_size() == (rows, columns)
+    lines = puzzle_format.grid(board)
+    assert len(lines) == rows and all(len(line) == columns for line in lines)
+    assert len(board.get_squares()) == rows * columns
+    assert grading.grade(board, board.get_certificate()).solved
+
+
+@pytest.mark.parametrize('density', [0.0, 0.1, 0.3, 0.5])
+def test_density_sets_the_number_of_black_squares(density):
+    board = generator.generate(20, 25, density, seed=1)
+    assert len(board.black) == round(density * 20 * 25)
+    assert grading.grade(board, board.get_certificate()).solved
+
+
+def test_default_density_scales_the_classic_range():
+    for seed in range(10):
+        board = generator.generate(14, 14, seed=seed)
+        assert 8 * 196 // 49 <= len(board.black) <= 11 * 196 // 49
+
+
+def test_border_and_square_types():
+    board = generator.generate(4, 6, seed=3)
+    assert board.get_square((0, 0)) == '-' and board.get_square((5, 7)) == '-'
+    for square in board.get_squares():
+        assert type(square) in (Black, White)
+    with pytest.raises(KeyError):
+        board.get_square((6, 1))
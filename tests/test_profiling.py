@@ -0,0 +1,50 @@
+import json
+
+import generator
+import profiling
+from solver import Solver
+
+
+def test_profiling_is_off_by_default():
+    assert profiling.active is None
+    generator.generate(7, 7, seed=1)
+    assert profiling.active is None
+
+
+def test_ray_steps_count_the_squares_of_the_runs():
+    board = generator.generate(9, 9, seed=2)
+    location = next(iter(board.get_certificate()))
+    square = board.get_square(location)
+    horizontal, vertical = board.get_runs(square)
+    with profiling.profile() as stats:
+        board.place_lightbulb(square)
+        board.remove_lightbulb(square)
+    assert stats.get_counters()['ray_steps'] == 2 * (len(horizontal) + len(vertical) - 1)
+    assert profiling.active is None
+
+
+def test_stages_and_solver_counters(tmp_path):
+    board = generator.generate(10, 10, seed=3)
+    with profiling.profile() as stats:
+        with stats.stage('outer'):
+            solver = Solver(board)
+            solver.solve()
+    assert stats.stages['outer']['calls'] == 1
+    assert stats.stages['outer/solve']['calls'] == 1
+    assert stats.get_counters()['solver_nodes'] == solver.get_stats()['nodes']
+
+    path = str(tmp_path / 'profile.json')
+    stats.export(path)
+    with open(path) as file:
+        assert json.load(file) == json.loads(json.dumps(stats.get_stats()))
+    assert 'outer/solve' in stats.report()
+
+
+def test_nested_profiles_restore_the_previous_one():
+    with profiling.profile() as outer:
+        with profiling.profile() as inner:
+            assert profiling.active is inner
+        assert profiling.active is outer
+        outer.count('things', 3)
+        outer.count('things')
+    assert outer.get_counters() == {'things': 4}
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+import generator
+import puzzle_format
+from puzzle_format import FLAG_ANSWER, FLAG_SOLUTION
+
+
+@pytest.mark.parametrize('bits', [1, 3])
+def test_pack_unpack_round_trip(bits):
+    rng = random.Random(bits)
+    for count in range(0, 40):
+        values = [rng.randrange(1 << bits) for i in range(count)]
+        data = puzzle_format.pack(values, bits)
+        assert len(data) == -(-count * bits // 8)
+        assert puzzle_format.unpack(data, count, bits) == values
+
+
+def test_encode_decode_round_trip():
+    board = generator.generate(9, 13, seed=4)
+    answer = sorted(board.get_certificate())[:3]
+    flags = FLAG_SOLUTION | FLAG_ANSWER
+    data = puzzle_format.encode(board, flags, answer)
+    assert len(data) == puzzle_format.record_size(9, 13, flags)
+
+    rows, columns, lines, solution, stored, end = puzzle_format.decode(data, flags=flags)
+    assert (rows, columns, end) == (9, 13, len(data))
+    assert lines == puzzle_format.grid(board)
+    assert sorted(solution) == sorted(board.get_certificate())
+    assert sorted(stored) == answer
+
+
+@pytest.mark.parametrize('density', [None, 0.03])
+def test_tatham_round_trip(density):
+    # a low density gives runs of more than 26 White squares ('z' followed by more letters)
+    board = generator.generate(12, 40, density, seed=6)
+    game_id = puzzle_format.to_tatham(board)
+    assert game_id.startswith('40x12:')
+    assert puzzle_format.tatham_grid(game_id) == (12, 40, puzzle_format.grid(board))
+    assert puzzle_format.grid(puzzle_format.from_tatham(game_id)) == puzzle_format.grid(board)
+
+
+def test_tatham_grid_rejects_wrong_size():
+    with pytest.raises(ValueError):
+        puzzle_format.tatham_grid('3x3:aB')
+
+
+@pytest.mark.parametrize('binary', [True, False])
+def test_writer_and_records(tmp_path, binary):
+    boards = [generator.generate(7, 7, seed=seed) for seed in range(4)]
+    path = str(tmp_path / 'puzzles')
+    with puzzle_format.PuzzleWriter(path, binary=binary) as writer:
+        for board in boards:
+            writer.write(board)
+    read = list(puzzle_format.read_puzzles(path))
+    assert [puzzle_format.grid(board) for board in read] == [puzzle_format.grid(board) for board in boards]
+    if binary:
+        assert [board.get_certificate().keys() for board in read] == \
+               [board.get_certificate().keys() for board in boards]
+
+
+def test_answer_may_be_any_collection():
+    board = generator.generate(6, 6, seed=2)
+    answer = sorted(board.get_certificate())
+    flags = FLAG_SOLUTION | FLAG_ANSWER
+    records = {puzzle_format.encode(board, flags, collection)
+               for collection in (answer, tuple(answer), set(answer), dict.fromkeys(answer), iter(answer))}
+    assert len(records) == 1
+
+
+def test_iter_records_of_text_files(tmp_path):
+    boards = [generator.generate(5, 8, seed=seed) for seed in range(3)]
+    path = str(tmp_path / 'puzzles.txt')
+    with puzzle_format.PuzzleWriter(path, binary=False) as writer:
+        for board in boards:
+            writer.write(board)
+    records = list(puzzle_format.iter_records(path))
+    assert [record[2] for record in records] == [puzzle_format.grid(board) for board in boards]
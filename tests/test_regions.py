@@ -0,0 +1,44 @@
+import pytest
+
+import generator
+import grading
+import puzzle_format
+import regions
+
+
+def answer_rows(lines, answer):
+    return [(line, [y for (x, y) in answer if x == i]) for i, line in enumerate(lines, 1)]
+
+
+def test_verify_generated_rows():
+    rows = list(regions.generate_rows(30, 40, seed=1))
+    assert regions.verify(iter(rows)).solved
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_verify_agrees_with_grading(seed):
+    board = generator.generate(9, 11, seed=seed)
+    lines = puzzle_format.grid(board)
+    puzzle = grading.Puzzle(lines)
+    certificate = sorted(board.get_certificate())
+    white = sorted(board.run_index)
+    for answer in (certificate, certificate[1:], certificate + white[:3], [(1, 0)] + certificate):
+        check = regions.verify(answer_rows(lines, answer))
+        grade = puzzle.grade(answer)
+        assert check.solved == grade.solved
+        assert check.unlit == len(grade.unlit)
+        assert check.conflicts == len(grade.conflicts)
+        assert check.wrong_clues == len(grade.wrong_clues)
+        assert (check.invalid > 0) == bool(grade.invalid)
+
+
+def test_verify_rejects_ragged_rows():
+    with pytest.raises(ValueError):
+        regions.verify([('...', []), ('..', [])])
+
+
+def test_solve_matches_generated_rows():
+    rows = list(regions.generate_rows(25, 30, seed=4))
+    lines = [line for line, bulbs in rows]
+    answer = [location for bulbs in regions.solve(lines, workers=0) for location in bulbs]
+    assert grading.Puzzle(lines).grade(answer).solved
@@ -0,0 +1,35 @@
+import pytest
+
+import generator
+import grading
+import puzzle_format
+import sat
+from solver import Solver
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_sat_agrees_with_the_solver(seed):
+    board = generator.generate(10, 10, seed=seed)
+    assert sat.count_solutions(board, 2) == Solver(board).count_solutions(2)
+    assert grading.grade(board, sat.solve(board)).solved
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sat_agrees_on_unique_boards(seed):
+    board = generator.generate_unique(8, 8, seed=seed)
+    assert sat.is_unique(board)
+    assert sat.solve(board).keys() == board.get_certificate().keys()
+
+
+def test_sat_lists_every_solution():
+    board = puzzle_format.board_from_grid(['...', '#..'])
+    found = sorted(sorted(certificate) for certificate in sat.solutions(board))
+    assert found == sorted(sorted(certificate) for certificate in Solver(board).solutions())
+    assert sat.solve(puzzle_format.board_from_grid(['.4.'])) is None
+
+
+def test_long_runs_use_the_sequential_counter():
+    board = puzzle_format.board_from_grid(['.' * 12])
+    cnf = sat.CNF(board)
+    assert cnf.num_vars > 12
+    assert sat.count_solutions(board, 20) == 12
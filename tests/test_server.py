@@ -0,0 +1,103 @@
+import asyncio
+import json
+import struct
+
+import pytest
+
+import server
+from server import CLOSE, CONTINUATION, MAX_MESSAGE, PING, TEXT
+
+
+def read(*frames):
+    """Runs read_message on the frames (each (opcode, payload, fin))."""
+    async def run():
+        reader = asyncio.StreamReader()
+        for opcode, payload, fin in frames:
+            data = server.frame(opcode, payload, masked=True)
+            reader.feed_data(data if fin else bytes([data[0] & 0x7F]) + data[1:])
+        reader.feed_eof()
+        return await server.read_message(reader)
+    return asyncio.run(run())
+
+
+def test_read_message_joins_fragments():
+    assert read((TEXT, b'ab', False), (CONTINUATION, b'cd', True)) == (TEXT, b'abcd')
+
+
+def test_read_message_returns_control_frames_between_fragments():
+    assert read((TEXT, b'ab', False), (PING, b'x', True)) == (PING, b'x')
+
+
+def test_read_message_allows_the_limit():
+    assert read((TEXT, b'x' * MAX_MESSAGE, True)) == (TEXT, b'x' * MAX_MESSAGE)
+
+
+def test_read_message_rejects_large_frame():
+    with pytest.raises(server.MessageTooBig):
+        read((TEXT, b'x' * (MAX_MESSAGE + 1), True))
+
+
+def test_read_message_rejects_large_fragmented_message():
+    half = b'x' * (MAX_MESSAGE // 2 + 1)
+    with pytest.raises(server.MessageTooBig):
+        read((TEXT, half, False), (CONTINUATION, half, True))
+
+
+class Writer:
+    # Collects what the server writes (and counts the drains).
+    def __init__(self):
+        self.data = b''
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+def run_session(*payloads, close=True):
+    """Sends the payloads as text frames (then a close frame); returns the Writer and the replies."""
+    async def run():
+        reader = asyncio.StreamReader()
+        for opcode, payload in payloads:
+            reader.feed_data(server.frame(opcode, payload, masked=True))
+        if close:
+            reader.feed_data(server.frame(CLOSE, struct.pack('>H', 1000), masked=True))
+        writer = Writer()
+        await server.Server(pool=None).run_session(reader, writer)
+
+        replies = asyncio.StreamReader()
+        replies.feed_data(writer.data)
+        replies.feed_eof()
+        frames = []
+        while not replies.at_eof():
+            frames.append(await server.read_message(replies))
+        return writer, frames
+    return asyncio.run(run())
+
+
+def test_session_closes_with_1009():
+    writer, frames = run_session((TEXT, b'x' * (MAX_MESSAGE + 1)), close=False)
+    assert frames == [(CLOSE, struct.pack('>H', server.TOO_BIG))]
+
+
+@pytest.mark.parametrize('payload', [b'[1, 2]', b'"x"', b'3', b'null', b'{"type": "place"}', b'not json'])
+def test_bad_messages_get_an_error(payload):
+    writer, frames = run_session((TEXT, payload))
+    assert len(frames) == 2 and frames[-1][0] == CLOSE
+    assert json.loads(frames[0][1])['type'] == 'error'
+
+
+@pytest.mark.parametrize('size', [(7.0, 7), (7, '7'), (True, 7), (8, 8)])
+def test_new_game_needs_a_served_integer_size(size):
+    message = json.dumps({'type': 'new', 'rows': size[0], 'columns': size[1]}).encode()
+    writer, frames = run_session((TEXT, message))
+    reply = json.loads(frames[0][1])
+    assert reply['type'] == 'error' and '7x7' in reply['message']
+
+
+def test_ping_is_answered_and_drained():
+    writer, frames = run_session((PING, b'hello'))
+    assert frames[0] == (server.PONG, b'hello')
+    assert writer.drains == 2
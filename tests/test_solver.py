@@ -0,0 +1,37 @@
+import pytest
+
+import generator
+import grading
+import puzzle_format
+import solver
+from solver import Solver
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_solutions_are_valid(seed):
+    board = generator.generate(10, 10, seed=seed)
+    certificate = solver.solve(board)
+    assert certificate is not None
+    assert grading.grade(board, certificate).solved
+
+
+def test_all_solutions_are_found():
+    # a 1 x 3 row has three solutions (one light bulb anywhere), and a clue picks one
+    board = puzzle_format.board_from_grid(['...'])
+    solutions = [sorted(certificate) for certificate in Solver(board).solutions()]
+    assert sorted(solutions) == [[(1, 1)], [(1, 2)], [(1, 3)]]
+    assert Solver(board).count_solutions(2) == 2
+    assert sorted(Solver(puzzle_format.board_from_grid(['..1'])).solve()) == [(1, 2)]
+
+
+def test_no_solution():
+    board = puzzle_format.board_from_grid(['.4.'])
+    assert Solver(board).solve() is None
+    assert solver.solve(board) is None
+
+
+def test_search_limit_falls_back_to_sat():
+    board = generator.generate(12, 12, 0.1, seed=1)
+    with pytest.raises(solver.SearchLimit):
+        Solver(board, limit=0).solve()
+    assert grading.grade(board, solver.solve(board)).solved
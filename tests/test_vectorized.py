@@ -0,0 +1,63 @@
+import random
+
+import generator
+import grading
+import puzzle_format
+import vectorized
+from lightup import White
+
+
+def answers(board, rng):
+    certificate = sorted(board.get_certificate())
+    white = sorted(board.run_index)
+    yield certificate
+    yield certificate[1:]
+    yield certificate + [rng.choice(white)]
+    yield [(0, 0), (1, 1)] + certificate
+    for size in (0, 3, len(certificate)):
+        yield rng.sample(white, size)
+
+
+def test_grade_batch_matches_grading():
+    rng = random.Random(23)
+    # different sizes, so the smaller puzzles are padded with walls
+    boards = [generator.generate(rows, columns, seed=seed)
+              for seed, (rows, columns) in enumerate([(7, 7), (9, 6), (5, 11), (10, 10)])]
+    pairs = [(board, answer) for board in boards for answer in answers(board, rng)]
+    pairs.append((tuple(puzzle_format.grid(boards[1])), sorted(boards[1].get_certificate())))
+    pairs.append((boards[2], [(6, 1), (1, 12), (-1, 3)]))
+    assert vectorized.grade_batch(pairs) == grading.grade_batch(pairs)
+
+
+def test_check_matches_the_boards():
+    rng = random.Random(24)
+    boards = [generator.generate(8, 8, seed=seed) for seed in range(5)]
+    chosen = [rng.sample(sorted(board.run_index), 6) for board in boards]
+    walls, clues = vectorized.stack(boards)
+    bulbs, inside = vectorized.bulb_array(chosen, walls.shape)
+    assert inside.all()
+    result = vectorized.check(walls, clues, bulbs)
+    lit = vectorized.illuminate(walls, bulbs)
+    overlap = vectorized.conflicts(walls, bulbs)
+
+    for b, (board, answer) in enumerate(zip(boards, chosen)):
+        board = puzzle_format.board_from_grid(puzzle_format.grid(board))
+        squares = {location: board.get_square(location) for location in answer}
+        for square in squares.values():
+            board.place_lightbulb(square)
+        for square in board.get_squares():
+            x, y = square.get_location()
+            if type(square) == White:
+                assert lit[b, x - 1, y - 1] == square.get_illuminated()
+                assert overlap[b, x - 1, y - 1] == (square.get_light_bulb() and square.get_overlap())
+            else:
+                assert not lit[b, x - 1, y - 1]
+        assert result['solved'][b] == board.verifier(squares)
+
+
+def test_stack_pads_with_walls():
+    walls, clues = vectorized.stack([['.1', '..'], ['...']])
+    assert walls.shape == clues.shape == (2, 2, 3)
+    assert walls[0].tolist() == [[False, True, True], [False, False, True]]
+    assert walls[1].tolist() == [[False, False, False], [True, True, True]]
+    assert clues[0, 0, 1] == 1 and clues[0, 0, 2] == -1
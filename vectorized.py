@@ -0,0 +1,168 @@
+import numpy as np
+
+from grading import Grade
+from puzzle_format import grid
+
+# Many puzzles (and answers) at once as NumPy arrays of shape (batch, rows, columns):
+#   walls  - bool, True for Black squares
+#   clues  - int8, the number of a numbered Black square and -1 for every other square
+#   bulbs  - bool, True for a light bulb
+# Puzzles of different sizes are padded with Black squares up to the largest size, which
+# changes nothing about their runs or clues. A square's runs are found with a cumulative sum
+# of the walls along its row and column (the square's segment of that line), and counting the
+# light bulbs of every segment at once gives each square the light bulbs that see it.
+# NumPy is only needed by this module.
+
+
+def stack(puzzles):
+    """
+    Returns (walls, clues) for a sequence of puzzles, each a Board or grid lines
+    (see puzzle_format.grid).
+    """
+    lines = [puzzle if isinstance(puzzle, (list, tuple)) else grid(puzzle) for puzzle in puzzles]
+    rows = max([len(puzzle) for puzzle in lines] + [0])
+    columns = max([len(puzzle[0]) for puzzle in lines if puzzle] + [0])
+    codes = np.full((len(lines), rows, columns), ord('#'), dtype=np.uint8)
+    for b, puzzle in enumerate(lines):
+        if puzzle:
+            codes[b, :len(puzzle), :len(puzzle[0])] = np.frombuffer(
+                ''.join(puzzle).encode(), dtype=np.uint8).reshape(len(puzzle), -1)
+
+    walls = codes != ord('.')
+    clues = np.where((codes >= ord('0')) & (codes <= ord('4')), codes.astype(np.int8) - ord('0'), -1)
+    return walls, clues.astype(np.int8)
+
+
+def bulb_array(answers, shape):
+    """
+    Returns (bulbs, valid) for a sequence of answers (collections of light bulb locations),
+    one per puzzle of a batch of the given shape: the bulbs array, and for each answer a list
+    of whether each of its locations lies on the Board (in the answer's order).
+    """
+    batch, rows, columns = shape
+    bulbs = np.zeros(shape, dtype=bool)
+    owners, xs, ys = [], [], []
+    for b, answer in enumerate(answers):
+        for x, y in answer:
+            owners.append(b)
+            xs.append(x)
+            ys.append(y)
+    owners, xs, ys = np.array(owners, dtype=np.intp), np.array(xs, dtype=np.intp), np.array(ys, dtype=np.intp)
+    inside = (xs >= 1) & (xs <= rows) & (ys >= 1) & (ys <= columns)
+    bulbs[owners[inside], xs[inside] - 1, ys[inside] - 1] = True
+    return bulbs, inside
+
+
+def segment_counts(walls, bulbs, axis):
+    """
+    Returns, for every square, the number of light bulbs in its segment of the line along
+    'axis' (1 for columns, 2 for rows), a segment being the squares between two walls.
+    """
+    walls = np.moveaxis(walls, axis, -1)
+    bulbs = np.moveaxis(bulbs, axis, -1)
+    length = walls.shape[-1] + 1        # at most this many segments per line
+
+    # the segment of a square is the number of walls up to it in its line, offset by the line
+    lines = np.arange(walls[..., 0].size, dtype=np.intp).reshape(walls.shape[:-1] + (1,))
+    segments = (np.cumsum(walls, axis=-1, dtype=np.intp) + lines * length).ravel()
+    totals = np.bincount(segments[bulbs.ravel()], minlength=lines.size * length)
+    return np.moveaxis(totals[segments].reshape(walls.shape), -1, axis)
+
+
+def run_counts(walls, bulbs):
+    """
+    Returns (horizontal, vertical): the number of light bulbs in the horizontal and in the
+    vertical run of every square (meaningful for White squares only).
+    """
+    bulbs = bulbs & ~walls
+    return segment_counts(walls, bulbs, 2), segment_counts(walls, bulbs, 1)
+
+
+def illuminate(walls, bulbs):
+    """Returns the White squares that a light bulb illuminates (the same as Board.update_light)."""
+    horizontal, vertical = run_counts(walls, bulbs)
+    return ~walls & (horizontal + vertical > 0)
+
+
+def conflicts(walls, bulbs):
+    """Returns the light bulbs that are illuminated by another light bulb."""
+    horizontal, vertical = run_counts(walls, bulbs)
+    # a light bulb is counted in both of its runs, so any other light bulb makes it more than 2
+    return bulbs & ~walls & (horizontal + vertical > 2)
+
+
+def neighbor_counts(bulbs):
+    """Returns the number of light bulbs next to (north, east, south, west) every square."""
+    padded = np.pad(bulbs.astype(np.int8), ((0, 0), (1, 1), (1, 1)))
+    return padded[:, :-2, 1:-1] + padded[:, 2:, 1:-1] + padded[:, 1:-1, :-2] + padded[:, 1:-1, 2:]
+
+
+def check(walls, clues, bulbs):
+    """
+    Checks every answer of a batch at once and returns a dictionary of arrays:
+      'solved'      - (batch,) bool, whether the answer wins
+      'invalid'     - (batch,) light bulbs on Black squares
+      'unlit'       - (batch, rows, columns) White squares that no light bulb illuminates
+      'conflicts'   - (batch, rows, columns) light bulbs illuminated by another light bulb
+      'adjacent'    - (batch, rows, columns) light bulbs next to every square
+      'wrong_clues' - (batch, rows, columns) numbered Black squares with another number of light bulbs
+    This equals placing the light bulbs with place_lightbulb and checking them with
+    verifier on every Board.
+    """
+    invalid = (bulbs & walls).sum(axis=(1, 2))
+    bulbs = bulbs & ~walls
+    horizontal, vertical = run_counts(walls, bulbs)
+    lit = horizontal + vertical
+    unlit = ~walls & (lit == 0)
+    conflicting = bulbs & (lit > 2)
+    adjacent = neighbor_counts(bulbs)
+    wrong_clues = (clues >= 0) & (adjacent != clues)
+    solved = (invalid == 0) & ~(unlit | conflicting | wrong_clues).any(axis=(1, 2))
+    return {'solved': solved, 'invalid': invalid, 'unlit': unlit, 'conflicts': conflicting,
+            'adjacent': adjacent, 'wrong_clues': wrong_clues}
+
+
+def grade_batch(pairs):
+    """
+    Grades many (puzzle, answer) pairs at once and returns a list of grading.Grades in the
+    same order, the same as grading.grade_batch. Each distinct puzzle (Board or tuple of grid
+    lines) is converted only once.
+    """
+    pairs = list(pairs)
+    puzzles = {}        # grid lines or id(Board) -> (Board or None, index in unique)
+    unique = []
+    index = []
+    for puzzle, answer in pairs:
+        key = puzzle if isinstance(puzzle, tuple) else id(puzzle)
+        if key not in puzzles:
+            # keep the Board referenced, so its id cannot be reused while the batch runs
+            puzzles[key] = puzzle, len(unique)
+            unique.append(puzzle)
+        index.append(puzzles[key][1])
+
+    walls, clues = stack(unique)
+    walls, clues = walls[index], clues[index]
+    answers = [list(answer) for puzzle, answer in pairs]
+    bulbs, inside = bulb_array(answers, walls.shape)
+    result = check(walls, clues, bulbs)
+
+    # answer locations outside the Board or on a Black square, in the answer's order
+    invalid = [[] for answer in answers]
+    position = 0
+    for b, answer in enumerate(answers):
+        if result['invalid'][b] or not inside[position:position + len(answer)].all():
+            invalid[b] = [(x, y) for (x, y), on_board in zip(answer, inside[position:position + len(answer)])
+                          if not on_board or walls[b, x - 1, y - 1]]
+        position += len(answer)
+
+    grades = []
+    for b in range(len(pairs)):
+        if result['solved'][b] and not invalid[b]:
+            grades.append(Grade(True, [], [], [], []))
+            continue
+        unlit = [(x + 1, y + 1) for x, y in np.argwhere(result['unlit'][b]).tolist()]
+        conflicting = [(x + 1, y + 1) for x, y in np.argwhere(result['conflicts'][b]).tolist()]
+        wrong_clues = [((x + 1, y + 1), int(clues[b, x, y]), int(result['adjacent'][b, x, y]))
+                       for x, y in np.argwhere(result['wrong_clues'][b]).tolist()]
+        grades.append(Grade(False, invalid[b], unlit, conflicting, wrong_clues))
+    return grades